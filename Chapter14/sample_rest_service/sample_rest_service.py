@@ -2,17 +2,20 @@
 
 
 This is a simple test REST service implemented in flask
-for ABQ Data Entry.  It provides 3 endpoints:
+for ABQ Data Entry.  It provides 4 endpoints:
 
 - /auth for authenticating
 - /upload for uploading a file
 - /files for downloading a file
+- /files/<filename>/manifest for per-block hashes of a file
 
 /files can respond to HEAD requests to simply check the file's
-existence and size.
+existence and size.  It also accepts PATCH requests containing
+changed blocks, so a client can update a file without re-sending it.
 """
 
 import sys
+import hashlib
 from pathlib import Path
 from time import sleep
 
@@ -78,13 +81,58 @@ def files(filename):
   fp = Path(filename)
   if not fp.exists():
     return make_error(404, 'File not found')
-  response = f.Response()
-  response.headers.add('content-length', fp.stat().st_size)
   if f.request.method == 'HEAD':
+    response = f.Response()
+    response.headers.add('content-length', fp.stat().st_size)
     return response
   sleep(30)
-  response.set_data(fp.read_text())
-  return response
+  # send_file streams from disk and honors Range / If-Range headers,
+  # so interrupted downloads can be resumed
+  return f.send_file(fp.resolve(), conditional=True)
+
+
+@app.route('/files/<filename>/manifest', methods=['GET'])
+def manifest(filename):
+  """Endpoint for the per-block SHA-256 hashes of a file"""
+  if not f.session.get('authenticated'):
+    return make_error(403, 'Access is forbidden')
+  fp = Path(filename)
+  if not fp.exists():
+    return make_error(404, 'File not found')
+  block_size = f.request.args.get('block_size', 4096, type=int)
+  hashes = list()
+  with fp.open('rb') as fh:
+    for block in iter(lambda: fh.read(block_size), b''):
+      hashes.append(hashlib.sha256(block).hexdigest())
+  return f.jsonify({
+    'size': fp.stat().st_size,
+    'block_size': block_size,
+    'hashes': hashes
+  })
+
+@app.route('/files/<filename>', methods=['PATCH'])
+def patch_file(filename):
+  """Endpoint for writing changed blocks into an existing file
+
+  Each uploaded file part is named by its block index.
+  """
+  if not f.session.get('authenticated'):
+    return make_error(403, 'Access is forbidden')
+  fp = Path(filename)
+  if not fp.exists():
+    return make_error(404, 'File not found')
+  try:
+    size = int(f.request.form['size'])
+    block_size = int(f.request.form['block_size'])
+  except (KeyError, ValueError):
+    return make_error(400, 'size and block_size are required')
+  with fp.open('r+b') as fh:
+    for index, block in f.request.files.items():
+      fh.seek(int(index) * block_size)
+      fh.write(block.read())
+    fh.truncate(size)
+  print(f'Patched {len(f.request.files)} blocks of {filename}')
+  return f.jsonify({'message': 'Success'})
 
 
 ##################
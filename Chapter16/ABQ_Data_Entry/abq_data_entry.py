@@ -1,6 +1,11 @@
+import logging
+import sys
 from abq_data_entry.application import Application
 
 def main():
+  if '--debug' in sys.argv:
+    # e.g. start-up timings
+    logging.basicConfig(level=logging.DEBUG)
   app = Application()
   app.mainloop()
 
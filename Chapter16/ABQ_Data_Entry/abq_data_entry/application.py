@@ -6,13 +6,66 @@ from tkinter import messagebox
 from tkinter import filedialog
 from tkinter import font
 import platform
-from queue import Queue
+import logging
+from threading import Thread
+from time import perf_counter
+from contextlib import contextmanager
 
 from . import views as v
 from . import models as m
+from . import network
+from .dispatch import DispatchQueue
 from .mainmenu import get_main_menu_for_os
 from . import images
 
+log = logging.getLogger(__name__)
+
+
+class StartupTimer:
+  """Time each stage of start-up
+
+  Interactive stages, like waiting on the login dialog, are recorded
+  but left out of the milestones, which measure elapsed start-up time.
+  """
+
+  def __init__(self):
+    self.started = perf_counter()
+    self.stages = dict()
+    self.milestones = dict()
+    self._waiting = 0
+
+  @contextmanager
+  def stage(self, name, interactive=False):
+    """Time the enclosed block as stage name"""
+    started = perf_counter()
+    try:
+      yield
+    finally:
+      elapsed = perf_counter() - started
+      self.record(name, elapsed)
+      if interactive:
+        self._waiting += elapsed
+
+  def record(self, name, elapsed):
+    """Record a stage timed elsewhere, such as on a worker thread"""
+    self.stages[name] = elapsed
+
+  def mark(self, name):
+    """Record the start-up time taken to reach milestone name"""
+    if name not in self.milestones:
+      self.milestones[name] = perf_counter() - self.started - self._waiting
+
+  def report(self):
+    """Describe the milestones and stages in milliseconds"""
+    milestones = ', '.join(
+      f'{name} in {secs * 1000:.0f} ms'
+      for name, secs in self.milestones.items()
+    )
+    stages = ', '.join(
+      f'{name} {secs * 1000:.0f} ms' for name, secs in self.stages.items()
+    )
+    return f'Start-up: {milestones} ({stages})'
+
 
 class Application(tk.Tk):
   """Application root window"""
@@ -20,23 +73,24 @@ class Application(tk.Tk):
 
   def __init__(self, *args, **kwargs):
     super().__init__(*args, **kwargs)
+    self.startup = StartupTimer()
 
     # move here for ch12 because we need some settings data to authenticate
-    self.settings_model = m.SettingsModel()
-    self._load_settings()
+    with self.startup.stage('settings'):
+      self.settings_model = m.SettingsModel()
+      self._load_settings()
+
+    # Records are journaled locally before they go to the database
+    self.journal = m.RecordJournal()
 
     # Hide window while GUI is built
     self.withdraw()
 
     # Authenticate
-    if not self._show_login():
-      self.destroy()
-      return
-
-    # show the window
-    # chapter14:  use after() here to eliminate the small window
-    # that flashes up breifly
-    self.after(250, self.deiconify)
+    with self.startup.stage('login', interactive=True):
+      if not self._show_login():
+        self.destroy()
+        return
 
    # Create model
    # remove for ch12
@@ -45,7 +99,44 @@ class Application(tk.Tk):
     self.inserted_rows = []
     self.updated_rows = []
 
+    # Messages from background work wake the Tk loop as they arrive
+    self.messages = DispatchQueue(self, self._process_messages)
+    self._loaded_records = DispatchQueue(self, self._on_records_loaded)
+
     # Begin building GUI
+    with self.startup.stage('window'):
+      self._build_window()
+
+    # Only the visible tab is built now; the record form is built
+    # the first time its tab is selected
+    with self.startup.stage('record list'):
+      self._build_recordlist()
+
+    # show the window as soon as its layout is known
+    self.after_idle(self._show_window)
+
+    # fetch the records without holding up the window
+    self._load_recordlist()
+
+    with self.startup.stage('background services'):
+      # One event loop thread serves all network requests when possible
+      self.network = network.AsyncLoop() if network.available else None
+      if self.network:
+        self.network.start()
+
+      # Collect weather data in the background
+      self._start_weather_collector()
+
+      # Send journaled records to the database in the background
+      self.replayer = m.JournalReplayer(
+        self.journal, self.messages,
+        model=None if self.model.offline else self.model,
+        connect=self._connect_database
+      )
+      self.replayer.start()
+
+  def _build_window(self):
+    """Build the menu, header, notebook and status bar"""
     self.title("ABQ Data Entry Application")
     self.columnconfigure(0, weight=1)
 
@@ -63,11 +154,13 @@ class Application(tk.Tk):
       '<<FileQuit>>': lambda _: self.quit(),
       '<<ShowRecordlist>>': self._show_recordlist,
       '<<NewRecord>>': self._new_record,
+      '<<NewBatch>>': self._new_batch,
       '<<UpdateWeatherData>>': self._update_weather_data,
       '<<UploadToCorporateREST>>': self._upload_to_corporate_rest,
       '<<UploadToCorporateSFTP>>': self._upload_to_corporate_sftp,
       '<<ShowGrowthChart>>': self.show_growth_chart,
-      '<<ShowYieldChart>>': self.show_yield_chart
+      '<<ShowYieldChart>>': self.show_yield_chart,
+      '<<ShowRejectedRecords>>': self.show_rejected_records
      }
     for sequence, callback in event_callbacks.items():
       self.bind(sequence, callback)
@@ -87,17 +180,28 @@ class Application(tk.Tk):
     self.notebook.enable_traversal()
     self.notebook.grid(row=1, padx=10, sticky='NSEW')
 
-    # The data record form
+    # The data record form's tab holds an empty frame until it's needed
+    self._recordform = None
     self.recordform_icon = tk.PhotoImage(file=images.FORM_ICON)
-    self.recordform = v.DataRecordForm(self, self.model, self.settings)
+    self.recordform_tab = ttk.Frame(self)
     self.notebook.add(
-        self.recordform, text='Entry Form',
+        self.recordform_tab, text='Entry Form',
         image=self.recordform_icon, compound=tk.LEFT
     )
-    self.recordform.bind('<<SaveRecord>>', self._on_save)
+    self.notebook.bind('<<NotebookTabChanged>>', self._on_tab_changed)
 
+    # The batch entry grid gets a tab the first time it's opened
+    self.batchgrid = None
+
+    # status bar
+    self.status = tk.StringVar()
+    self.statusbar = ttk.Label(self, textvariable=self.status)
+    self.statusbar.grid(sticky=(tk.W + tk.E), row=3, padx=10)
 
-    # The data record list
+    self.records_saved = 0
+
+  def _build_recordlist(self):
+    """Build the record list tab, showing a placeholder until it's loaded"""
     self.recordlist_icon = tk.PhotoImage(file=images.LIST_ICON)
     self.recordlist = v.RecordList(self)
 
@@ -105,20 +209,34 @@ class Application(tk.Tk):
         0, self.recordlist, text='Records',
         image=self.recordlist_icon, compound=tk.LEFT
     )
-    self._populate_recordlist()
     self.recordlist.bind('<<OpenRecord>>', self._open_record)
-
+    self.recordlist.show_loading()
 
     self._show_recordlist()
 
-    # status bar
-    self.status = tk.StringVar()
-    self.statusbar = ttk.Label(self, textvariable=self.status)
-    self.statusbar.grid(sticky=(tk.W + tk.E), row=3, padx=10)
-
-
-    self.records_saved = 0
-
+  @property
+  def recordform(self):
+    """The data record form, built the first time it's used"""
+    if self._recordform is None:
+      with self.startup.stage('record form'):
+        self._recordform = v.DataRecordForm(
+          self.recordform_tab, self.model, self.settings
+        )
+        self._recordform.pack(fill=tk.BOTH, expand=True)
+        self._recordform.bind('<<SaveRecord>>', self._on_save)
+    return self._recordform
+
+  def _on_tab_changed(self, *_):
+    """Build the record form when its tab is first selected"""
+    if self.notebook.select() == str(self.recordform_tab):
+      self.recordform  # the property builds it
+
+  def _show_window(self):
+    """Show the main window and note how long start-up took"""
+    self.update_idletasks()
+    self.deiconify()
+    self.startup.mark('first interaction')
+    log.debug(self.startup.report())
 
   def _on_save(self, *_):
     """Handles file-save requests"""
@@ -144,18 +262,29 @@ class Application(tk.Tk):
 
     data = self.recordform.get()
     rowkey = self.recordform.current_record
-    self.model.save_record(data, rowkey)
+    # the replayer sends it on to the database
+    self.journal.append(data, rowkey)
+    self.replayer.notify()
     if rowkey is not None:
       self.updated_rows.append(rowkey)
     else:
       rowkey = (data['Date'], data['Time'], data['Lab'], data['Plot'])
       self.inserted_rows.append(rowkey)
     self.records_saved += 1
+    self._show_saved_count()
+    self.recordform.reset()
+    if self.model.offline:
+      self._load_recordlist()
+
+  def _show_saved_count(self):
+    """Show the records saved, and those still waiting for the database"""
+    waiting = self.journal.count()
     self.status.set(
-      "{} records saved this session".format(self.records_saved)
+      "{} records saved this session{}".format(
+        self.records_saved,
+        f' ({waiting} waiting for the database)' if waiting else ''
+      )
     )
-    self.recordform.reset()
-    self._populate_recordlist()
 
 # Remove for ch12
 #  def _on_file_select(self, *_):
@@ -180,16 +309,42 @@ class Application(tk.Tk):
   # new ch12
   def _database_login(self, username, password):
     """Try to login to the database and create self.model"""
-    db_host = self.settings['db_host'].get()
-    db_name = self.settings['db_name'].get()
+    self._credentials = (username, password)
     try:
-      self.model = m.SQLModel(
-        db_host, db_name, username, password)
-    except m.pg.OperationalError as e:
+      self.model = self._connect_database()
+    except (m.pg.OperationalError, m.DatabaseUnavailable) as e:
       print(e)
+      self._login_error = e
       return False
+    self.journal.save_lookups({
+      key: self.model.fields[key]['values']
+      for key in m.OfflineModel.lookup_fields
+    })
     return True
 
+  def _connect_database(self):
+    """Create an SQLModel with the credentials used to log in"""
+    db_host = self.settings['db_host'].get()
+    db_name = self.settings['db_name'].get()
+    return m.SQLModel(db_host, db_name, *self._credentials)
+
+  def _offline_login(self):
+    """Offer to work offline when the database can't be reached"""
+    # only offer it when the server is down, not when it refused the login
+    if not isinstance(self._login_error, m.DatabaseUnavailable):
+      return False
+    offline = messagebox.askyesno(
+      'Database unavailable',
+      'The database could not be reached.  Work offline?',
+      detail=(
+        'Records will be kept on this computer and saved to the '
+        'database when it becomes available.'
+      )
+    )
+    if offline:
+      self.model = m.OfflineModel(self.journal)
+    return offline
+
   def _show_login(self):
     """Show login dialog and attempt to login"""
     error = ''
@@ -201,6 +356,8 @@ class Application(tk.Tk):
       username, password = login.result
       if self._database_login(username, password):
         return True
+      if self._offline_login():
+        return True
       error = 'Login Failed' # loop and redisplay
 
   def _load_settings(self):
@@ -257,11 +414,86 @@ class Application(tk.Tk):
     else:
       self.recordlist.populate(rows)
 
+  def _load_recordlist(self):
+    """Fetch the records on a worker thread and populate the list later"""
+    def fetch():
+      started = perf_counter()
+      try:
+        result = self.model.get_all_records()
+      except Exception as e:
+        result = e
+      self._loaded_records.put((result, perf_counter() - started))
+    Thread(target=fetch, daemon=True).start()
+
+  def _on_records_loaded(self, results):
+    """Populate the record list with the result of _load_recordlist()"""
+    rows, elapsed = results[-1]
+    if isinstance(rows, Exception):
+      messagebox.showerror(
+        title='Error',
+        message='Problem reading file',
+        detail=str(rows)
+      )
+      return
+    if 'records loaded' in self.startup.milestones:
+      self.recordlist.populate(rows)
+      return
+    # the first load finishes start-up
+    self.startup.record('record query', elapsed)
+    with self.startup.stage('populate records'):
+      self.recordlist.populate(rows)
+    self.startup.mark('records loaded')
+    log.debug(self.startup.report())
+
   def _new_record(self, *_):
     """Open the record form with a blank record"""
     self.recordform.load_record(None, None)
-    self.notebook.select(self.recordform)
+    self.notebook.select(self.recordform_tab)
+
+
+  def _new_batch(self, *_):
+    """Open the batch entry grid"""
+    if self.batchgrid is None:
+      self.batchgrid = v.BatchEntryGrid(self, self.model, self.settings)
+      self.notebook.add(self.batchgrid, text='Batch Entry')
+      self.batchgrid.bind('<<SaveBatch>>', self._on_save_batch)
+    self.notebook.select(self.batchgrid)
+
+  def _on_save_batch(self, *_):
+    """Save every filled-in row of the batch entry grid"""
+    errors = self.batchgrid.get_errors()
+    if errors:
+      fields = [
+        key if isinstance(key, str) else 'Plot {} {}'.format(*key)
+        for key in errors
+      ]
+      self.status.set('Cannot save, error in fields: {}'.format(
+        ', '.join(fields)
+      ))
+      messagebox.showerror(
+        title='Error',
+        message='Cannot save batch',
+        detail='The following fields have errors: \n  * {}'.format(
+          '\n  * '.join(fields)
+        )
+      )
+      return False
 
+    records = self.batchgrid.get()
+    if not records:
+      self.status.set('No rows to save')
+      return False
+    # like a single record, the replayer sends them on to the database
+    self.journal.extend(records)
+    self.replayer.notify()
+    for record in records:
+      rowkey = (record['Date'], record['Time'], record['Lab'], record['Plot'])
+      self.inserted_rows.append(rowkey)
+    self.records_saved += len(records)
+    self._show_saved_count()
+    self.batchgrid.reset()
+    if self.model.offline:
+      self._load_recordlist()
 
   def _open_record(self, *_):
     """Open the Record selected recordlist id in the recordform"""
@@ -274,7 +506,7 @@ class Application(tk.Tk):
       )
       return
     self.recordform.load_record(rowkey, record)
-    self.notebook.select(self.recordform)
+    self.notebook.select(self.recordform_tab)
 
   # new chapter 9
   def _set_font(self, *_):
@@ -286,25 +518,27 @@ class Application(tk.Tk):
       tk_font = font.nametofont(font_name)
       tk_font.config(size=font_size, family=font_family)
 
+  def _start_weather_collector(self):
+    """Start polling the configured weather stations"""
+    stations = [
+      station.strip() for station
+      in self.settings['weather_station'].get().split(',')
+      if station.strip()
+    ]
+    self.weather_collector = m.WeatherCollector(
+      stations,
+      self.settings['weather_interval'].get() * 60,
+      lambda rows: self.model.add_weather_data_batch(rows),
+      self.messages,
+      loop=self.network
+    )
+    self.weather_collector.start()
+
   # new chapter 13
   def _update_weather_data(self, *_):
-    """Initiate retrieval and storage of weather data"""
-    weather_data_model = m.WeatherDataModel(
-      self.settings['weather_station'].get()
-    )
-    try:
-      weather_data = weather_data_model.get_weather_data()
-    except Exception as e:
-      messagebox.showerror(
-        title='Error',
-        message='Problem retrieving weather data',
-        detail=str(e)
-      )
-      self.status.set('Problem retrieving weather data')
-    else:
-      self.model.add_weather_data(weather_data)
-      time = weather_data['observation_time_rfc822']
-      self.status.set(f"Weather data recorded for {time}")
+    """Poll the weather stations right away"""
+    self.status.set('Retrieving weather data')
+    self.weather_collector.poll_now()
 
   def _create_csv_extract(self):
     csvmodel = m.CSVModel()
@@ -360,7 +594,8 @@ class Application(tk.Tk):
       overwrite = messagebox.askyesno(
         'File exists',
         f'The file {destination_path} already exists on the server, '
-        'do you want to overwrite it?'
+        'do you want to overwrite it?',
+        detail='Only the parts of the file that changed will be sent.'
       )
       if not overwrite:
         # ask if we should download it
@@ -382,6 +617,20 @@ class Application(tk.Tk):
             'Download Complete', 'Download Complete.'
             )
         return
+      # the user wants to overwrite, so only send what changed
+      try:
+        sent, total = sftp_model.upload_file_delta(
+          csvfile, destination_path
+        )
+      except Exception as e:
+        messagebox.showerror('Error uploading', str(e))
+      else:
+        messagebox.showinfo(
+          'Success',
+          f'{csvfile} successfully synced to SFTP server.',
+          detail=f'{sent} of {total} blocks were sent.'
+        )
+      return
     # if we haven't returned, the user wants to upload
     try:
       sftp_model.upload_file(csvfile, destination_path)
@@ -415,7 +664,8 @@ class Application(tk.Tk):
 
     # create REST model
     rest_model = m.CorporateRestModel(
-        self.settings['abq_rest_url'].get()
+        self.settings['abq_rest_url'].get(),
+        loop=self.network, queue=self.messages
     )
     try:
       rest_model.authenticate(username, password)
@@ -435,7 +685,8 @@ class Application(tk.Tk):
       overwrite = messagebox.askyesno(
         'File exists',
         f'The file {csvfile.name} already exists on the server, '
-        'do you want to overwrite it?'
+        'do you want to overwrite it?',
+        detail='Only the parts of the file that changed will be sent.'
       )
       if not overwrite:
         # ask if we should download it
@@ -448,25 +699,18 @@ class Application(tk.Tk):
           filename = filedialog.asksaveasfilename()
           if not filename:
             return
-          try:
-            data = rest_model.get_file(csvfile.name)
-          except Exception as e:
-            messagebox.showerror('Error downloading', str(e))
-            return
-          with open(filename, 'w', encoding='utf-8') as fh:
-            fh.write(data)
-          messagebox.showinfo(
-            'Download Complete', 'Download Complete.'
-            )
+          rest_model.download_file(csvfile.name, filename)
         return
+      # the user wants to overwrite, so only send what changed
+      rest_model.upload_file_delta(csvfile)
+      return
     # if we haven't returned, the user wants to upload
     rest_model.upload_file(csvfile)
-    self._check_queue(rest_model.queue)
 
 
-  def _check_queue(self, queue):
-    while not queue.empty():
-      item = queue.get()
+  def _process_messages(self, messages):
+    """Handle a batch of Messages from background work"""
+    for item in messages:
       if item.status == 'done':
         messagebox.showinfo(
           item.status,
@@ -474,7 +718,6 @@ class Application(tk.Tk):
           detail=item.body
         )
         self.status.set(item.subject)
-        return
       elif item.status == 'error':
         messagebox.showerror(
           item.status,
@@ -482,10 +725,54 @@ class Application(tk.Tk):
           detail=item.body
         )
         self.status.set(item.subject)
-        return
+      elif item.status == 'online':
+        self._go_online(self.replayer.model)
+        self.status.set(f'{item.subject}: {item.body}')
+      elif item.status == 'synced':
+        self._show_saved_count()
+        self._load_recordlist()
+      elif item.status == 'rejected':
+        self.status.set(item.subject)
+        messagebox.showwarning(
+          title='Records not saved',
+          message=item.subject,
+          detail=(
+            f'{item.body}\n\nThey are kept on this computer; use '
+            'Tools > Rejected Records… to retry or discard them.'
+          )
+        )
       else:
         self.status.set(f'{item.subject}: {item.body}')
-    self.after(100, self._check_queue, queue)
+
+  def show_rejected_records(self, *_):
+    """Let the user retry or discard records the database rejected"""
+    entries = self.journal.rejected()
+    if not entries:
+      messagebox.showinfo(
+        title='Rejected Records',
+        message='No records are waiting after being rejected.'
+      )
+      return
+    dialog = v.RejectedRecordsDialog(self, entries)
+    if not dialog.result:
+      return
+    action, ids = dialog.result
+    if action == 'discard':
+      self.journal.remove(ids)
+      self.status.set(f'Discarded {len(ids)} rejected records')
+    else:
+      self.journal.retry(ids)
+      self.replayer.notify()
+      self.status.set(f'Retrying {len(ids)} rejected records')
+    if self.model.offline:
+      self._load_recordlist()
+
+  def _go_online(self, model):
+    """Switch from the offline model to a database connection"""
+    self.model = model
+    for view in (self._recordform, self.batchgrid):
+      if view is not None:
+        view.model = model
 
   #New for ch15
   def show_growth_chart(self, *_):
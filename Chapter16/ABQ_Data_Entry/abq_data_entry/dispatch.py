@@ -0,0 +1,74 @@
+"""Deliver messages from worker threads to the Tk event loop
+
+Worker threads put messages on a DispatchQueue.  The first put after
+the Tk side has drained the queue generates a virtual event, so Tk
+only wakes up when there is something to handle, and everything queued
+since then is handed to the handler as one batch.
+
+Tkinter can only deliver an event from another thread while the main
+thread is inside mainloop(); before that (e.g. while the application
+is still being built) event_generate() gives up with a RuntimeError.
+A slow after() poll on the Tk thread picks up anything whose wakeup
+was lost that way.
+"""
+
+import tkinter as tk
+from queue import Queue, Empty
+
+
+class DispatchQueue(Queue):
+  """A Queue that wakes a Tk widget when messages arrive
+
+  handler is called on the Tk thread with a list of messages.
+  """
+
+  event = '<<QueueMessage>>'
+  # milliseconds between fallback checks for undelivered messages
+  poll_interval = 250
+
+  def __init__(self, widget, handler, maxsize=0):
+    super().__init__(maxsize)
+    self.widget = widget
+    self.handler = handler
+    # True while an event is on its way to the Tk thread;
+    # guarded by the Queue's own mutex
+    self._notified = False
+    widget.bind(self.event, self._drain, add='+')
+    widget.after(self.poll_interval, self._poll)
+
+  def put(self, item, block=True, timeout=None):
+    super().put(item, block, timeout)
+    with self.mutex:
+      notify = not self._notified
+      self._notified = True
+    if notify:
+      try:
+        self.widget.event_generate(self.event, when='tail')
+      except (tk.TclError, RuntimeError):
+        # Tk is not in its main loop yet, or is shutting down;
+        # let the next put() try again and the poll deliver meanwhile
+        with self.mutex:
+          self._notified = False
+
+  def _poll(self):
+    """Drain messages whose wakeup event never arrived"""
+    if not self.empty():
+      self._drain()
+    try:
+      self.widget.after(self.poll_interval, self._poll)
+    except tk.TclError:
+      # the widget has been destroyed
+      pass
+
+  def _drain(self, *_):
+    """Hand every queued message to the handler in one batch"""
+    with self.mutex:
+      self._notified = False
+    messages = list()
+    while True:
+      try:
+        messages.append(self.get_nowait())
+      except Empty:
+        break
+    if messages:
+      self.handler(messages)
@@ -0,0 +1,35 @@
+"""Deferred imports for heavy optional libraries
+
+Plotting, SSH, HTTP and database libraries take a large share of the
+application's start-up time, but many sessions never use them.
+lazy_import() returns a stand-in that imports the real module the
+first time one of its attributes is used.
+"""
+
+import importlib
+import importlib.util
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+  """A stand-in for a module that is imported on first attribute access"""
+
+  def __getattr__(self, attr):
+    # import_module holds the import lock, so concurrent first use
+    # from several threads is safe; later calls hit sys.modules
+    module = importlib.import_module(self.__name__)
+    return getattr(module, attr)
+
+
+def lazy_import(name):
+  """Return a LazyModule for name
+
+  If the module isn't installed, ModuleNotFoundError is raised
+  on first use rather than here.
+  """
+  return LazyModule(name)
+
+
+def is_installed(name):
+  """Check whether a module can be imported, without importing it"""
+  return importlib.util.find_spec(name) is not None
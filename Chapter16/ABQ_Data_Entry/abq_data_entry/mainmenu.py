@@ -133,6 +133,12 @@ class GenericMainMenu(tk.Menu):
       image=self.icons.get('new_record'), compound=tk.LEFT
     )
 
+  def _add_go_new_batch(self, menu):
+    menu.add_command(
+      label="New Batch", command=self._event('<<NewBatch>>'),
+      image=self.icons.get('new_record'), compound=tk.LEFT
+    )
+
   def _add_about(self, menu):
     menu.add_command(
       label='About…', command=self.show_about,
@@ -149,6 +155,12 @@ class GenericMainMenu(tk.Menu):
       label='Show Yield Chart', command=self._event('<<ShowYieldChart>>')
     )
 
+  def _add_rejected_records(self, menu):
+    menu.add_command(
+      label='Rejected Records…',
+      command=self._event('<<ShowRejectedRecords>>')
+    )
+
   def _build_menu(self):
     # The file menu
     self._menus['File'] = tk.Menu(self, tearoff=False, **self.styles)
@@ -163,6 +175,7 @@ class GenericMainMenu(tk.Menu):
     self._add_sftp_upload(self._menus['Tools'])
     self._add_growth_chart(self._menus['Tools'])
     self._add_yield_chart(self._menus['Tools'])
+    self._add_rejected_records(self._menus['Tools'])
 
     # The options menu
     self._menus['Options'] = tk.Menu(self, tearoff=False, **self.styles)
@@ -176,6 +189,7 @@ class GenericMainMenu(tk.Menu):
     self._menus['Go'] = tk.Menu(self, tearoff=False, **self.styles)
     self._add_go_record_list(self._menus['Go'])
     self._add_go_new_record(self._menus['Go'])
+    self._add_go_new_batch(self._menus['Go'])
 
     # The help menu
     self._menus['Help'] = tk.Menu(self, tearoff=False, **self.styles)
@@ -273,6 +287,7 @@ class WindowsMainMenu(GenericMainMenu):
     self._add_sftp_upload(self._menus['Tools'])
     self._add_growth_chart(self._menus['Tools'])
     self._add_yield_chart(self._menus['Tools'])
+    self._add_rejected_records(self._menus['Tools'])
 
     # The help menu
     self._menus['Help'] = tk.Menu(self, tearoff=False)
@@ -283,6 +298,7 @@ class WindowsMainMenu(GenericMainMenu):
     self.add_cascade(label='Tools', menu=self._menus['Tools'])
     self._add_go_record_list(self)
     self._add_go_new_record(self)
+    self._add_go_new_batch(self)
     self.add_cascade(label='Help', menu=self._menus['Help'])
 
 
@@ -320,6 +336,7 @@ class LinuxMainMenu(GenericMainMenu):
     self._add_sftp_upload(self._menus['Tools'])
     self._add_growth_chart(self._menus['Tools'])
     self._add_yield_chart(self._menus['Tools'])
+    self._add_rejected_records(self._menus['Tools'])
 
 
     # The View menu
@@ -332,6 +349,7 @@ class LinuxMainMenu(GenericMainMenu):
     self._menus['Go'] = tk.Menu(self, tearoff=False, **self.styles)
     self._add_go_record_list(self._menus['Go'])
     self._add_go_new_record(self._menus['Go'])
+    self._add_go_new_batch(self._menus['Go'])
 
     # The help menu
     self._menus['Help'] = tk.Menu(self, tearoff=False, **self.styles)
@@ -392,6 +410,7 @@ class MacOsMainMenu(GenericMainMenu):
     self._add_sftp_upload(self._menus['Tools'])
     self._add_growth_chart(self._menus['Tools'])
     self._add_yield_chart(self._menus['Tools'])
+    self._add_rejected_records(self._menus['Tools'])
 
     # View menu
     self._menus['View'] = tk.Menu(self, tearoff=False)
@@ -403,6 +422,7 @@ class MacOsMainMenu(GenericMainMenu):
     self._menus['Window'] = tk.Menu(self, name='window', tearoff=False)
     self._add_go_record_list(self._menus['Window'])
     self._add_go_new_record(self._menus['Window'])
+    self._add_go_new_batch(self._menus['Window'])
 
     for label, menu in self._menus.items():
       self.add_cascade(label=label, menu=menu)
@@ -2,26 +2,120 @@ import csv
 from pathlib import Path
 import os
 import json
+import sqlite3
+import socket
+import hashlib
 import platform
 from datetime import datetime
-from urllib.request import urlopen
+from urllib.request import urlopen, Request
+from urllib.error import HTTPError
 from xml.etree import ElementTree
-import requests
-import paramiko
-from threading import Thread, Lock
+from threading import Thread, Lock, RLock, Event
 from queue import Queue
-from collections import namedtuple
-
-import psycopg2 as pg
-from psycopg2.extras import DictCursor
+from collections import namedtuple, OrderedDict
+from time import monotonic, sleep
+import asyncio
 
 from .constants import FieldTypes as FT
+from . import network
+from .lazy import lazy_import
+
+# These are slow to import and only needed once a feature is used
+requests = lazy_import('requests')
+paramiko = lazy_import('paramiko')
+pg = lazy_import('psycopg2')
 
 Message = namedtuple('Message', ['status', 'subject', 'body'])
 
+
+class DatabaseUnavailable(Exception):
+  """The database server could not be reached at all
+
+  Raised instead of psycopg2's OperationalError when nothing answers
+  at the server's address, as opposed to a server that refused the
+  login.
+  """
+
+
+class OutdatedSchema(Exception):
+  """The database tables predate a change this version relies on
+
+  The message names the script in sql/ that upgrades them.
+  """
+
+DELTA_BLOCK_SIZE = 4096
+
+
+def hash_blocks(fh, block_size=DELTA_BLOCK_SIZE):
+  """Return a manifest of per-block SHA-256 hashes for an open file"""
+  hashes = list()
+  size = 0
+  for block in iter(lambda: fh.read(block_size), b''):
+    hashes.append(hashlib.sha256(block).hexdigest())
+    size += len(block)
+  return {'size': size, 'block_size': block_size, 'hashes': hashes}
+
+
+def get_block_hashes(filepath, block_size=DELTA_BLOCK_SIZE):
+  """Return a manifest of per-block SHA-256 hashes for filepath"""
+  with open(filepath, 'rb') as fh:
+    return hash_blocks(fh, block_size)
+
+
+def get_changed_blocks(local_manifest, remote_manifest):
+  """Return the indexes of local blocks that differ from the remote
+
+  Both manifests must use the same block size.
+  """
+  remote_hashes = remote_manifest['hashes']
+  return [
+    index for index, block_hash in enumerate(local_manifest['hashes'])
+    if index >= len(remote_hashes) or remote_hashes[index] != block_hash
+  ]
+
+
+def read_blocks(filepath, indexes, block_size=DELTA_BLOCK_SIZE):
+  """Yield (index, data) for each requested block of filepath"""
+  with open(filepath, 'rb') as fh:
+    for index in indexes:
+      fh.seek(index * block_size)
+      yield index, fh.read(block_size)
+
+
+def plan_delta_upload(filepath, remote_manifest):
+  """Work out what to send to bring the server's copy of a file up to date
+
+  Returns None when there's nothing to compare against and the whole
+  file has to be uploaded; otherwise (local_manifest, blocks), blocks
+  being a list of (index, data) for the blocks that changed.  This
+  hashes and reads the file, so coroutines should run it in a thread.
+  """
+  if (
+    remote_manifest is None
+    or remote_manifest.get('block_size') != DELTA_BLOCK_SIZE
+  ):
+    return None
+  local_manifest = get_block_hashes(filepath)
+  changed = get_changed_blocks(local_manifest, remote_manifest)
+  return local_manifest, list(read_blocks(filepath, changed))
+
+
+def delta_upload_message(filepath, local_manifest, blocks):
+  """The Message reporting a finished delta upload"""
+  sent = sum(len(data) for _, data in blocks)
+  return Message(
+    'done',
+    'Sync Succeeded',
+    f'Sent {len(blocks)} of {len(local_manifest["hashes"])} '
+    f'blocks ({sent} bytes) of {filepath}'
+  )
+
+
 class SQLModel:
   """Data Model for SQL data storage"""
 
+  offline = False
+
   fields = {
     "Date": {'req': True, 'type': FT.iso_date_string},
     "Time": {'req': True, 'type': FT.string_list,
@@ -84,9 +178,64 @@ class SQLModel:
     ' %(Fruit)s, %(Max Height)s, %(Min Height)s,'
     ' %(Med Height)s, %(Notes)s)')
 
+  # Bulk inserts, used by save_records() and insert_records()
+  page_size = 500
+
+  lc_upsert_query = (
+    'INSERT INTO lab_checks (date, time, lab_id, lab_tech_id) VALUES %s '
+    'ON CONFLICT (date, time, lab_id) '
+    'DO UPDATE SET lab_tech_id = EXCLUDED.lab_tech_id'
+  )
+
+  lc_upsert_template = (
+    '(%(Date)s, %(Time)s, %(Lab)s, '
+    '(SELECT id FROM lab_techs WHERE name = %(Technician)s))'
+  )
+
+  # New records only: an existing plot check is left as it is,
+  # and only the rows actually inserted are returned
+  pc_insert_new_query = (
+    'INSERT INTO plot_checks VALUES %s '
+    'ON CONFLICT (date, time, lab_id, plot) DO NOTHING '
+    'RETURNING to_char(date, \'YYYY-MM-DD\') AS "Date", '
+    'to_char(time, \'FMHH24:MI\') AS "Time", lab_id AS "Lab", '
+    'plot AS "Plot"'
+  )
+
+  # New records only: an existing plot check is an IntegrityError
+  pc_insert_many_query = 'INSERT INTO plot_checks VALUES %s'
+
+  pc_upsert_template = (
+    '(%(Date)s, %(Time)s, %(Lab)s, %(Plot)s, %(Seed Sample)s, '
+    '%(Humidity)s, %(Light)s, %(Temperature)s, %(Equipment Fault)s, '
+    '%(Blossoms)s, %(Plants)s, %(Fruit)s, %(Max Height)s, '
+    '%(Min Height)s, %(Med Height)s, %(Notes)s)'
+  )
+
+  weather_insert_query = (
+    'INSERT INTO local_weather (datetime, temperature, rel_hum, '
+    'pressure, conditions, station_id) VALUES %s '
+    'ON CONFLICT DO NOTHING'
+  )
+
+  weather_insert_template = (
+    '(%(observation_time_rfc822)s, %(temp_c)s, '
+    '%(relative_humidity)s, %(pressure_mb)s, '
+    '%(weather)s, %(station_id)s)'
+  )
+
   def __init__(self, host, database, user, password):
-    self.connection = pg.connect(host=host, database=database,
-      user=user, password=password, cursor_factory=DictCursor)
+    from psycopg2.extras import DictCursor
+    try:
+      self.connection = pg.connect(host=host, database=database,
+        user=user, password=password, cursor_factory=DictCursor)
+    except pg.OperationalError as e:
+      if not self._server_reachable(host):
+        raise DatabaseUnavailable(str(e)) from e
+      raise
+    # The connection is shared with background threads,
+    # so only let one transaction run at a time
+    self._lock = RLock()
 
     techs = self.query("SELECT name FROM lab_techs ORDER BY name")
     labs = self.query("SELECT id FROM labs ORDER BY id")
@@ -95,8 +244,20 @@ class SQLModel:
     self.fields['Lab']['values'] = [x['id'] for x in labs]
     self.fields['Plot']['values'] = [str(x['plot']) for x in plots]
 
+  @staticmethod
+  def _server_reachable(host, port=5432, timeout=3):
+    """Return True if anything listens at the database's address"""
+    if not host or host.startswith('/'):
+      socket_dir = host or '/var/run/postgresql'
+      return Path(socket_dir, f'.s.PGSQL.{port}').exists()
+    try:
+      socket.create_connection((host, port), timeout).close()
+    except OSError:
+      return False
+    return True
+
   def query(self, query, parameters=None):
-    with self.connection:
+    with self._lock, self.connection:
       with self.connection.cursor() as cursor:
         cursor.execute(query, parameters)
       # cursor.description is None when
@@ -162,6 +323,83 @@ class SQLModel:
     self.query(lc_query, record)
     self.query(pc_query, record)
 
+  def save_records(self, records):
+    """Save many new records in a single transaction
+
+    Like save_record(record, None), this never overwrites: a record
+    whose date, time, lab and plot are already in the database, or
+    earlier in the batch, is skipped.  The lab check for each distinct
+    date, time and lab is upserted once.
+
+    Returns a list with an outcome for each record, in order:
+    'inserted', or 'duplicate' for a record that was skipped.
+    """
+    from psycopg2.extras import execute_values
+    records = list(records)
+
+    # Group by key; the first record for a plot check wins
+    lab_checks = dict()
+    plot_checks = dict()
+    for record in records:
+      lab_checks[self._lab_check_key(record)] = record
+      plot_checks.setdefault(self._plot_check_key(record), record)
+
+    with self._lock, self.connection:
+      with self.connection.cursor() as cursor:
+        execute_values(
+          cursor, self.lc_upsert_query, list(lab_checks.values()),
+          template=self.lc_upsert_template, page_size=self.page_size
+        )
+        results = execute_values(
+          cursor, self.pc_insert_new_query, list(plot_checks.values()),
+          template=self.pc_upsert_template, page_size=self.page_size,
+          fetch=True
+        )
+
+    inserted = {self._plot_check_key(row) for row in results}
+    outcomes = list()
+    for record in records:
+      key = self._plot_check_key(record)
+      if plot_checks[key] is record and key in inserted:
+        outcomes.append('inserted')
+      else:
+        outcomes.append('duplicate')
+    return outcomes
+
+  def insert_records(self, records):
+    """Insert many new records in a single transaction
+
+    Unlike save_records(), a record whose date, time, lab and plot
+    are already in the database (or earlier in the batch) raises an
+    IntegrityError, and none of the records are saved.
+    """
+    from psycopg2.extras import execute_values
+    records = list(records)
+    lab_checks = {self._lab_check_key(record): record for record in records}
+
+    with self._lock, self.connection:
+      with self.connection.cursor() as cursor:
+        execute_values(
+          cursor, self.lc_upsert_query, list(lab_checks.values()),
+          template=self.lc_upsert_template, page_size=self.page_size
+        )
+        execute_values(
+          cursor, self.pc_insert_many_query, records,
+          template=self.pc_upsert_template, page_size=self.page_size
+        )
+
+  @staticmethod
+  def _lab_check_key(record):
+    """Return the date, time and lab of a record in a canonical form"""
+    hour, minute = str(record['Time']).split(':')[:2]
+    return (
+      str(record['Date']), f'{int(hour)}:{minute}', str(record['Lab'])
+    )
+
+  @classmethod
+  def _plot_check_key(cls, record):
+    return cls._lab_check_key(record) + (str(int(record['Plot'])),)
+
   def get_lab_check(self, date, time, lab):
     """Retrieve the lab check record for the given date, time, and lab"""
     query = ('SELECT date, time, lab_id, lab_tech_id, '
@@ -179,18 +417,41 @@ class SQLModel:
       {'lab': lab, 'plot': plot})
     return result[0]['current_seed_sample'] if result else ''
 
-  def add_weather_data(self, data):
-    query = (
-      'INSERT INTO local_weather VALUES '
-      '(%(observation_time_rfc822)s, %(temp_c)s, '
-      '%(relative_humidity)s, %(pressure_mb)s, '
-      '%(weather)s)'
+  def get_seed_samples(self, lab):
+    """Get the seed samples currently planted in each plot of a lab"""
+    result = self.query(
+      'SELECT plot, current_seed_sample FROM plots WHERE lab_id=%(lab)s',
+      {'lab': lab}
     )
+    return {
+      str(row['plot']): row['current_seed_sample'] for row in result
+    }
+
+  def add_weather_data(self, data):
+    self.add_weather_data_batch([data])
+
+  def add_weather_data_batch(self, rows):
+    """Insert many weather observations in one statement
+
+    Observations we already have are silently skipped.
+    """
+    rows = [
+      {'station_id': '', **row} for row in rows
+    ]
+    from psycopg2.extras import execute_values
     try:
-      self.query(query, data)
-    except pg.IntegrityError:
-      # already have weather for this datetime
-      pass
+      with self._lock, self.connection:
+        with self.connection.cursor() as cursor:
+          execute_values(
+            cursor, self.weather_insert_query, rows,
+            template=self.weather_insert_template
+          )
+    except pg.errors.UndefinedColumn as e:
+      # a local_weather table from before station_id was added
+      raise OutdatedSchema(
+        'The local_weather table has no station_id column; '
+        'run sql/migrate_local_weather.sql to upgrade it.'
+      ) from e
 
   # new ch15
   def get_growth_by_lab(self):
@@ -212,6 +473,187 @@ class SQLModel:
     return self.query(query)
 
 
+class RecordJournal:
+  """A local write-ahead journal of records waiting for the database
+
+  Saving to SQLite takes well under a millisecond, so data entry
+  never waits on PostgreSQL; a JournalReplayer moves the records to
+  the database in the background.  The lookup values for the form
+  (technicians, labs, plots) are kept here too, for offline sessions.
+  """
+
+  create_queries = (
+    'CREATE TABLE IF NOT EXISTS records ('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, record TEXT NOT NULL, '
+    'rowkey TEXT, error TEXT)',
+    'CREATE TABLE IF NOT EXISTS lookups ('
+    'name TEXT PRIMARY KEY, value TEXT NOT NULL)'
+  )
+
+  def __init__(self, filepath=None):
+    if not filepath:
+      filedir = SettingsModel.config_dirs.get(platform.system(), Path.home())
+      filepath = filedir / 'abq_journal.sqlite'
+    self.filepath = Path(filepath)
+    # Used from the Tk thread and the replayer, one at a time
+    self._lock = Lock()
+    self.connection = sqlite3.connect(
+      self.filepath, check_same_thread=False
+    )
+    with self._lock, self.connection:
+      self.connection.execute('PRAGMA journal_mode=WAL')
+      self.connection.execute('PRAGMA synchronous=NORMAL')
+      for query in self.create_queries:
+        self.connection.execute(query)
+
+  @staticmethod
+  def _encode(record, rowkey):
+    return (
+      json.dumps(record, default=str),
+      None if rowkey is None else json.dumps(rowkey)
+    )
+
+  def append(self, record, rowkey=None):
+    """Journal a record; rowkey is None for a new record"""
+    with self._lock, self.connection:
+      cursor = self.connection.execute(
+        'INSERT INTO records (record, rowkey) VALUES (?, ?)',
+        self._encode(record, rowkey)
+      )
+    return cursor.lastrowid
+
+  def extend(self, records):
+    """Journal many new records at once"""
+    with self._lock, self.connection:
+      self.connection.executemany(
+        'INSERT INTO records (record, rowkey) VALUES (?, ?)',
+        (self._encode(record, None) for record in records)
+      )
+
+  def pending(self, limit=None):
+    """Return (id, record, rowkey) for records not yet saved, oldest first
+
+    Records the database rejected are left out.
+    """
+    with self._lock:
+      rows = self.connection.execute(
+        'SELECT id, record, rowkey FROM records WHERE error IS NULL '
+        'ORDER BY id LIMIT ?', (-1 if limit is None else limit,)
+      ).fetchall()
+    return [
+      (id_, json.loads(record), rowkey and tuple(json.loads(rowkey)))
+      for id_, record, rowkey in rows
+    ]
+
+  def count(self):
+    """Return the number of records waiting for the database"""
+    with self._lock:
+      return self.connection.execute(
+        'SELECT count(*) FROM records WHERE error IS NULL'
+      ).fetchone()[0]
+
+  def remove(self, ids):
+    """Remove records that were saved to the database"""
+    with self._lock, self.connection:
+      self.connection.executemany(
+        'DELETE FROM records WHERE id = ?', ((id_,) for id_ in ids)
+      )
+
+  def set_error(self, id_, error):
+    """Keep a record the database rejected, with the reason"""
+    with self._lock, self.connection:
+      self.connection.execute(
+        'UPDATE records SET error = ? WHERE id = ?', (error, id_)
+      )
+
+  def rejected(self):
+    """Return (id, record, rowkey, error) for records the database rejected"""
+    with self._lock:
+      rows = self.connection.execute(
+        'SELECT id, record, rowkey, error FROM records '
+        'WHERE error IS NOT NULL ORDER BY id'
+      ).fetchall()
+    return [
+      (id_, json.loads(record), rowkey and tuple(json.loads(rowkey)), error)
+      for id_, record, rowkey, error in rows
+    ]
+
+  def retry(self, ids):
+    """Return rejected records to the queue for the database"""
+    with self._lock, self.connection:
+      self.connection.executemany(
+        'UPDATE records SET error = NULL WHERE id = ?',
+        ((id_,) for id_ in ids)
+      )
+
+  def save_lookups(self, lookups):
+    """Store a dict of lookup value lists"""
+    with self._lock, self.connection:
+      self.connection.executemany(
+        'INSERT OR REPLACE INTO lookups (name, value) VALUES (?, ?)',
+        ((name, json.dumps(values)) for name, values in lookups.items())
+      )
+
+  def load_lookups(self):
+    """Return the stored lookup value lists"""
+    with self._lock:
+      rows = self.connection.execute(
+        'SELECT name, value FROM lookups'
+      ).fetchall()
+    return {name: json.loads(value) for name, value in rows}
+
+
+class OfflineModel:
+  """Stands in for SQLModel while the database can't be reached
+
+  Records come from the journal, and lookups from the last session
+  that reached the database.
+  """
+
+  offline = True
+  lookup_fields = ('Technician', 'Lab', 'Plot')
+
+  def __init__(self, journal):
+    self.journal = journal
+    # SQLModel's specs stay as they are; the lookups are filled in here
+    self.fields = {
+      name: dict(spec) for name, spec in SQLModel.fields.items()
+    }
+    for key, values in journal.load_lookups().items():
+      if key in self.fields:
+        self.fields[key]['values'] = values
+
+  def get_all_records(self, all_dates=False):
+    return [record for _, record, _ in self.journal.pending()]
+
+  def get_record(self, rowkey):
+    for _, record, _ in self.journal.pending():
+      if SQLModel._plot_check_key(record) == SQLModel._plot_check_key(
+        dict(zip(('Date', 'Time', 'Lab', 'Plot'), rowkey))
+      ):
+        return record
+    return dict()
+
+  def get_lab_check(self, date, time, lab):
+    return dict()
+
+  def get_current_seed_sample(self, lab, plot):
+    return ''
+
+  def get_seed_samples(self, lab):
+    return dict()
+
+  def add_weather_data_batch(self, rows):
+    """Weather data is dropped while offline; it's fetched again later"""
+    pass
+
+  def get_growth_by_lab(self):
+    return list()
+
+  def get_yield_by_plot(self):
+    return list()
+
+
 class CSVModel:
   """CSV file storage"""
 
@@ -335,6 +777,7 @@ class SettingsModel:
     'db_host': {'type': 'str', 'value': 'localhost'},
     'db_name': {'type': 'str', 'value': 'abq'},
     'weather_station': {'type': 'str', 'value': 'KBMG'},
+    'weather_interval': {'type': 'int', 'value': 60},
     'abq_rest_url': {
       'type': 'str',
       'value': 'http://localhost:8000'
@@ -396,30 +839,431 @@ class SettingsModel:
 class WeatherDataModel:
 
   base_url = 'http://w1.weather.gov/xml/current_obs/{}.xml'
+  fields = (
+    'observation_time_rfc822',
+    'temp_c',
+    'relative_humidity',
+    'pressure_mb',
+    'weather'
+  )
+  # stations publish roughly once an hour
+  update_interval = 60 * 60
+  chunk_size = 1024
+
+  # Recent observations shared by all instances,
+  # keyed by (station, observation time)
+  cache_size = 256
+  _cache = OrderedDict()
+  # station -> (monotonic fetch time, cache key)
+  _latest = dict()
+  _cache_lock = Lock()
+
+  def __init__(self, station, base_url=None):
+    self.station = station
+    self.url = (base_url or self.base_url).format(station)
+    # validators from the last response, for conditional requests
+    self.etag = None
+    self.last_modified = None
+    self._last_key = None
+
+  @classmethod
+  def clear_cache(cls):
+    with cls._cache_lock:
+      cls._cache.clear()
+      cls._latest.clear()
+
+  def _get_cached(self):
+    """Return the cached key and data if the station is not yet due"""
+    with self._cache_lock:
+      fetched_at, key = self._latest.get(self.station, (None, None))
+      if (
+        fetched_at is None
+        or monotonic() - fetched_at > self.update_interval
+        or key not in self._cache
+      ):
+        return None, None
+      return key, dict(self._cache[key])
+
+  def _store(self, data):
+    key = (self.station, data['observation_time_rfc822'])
+    with self._cache_lock:
+      self._cache[key] = dict(data)
+      self._cache.move_to_end(key)
+      while len(self._cache) > self.cache_size:
+        self._cache.popitem(last=False)
+      self._latest[self.station] = (monotonic(), key)
+    return key
+
+  def _touch(self):
+    """Mark the station's cached observation as current"""
+    with self._cache_lock:
+      if self.station in self._latest:
+        _, key = self._latest[self.station]
+        self._latest[self.station] = (monotonic(), key)
+
+  def _make_parser(self):
+    """Return a feed function for incremental parsing and the result dict
+
+    feed(chunk) returns True once all fields have been found.
+    """
+    weatherdata = dict.fromkeys(self.fields)
+    remaining = set(self.fields)
+    parser = ElementTree.XMLPullParser(events=('end',))
+
+    def feed(chunk):
+      parser.feed(chunk)
+      for _, element in parser.read_events():
+        if element.tag in remaining:
+          weatherdata[element.tag] = element.text
+          remaining.discard(element.tag)
+      return not remaining
+
+    return feed, weatherdata
+
+  def _parse(self, response):
+    """Parse the response incrementally, stopping once all fields are found"""
+    feed, weatherdata = self._make_parser()
+    for chunk in iter(lambda: response.read(self.chunk_size), b''):
+      if feed(chunk):
+        break
+    return weatherdata
 
-  def __init__(self, station):
-    self.url = self.base_url.format(station)
+  def _conditional_headers(self):
+    headers = dict()
+    if self.etag:
+      headers['If-None-Match'] = self.etag
+    if self.last_modified:
+      headers['If-Modified-Since'] = self.last_modified
+    return headers
+
+  def _from_cache(self, conditional):
+    """Return (hit, data) for a request the cache can answer"""
+    key, weatherdata = self._get_cached()
+    if key is None:
+      return False, None
+    if conditional and key == self._last_key:
+      return True, None
+    self._last_key = key
+    return True, weatherdata
+
+  def _finish(self, weatherdata, conditional):
+    """Cache freshly parsed data and decide what to return"""
+    weatherdata['station_id'] = self.station
+    key = self._store(weatherdata)
+    if conditional and key == self._last_key:
+      return None
+    self._last_key = key
+    return weatherdata
 
+  def get_weather_data(self, conditional=False, force=False):
+    """Retrieve the current observation for the station
 
-  def get_weather_data(self):
-    response = urlopen(self.url)
+    If conditional is True, return None when the observation
+    has not changed since the last call.  If force is True, ask
+    the station even if the cached observation is not yet due.
+    """
+    if not force:
+      hit, weatherdata = self._from_cache(conditional)
+      if hit:
+        return weatherdata
+
+    request = Request(self.url)
+    if conditional:
+      for header, value in self._conditional_headers().items():
+        request.add_header(header, value)
+    try:
+      response = urlopen(request)
+    except HTTPError as e:
+      if e.code == 304:
+        self._touch()
+        return None
+      raise
+    with response:
+      self.etag = response.headers.get('ETag')
+      self.last_modified = response.headers.get('Last-Modified')
+      weatherdata = self._parse(response)
+    return self._finish(weatherdata, conditional)
+
+  async def async_get_weather_data(
+    self, session, conditional=False, force=False
+  ):
+    """Coroutine version of get_weather_data using an aiohttp session"""
+    if not force:
+      hit, weatherdata = self._from_cache(conditional)
+      if hit:
+        return weatherdata
+
+    headers = self._conditional_headers() if conditional else None
+    async with session.get(self.url, headers=headers) as response:
+      if response.status == 304:
+        self._touch()
+        return None
+      response.raise_for_status()
+      self.etag = response.headers.get('ETag')
+      self.last_modified = response.headers.get('Last-Modified')
+      feed, weatherdata = self._make_parser()
+      async for chunk in response.content.iter_chunked(self.chunk_size):
+        if feed(chunk):
+          break
+    return self._finish(weatherdata, conditional)
+
+
+class WeatherCollector(Thread):
+  """Periodically poll weather stations and store new observations
+
+  sink is called from this thread with a list of new observations.
+  If an AsyncLoop is given, all stations are fetched concurrently on it.
+  """
+
+  def __init__(
+    self, stations, interval, sink, queue, base_url=None, loop=None
+  ):
+    super().__init__(daemon=True)
+    self.models = [
+      WeatherDataModel(station, base_url) for station in stations
+    ]
+    self.interval = interval
+    self.loop = loop
+    self.sink = sink
+    self.queue = queue
+    self._wake = Event()
+    self._stopped = Event()
+    self._forced = Event()
 
-    xmlroot = ElementTree.fromstring(response.read())
-    weatherdata = {
-      'observation_time_rfc822': None,
-      'temp_c': None,
-      'relative_humidity': None,
-      'pressure_mb': None,
-      'weather': None
-    }
+  def poll_now(self):
+    """Skip the rest of the current wait and poll immediately
 
-    for tag in weatherdata:
-      element = xmlroot.find(tag)
-      if element is not None:
-        weatherdata[tag] = element.text
+    The user asked for it, so the stations are asked even if
+    the cached observations are not yet due.
+    """
+    self._forced.set()
+    self._wake.set()
+
+  def stop(self):
+    self._stopped.set()
+    self._wake.set()
+
+  async def _fetch_all(self, force):
+    """Fetch every station concurrently"""
+    async with network.open_session() as session:
+      return await asyncio.gather(
+        *(
+          model.async_get_weather_data(
+            session, conditional=True, force=force
+          )
+          for model in self.models
+        ),
+        return_exceptions=True
+      )
 
-    return weatherdata
+  def _fetch(self, force):
+    """Return a result or exception for each station"""
+    if self.loop:
+      return self.loop.submit(self._fetch_all(force)).result()
+    results = list()
+    for model in self.models:
+      try:
+        results.append(
+          model.get_weather_data(conditional=True, force=force)
+        )
+      except Exception as e:
+        results.append(e)
+    return results
+
+  def collect(self, force=False):
+    """Poll every station once and store what changed
+
+    If force is True, bypass the observation cache and say so
+    when none of the stations had anything new.
+    """
+    rows = list()
+    for model, data in zip(self.models, self._fetch(force)):
+      if isinstance(data, Exception):
+        self.queue.put(
+          Message('warning', f'Weather error for {model.station}', str(data))
+        )
+        continue
+      if data is not None and data['observation_time_rfc822']:
+        rows.append(data)
+    if rows:
+      self.sink(rows)
+      times = ', '.join(
+        f"{row['station_id']} {row['observation_time_rfc822']}"
+        for row in rows
+      )
+      self.queue.put(Message('info', 'Weather data recorded', times))
+    elif force:
+      self.queue.put(
+        Message('info', 'Weather data is up to date', 'No new observations')
+      )
+    return rows
+
+  def run(self):
+    while not self._stopped.is_set():
+      force = self._forced.is_set()
+      self._forced.clear()
+      try:
+        self.collect(force)
+      except Exception as e:
+        self.queue.put(Message('warning', 'Weather error', str(e)))
+      self._wake.wait(self.interval)
+      self._wake.clear()
+
+
+
+class JournalReplayer(Thread):
+  """Save journaled records to the database in the background
 
+  model is the SQLModel to save to, or None when starting offline;
+  while there is no model, connect() is called each round to try
+  to create one.  New records are inserted in bulk, never overwriting
+  a record already in the database; if a batch fails, its records are
+  retried one at a time so that only the ones the database rejects
+  are held back.  Rejected records stay in the journal, marked with
+  the reason, until the user retries or discards them.
+  """
+
+  batch_size = 500
+  duplicate_error = 'A record for this date, time, lab and plot already exists'
+  # SQLSTATE of a duplicate key; other integrity errors, like an
+  # unknown technician, are shown as the database reports them
+  unique_violation = '23505'
+
+  def __init__(self, journal, queue, model=None, connect=None, interval=30):
+    super().__init__(daemon=True)
+    self.journal = journal
+    self.queue = queue
+    self.model = model
+    self.connect = connect
+    self.interval = interval
+    self._wake = Event()
+    self._stopped = Event()
+    self._rejected = list()
+
+  @staticmethod
+  def _connection_errors():
+    return (pg.OperationalError, pg.InterfaceError)
+
+  def notify(self):
+    """Replay right away, e.g. after a record is journaled"""
+    self._wake.set()
+
+  def stop(self):
+    self._stopped.set()
+    self._wake.set()
+
+  def _save_new(self, entries):
+    """Insert new records in bulk, falling back to one at a time
+
+    Records that already exist are rejected, never overwritten.
+    """
+    try:
+      outcomes = self.model.save_records(
+        [record for _, record, _ in entries]
+      )
+    except self._connection_errors():
+      raise
+    except Exception:
+      # find out which records the database rejects
+      for entry in entries:
+        self._save_entry(entry)
+      return
+    saved = list()
+    for entry, outcome in zip(entries, outcomes):
+      if outcome == 'duplicate':
+        self._reject(entry, self.duplicate_error)
+      else:
+        saved.append(entry[0])
+    self.journal.remove(saved)
+
+  def _reject(self, entry, error):
+    """Keep a record the database refused, marked with the reason"""
+    id_, record, _ = entry
+    self.journal.set_error(id_, error)
+    self._rejected.append(
+      f"{record.get('Date')} {record.get('Time')} "
+      f"lab {record.get('Lab')} plot {record.get('Plot')}: {error}"
+    )
+
+  def _save_entry(self, entry):
+    """Save one record, keeping it in the journal if it's rejected"""
+    id_, record, rowkey = entry
+    try:
+      if rowkey is None:
+        self.model.insert_records([record])
+      else:
+        self.model.save_record(record, rowkey)
+    except self._connection_errors():
+      raise
+    except Exception as e:
+      if getattr(e, 'pgcode', None) == self.unique_violation:
+        error = self.duplicate_error
+      else:
+        error = str(e).strip()
+      self._reject(entry, error)
+    else:
+      self.journal.remove([id_])
+
+  def replay(self):
+    """Save every pending record; returns how many were handled"""
+    if self.model is None:
+      try:
+        self.model = self.connect()
+      except Exception:
+        return 0
+      self.queue.put(
+        Message('online', 'Connected to the database', 'Back online')
+      )
+
+    handled = 0
+    self._rejected.clear()
+    try:
+      while True:
+        entries = self.journal.pending(self.batch_size)
+        if not entries:
+          break
+        # Keep journal order: runs of new records go in bulk,
+        # edits of existing records one at a time
+        run = list()
+        for entry in entries:
+          if entry[2] is None:
+            run.append(entry)
+            continue
+          if run:
+            self._save_new(run)
+            run = list()
+          self._save_entry(entry)
+        if run:
+          self._save_new(run)
+        handled += len(entries)
+    except self._connection_errors() as e:
+      if self.connect:
+        self.model = None
+      self.queue.put(Message(
+        'warning', 'Database unavailable',
+        f'{self.journal.count()} records are waiting to be saved ({e})'
+      ))
+    if self._rejected:
+      self.queue.put(Message(
+        'rejected',
+        f'{len(self._rejected)} records were not saved',
+        '\n'.join(self._rejected)
+      ))
+    if handled:
+      self.queue.put(Message(
+        'synced', 'Records saved to the database',
+        f'{handled} journaled records were sent'
+      ))
+    return handled
+
+  def run(self):
+    while not self._stopped.is_set():
+      try:
+        self.replay()
+      except Exception as e:
+        self.queue.put(Message('warning', 'Journal error', str(e)))
+      self._wake.wait(self.interval)
+      self._wake.clear()
 
 
 class ThreadedUploader(Thread):
@@ -444,33 +1288,316 @@ class ThreadedUploader(Thread):
     )
 
     with self.upload_lock:
-      with open(self.filepath, 'rb') as fh:
-        files = {'file': fh}
-        response = self.session.put(
-          self.files_url, files=files
+      self._upload()
+
+  def _upload(self):
+    """PUT the whole file; the caller must hold upload_lock"""
+    with open(self.filepath, 'rb') as fh:
+      files = {'file': fh}
+      response = self.session.put(
+        self.files_url, files=files
+      )
+    try:
+      response.raise_for_status()
+    except Exception as e:
+      self.queue.put(Message('error', 'Upload Error', str(e)))
+    else:
+      self.queue.put(
+        Message(
+          'done',
+          'Upload Succeeded',
+          f'Upload of {self.filepath} to REST succeeded'
         )
+      )
+
+
+class ThreadedDeltaUploader(ThreadedUploader):
+  """Send only the blocks that differ from the server's copy"""
+
+  def __init__(self, session_cookie, files_url, filepath, queue):
+    super().__init__(session_cookie, files_url, filepath, queue)
+    self.file_url = f'{files_url}/{Path(filepath).name}'
+
+  def _get_remote_manifest(self):
+    response = self.session.get(
+      f'{self.file_url}/manifest',
+      params={'block_size': DELTA_BLOCK_SIZE}
+    )
+    if response.status_code == 404:
+      return None
+    response.raise_for_status()
+    return response.json()
+
+  def run(self, *args, **kwargs):
+    self.queue.put(
+      Message(
+        'info', 'Sync Started',
+        f'Comparing {self.filepath} with the server copy'
+      )
+    )
+    with self.upload_lock:
+      try:
+        plan = plan_delta_upload(self.filepath, self._get_remote_manifest())
+      except Exception as e:
+        self.queue.put(Message('error', 'Sync Error', str(e)))
+        return
+      if plan is None:
+        # Nothing to compare against; fall back to a full upload
+        self._upload()
+        return
+
+      local_manifest, blocks = plan
+      files = [
+        (str(index), (f'block-{index}', data)) for index, data in blocks
+      ]
+      response = self.session.patch(
+        self.file_url,
+        data={
+          'size': local_manifest['size'],
+          'block_size': DELTA_BLOCK_SIZE
+        },
+        files=files or None
+      )
       try:
         response.raise_for_status()
       except Exception as e:
-        self.queue.put(Message('error', 'Upload Error', str(e)))
+        self.queue.put(Message('error', 'Sync Error', str(e)))
       else:
         self.queue.put(
-          Message(
-            'done',
-            'Upload Succeeded',
-            f'Upload of {self.filepath} to REST succeeded'
-          )
+          delta_upload_message(self.filepath, local_manifest, blocks)
         )
 
 
+class DownloadProgress:
+  """Post a progress Message whenever another percent is received"""
+
+  def __init__(self, total, queue):
+    self.total = total
+    self.queue = queue
+    self.last_report = -1
+
+  def update(self, received):
+    if self.total:
+      report = received * 100 // self.total
+      body = f'{report}% of {self.total} bytes'
+    else:
+      # unknown size, report each MiB
+      report = received >> 20
+      body = f'{received} bytes'
+    if report != self.last_report:
+      self.queue.put(Message('info', 'Downloading', body))
+      self.last_report = report
+
+
+class ResumableDownload:
+  """A download to a .part file that resumes with byte ranges
+
+  ThreadedDownloader and CorporateRestModel.async_download_file share
+  this and differ only in how they make the requests: each attempt
+  sends headers(), passes the response's status and headers to
+  begin(), and write()s the body.  The .part file replaces local_path
+  once the download is complete.
+
+  If every attempt fails, the .part file is kept, with the file's ETag
+  beside it, and the next download of the same file resumes from it.
+  """
+
+  chunk_size = 64 * 1024
+  max_attempts = 5
+  timeout = 30
+  # seconds before the second attempt, doubling for each one after
+  retry_delay = 1
+  max_retry_delay = 30
+
+  def __init__(self, url, local_path, queue):
+    self.url = url
+    self.local_path = Path(local_path)
+    self.part_path = self.local_path.with_name(
+      self.local_path.name + '.part'
+    )
+    self.etag_path = self.part_path.with_name(
+      self.part_path.name + '.etag'
+    )
+    self.queue = queue
+    self.received = 0
+    self.etag = None
+    self.error = None
+    self._fh = None
+    self._progress = None
+
+  def open(self):
+    self.queue.put(
+      Message('info', 'Download Started', f'Begin download of {self.url}')
+    )
+    if self.part_path.exists() and self.etag_path.exists():
+      # left by a failed download; If-Range makes resuming safe
+      etag = self.etag_path.read_text()
+      self._fh = open(self.part_path, 'ab')
+      self.etag = etag
+      self.received = self._fh.tell()
+    else:
+      self._fh = open(self.part_path, 'wb')
+
+  def attempts(self):
+    return range(1, self.max_attempts + 1)
+
+  def backoff(self, attempt):
+    """Seconds to wait after a failed attempt before the next one"""
+    if attempt >= self.max_attempts:
+      return 0
+    return min(self.retry_delay * 2 ** (attempt - 1), self.max_retry_delay)
+
+  def is_complete(self, status, headers):
+    """True if a resume request found we already have the whole file
+
+    The server answers 416 when the range starts at the end of the
+    file; its Content-Range then gives the file's size.
+    """
+    if status != 416 or not self.received:
+      return False
+    size = headers.get('Content-Range', '').rpartition('/')[2]
+    if size != str(self.received):
+      return False
+    self.error = None
+    return True
+
+  def headers(self):
+    """Request headers asking for the part we don't have yet"""
+    headers = dict()
+    if self.received:
+      headers['Range'] = f'bytes={self.received}-'
+      if self.etag:
+        # start over if the file changed since the first attempt
+        headers['If-Range'] = self.etag
+    return headers
+
+  def begin(self, status, headers):
+    """Prepare for a response body"""
+    if status != 206:
+      # the server sent the whole file
+      self._fh.seek(0)
+      self._fh.truncate()
+      self.received = 0
+    self.etag = headers.get('ETag', self.etag)
+    if self.etag:
+      self.etag_path.write_text(self.etag)
+    total = self.received + int(headers.get('Content-Length', 0))
+    self._progress = DownloadProgress(total, self.queue)
+    self.error = None
+
+  def write(self, chunk):
+    self._fh.write(chunk)
+    self.received += len(chunk)
+    self._progress.update(self.received)
+
+  def interrupted(self, attempt, error):
+    """Keep what we have, to ask for the rest on the next attempt"""
+    self.error = error
+    self.received = self._fh.tell()
+    self.queue.put(
+      Message(
+        'info', 'Download Interrupted',
+        f'Resuming at byte {self.received} '
+        f'(attempt {attempt} of {self.max_attempts})'
+      )
+    )
+
+  def failed(self, error):
+    self.error = error
+
+  def finish(self):
+    """Put the file in place, or report why it couldn't be downloaded"""
+    if self._fh is None:
+      # open() failed, so there is nothing of ours to clean up
+      self.queue.put(Message('error', 'Download Error', str(self.error)))
+      return
+    self._fh.close()
+    if self.error is not None:
+      if self.etag and self.received:
+        detail = (
+          f'{self.error}\n\n{self.received} bytes were kept in '
+          f'{self.part_path}; downloading again will resume from there.'
+        )
+      else:
+        # without an ETag a later download can't resume safely
+        self.part_path.unlink()
+        self.etag_path.unlink(missing_ok=True)
+        detail = str(self.error)
+      self.queue.put(Message('error', 'Download Error', detail))
+      return
+    self.part_path.replace(self.local_path)
+    self.etag_path.unlink(missing_ok=True)
+    self.queue.put(
+      Message(
+        'done',
+        'Download Complete',
+        f'Saved {self.received} bytes to {self.local_path}'
+      )
+    )
+
+
+class ThreadedDownloader(Thread):
+  """Stream a file to disk on a thread, resuming after drops"""
+
+  def __init__(self, session_cookie, file_url, local_path, queue):
+    super().__init__()
+    self.download = ResumableDownload(file_url, local_path, queue)
+    self.session = requests.Session()
+    self.session.cookies['session'] = session_cookie
+
+  def _fetch(self):
+    download = self.download
+    with self.session.get(
+      download.url, headers=download.headers(), stream=True,
+      timeout=download.timeout
+    ) as response:
+      if download.is_complete(response.status_code, response.headers):
+        return
+      response.raise_for_status()
+      download.begin(response.status_code, response.headers)
+      for chunk in response.iter_content(download.chunk_size):
+        download.write(chunk)
+
+  def run(self, *args, **kwargs):
+    download = self.download
+    try:
+      download.open()
+    except OSError as e:
+      download.failed(e)
+      download.finish()
+      return
+    for attempt in download.attempts():
+      try:
+        self._fetch()
+      except (
+        requests.ConnectionError,
+        requests.Timeout,
+        requests.exceptions.ChunkedEncodingError
+      ) as e:
+        download.interrupted(attempt, e)
+        sleep(download.backoff(attempt))
+      except Exception as e:
+        download.failed(e)
+        break
+      else:
+        break
+    download.finish()
+
+
 class CorporateRestModel:
+  """Access to the corporate REST service
 
-  def __init__(self, base_url):
+  If an AsyncLoop is given, uploads and downloads run as coroutines
+  on it instead of each starting its own thread.
+  """
+
+  def __init__(self, base_url, loop=None, queue=None):
 
     self.auth_url = f'{base_url}/auth'
     self.files_url = f'{base_url}/files'
     self.session = requests.session()
-    self.queue = Queue()
+    self.queue = queue or Queue()
+    self.loop = loop
 
   @staticmethod
   def _raise_for_status(response):
@@ -497,21 +1624,167 @@ class CorporateRestModel:
       return False
     self._raise_for_status(response)
 
-  def get_file(self, filename):
-    """Download a file from the server"""
-    url = f"{self.files_url}/{filename}"
-    response = self.session.get(url)
-    self._raise_for_status(response)
-    return response.text
+  def download_file(self, filename, local_path):
+    """Stream a file from the server to local_path in the background"""
+    if self.loop:
+      self.loop.submit(self.async_download_file(filename, local_path))
+      return
+    cookie = self.session.cookies.get('session')
+    downloader = ThreadedDownloader(
+      cookie, f'{self.files_url}/{filename}', local_path, self.queue
+    )
+    downloader.start()
 
   def upload_file(self, filepath):
     """PUT a file on the server"""
+    if self.loop:
+      self.loop.submit(self.async_upload_file(filepath))
+      return
     cookie = self.session.cookies.get('session')
     uploader = ThreadedUploader(
       cookie, self.files_url, filepath, self.queue
     )
     uploader.start()
 
+  def upload_file_delta(self, filepath):
+    """Update a file on the server by sending only changed blocks"""
+    if self.loop:
+      self.loop.submit(self.async_upload_file_delta(filepath))
+      return
+    cookie = self.session.cookies.get('session')
+    uploader = ThreadedDeltaUploader(
+      cookie, self.files_url, filepath, self.queue
+    )
+    uploader.start()
+
+  ##############
+  # Coroutines #
+  ##############
+
+  def _open_session(self, **kwargs):
+    """Open an aiohttp session sharing our login cookie"""
+    return network.open_session(
+      cookies=self.session.cookies.get_dict(), **kwargs
+    )
+
+  async def async_upload_file(self, filepath):
+    """PUT a file on the server, posting Messages to the queue"""
+    self.queue.put(
+      Message('info', 'Upload Started', f'Begin upload of {filepath}')
+    )
+    try:
+      async with self._open_session() as session:
+        await self._async_put(session, filepath)
+    except Exception as e:
+      self.queue.put(Message('error', 'Upload Error', str(e)))
+    else:
+      self.queue.put(
+        Message(
+          'done', 'Upload Succeeded',
+          f'Upload of {filepath} to REST succeeded'
+        )
+      )
+
+  async def _async_put(self, session, filepath):
+    with open(filepath, 'rb') as fh:
+      data = network.aiohttp.FormData()
+      data.add_field('file', fh, filename=Path(filepath).name)
+      async with session.put(self.files_url, data=data) as response:
+        response.raise_for_status()
+
+  async def async_upload_file_delta(self, filepath):
+    """Send only the blocks that differ from the server's copy"""
+    self.queue.put(
+      Message(
+        'info', 'Sync Started',
+        f'Comparing {filepath} with the server copy'
+      )
+    )
+    file_url = f'{self.files_url}/{Path(filepath).name}'
+    try:
+      async with self._open_session() as session:
+        async with session.get(
+          f'{file_url}/manifest', params={'block_size': DELTA_BLOCK_SIZE}
+        ) as response:
+          if response.status == 404:
+            remote_manifest = None
+          else:
+            response.raise_for_status()
+            remote_manifest = await response.json()
+        # hashing the file would hold up every other coroutine
+        plan = await asyncio.to_thread(
+          plan_delta_upload, filepath, remote_manifest
+        )
+        if plan is None:
+          # Nothing to compare against; fall back to a full upload
+          await self._async_put(session, filepath)
+          self.queue.put(
+            Message(
+              'done', 'Upload Succeeded',
+              f'Upload of {filepath} to REST succeeded'
+            )
+          )
+          return
+
+        local_manifest, blocks = plan
+        data = network.aiohttp.FormData()
+        data.add_field('size', str(local_manifest['size']))
+        data.add_field('block_size', str(DELTA_BLOCK_SIZE))
+        for index, block in blocks:
+          data.add_field(str(index), block, filename=f'block-{index}')
+        async with session.patch(file_url, data=data) as response:
+          response.raise_for_status()
+    except Exception as e:
+      self.queue.put(Message('error', 'Sync Error', str(e)))
+    else:
+      self.queue.put(delta_upload_message(filepath, local_manifest, blocks))
+
+  async def async_download_file(self, filename, local_path):
+    """Stream a file to local_path, resuming with byte ranges after drops
+
+    File writes run in a worker thread, off the event loop.
+    """
+    download = ResumableDownload(
+      f'{self.files_url}/{filename}', local_path, self.queue
+    )
+    aiohttp = network.aiohttp
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=download.timeout)
+    try:
+      await asyncio.to_thread(download.open)
+    except OSError as e:
+      download.failed(e)
+      await asyncio.to_thread(download.finish)
+      return
+    async with self._open_session(timeout=timeout) as session:
+      for attempt in download.attempts():
+        try:
+          async with session.get(
+            download.url, headers=download.headers()
+          ) as response:
+            if download.is_complete(response.status, response.headers):
+              break
+            response.raise_for_status()
+            await asyncio.to_thread(
+              download.begin, response.status, response.headers
+            )
+            # iter_any hands over whatever arrived, so a drop loses nothing
+            async for chunk in response.content.iter_any():
+              await asyncio.to_thread(download.write, chunk)
+        except (
+          aiohttp.ClientConnectionError,
+          aiohttp.ClientPayloadError,
+          asyncio.TimeoutError
+        ) as e:
+          download.interrupted(attempt, e)
+          await asyncio.sleep(download.backoff(attempt))
+        except Exception as e:
+          download.failed(e)
+          break
+        else:
+          break
+    await asyncio.to_thread(download.finish)
+
+
 class SFTPModel:
 
   def __init__(self, host, port=22):
@@ -571,6 +1844,77 @@ class SFTPModel:
     # just use filename because our CWD should
     # be the full path without the name
     sftp.put(local_path, remote_path.name)
+    self._put_manifest(sftp, remote_path.name, get_block_hashes(local_path))
+
+  @staticmethod
+  def _put_manifest(sftp, remote_path, manifest):
+    """Store the block manifest next to the remote file
+
+    The file's modification time is recorded with it, so a file
+    changed by anything else no longer matches its manifest.
+    """
+    manifest = dict(manifest, mtime=sftp.stat(remote_path).st_mtime)
+    with sftp.open(f'{remote_path}.manifest', 'w') as fh:
+      fh.write(json.dumps(manifest))
+
+  @staticmethod
+  def _manifest_matches(sftp, remote_path, manifest):
+    """Check that manifest still describes the file at remote_path"""
+    if manifest is None or manifest.get('block_size') != DELTA_BLOCK_SIZE:
+      return False
+    try:
+      attrs = sftp.stat(remote_path)
+    except FileNotFoundError:
+      return False
+    return (
+      attrs.st_size == manifest.get('size')
+      and attrs.st_mtime == manifest.get('mtime')
+    )
+
+  def get_manifest(self, remote_path):
+    """Return the block manifest stored for remote_path, if any"""
+    self._check_auth()
+    sftp = self._client.open_sftp()
+    try:
+      with sftp.open(f'{remote_path}.manifest', 'r') as fh:
+        return json.loads(fh.read())
+    except (FileNotFoundError, ValueError):
+      return None
+
+  def upload_file_delta(self, local_path, remote_path):
+    """Update remote_path by writing only the blocks that changed
+
+    Falls back to a full upload when there is no usable manifest, or
+    when the remote file's size or modification time no longer match
+    it.  The patched file is hashed again, and uploaded in full if it
+    doesn't match the local file.
+    Returns a tuple of (blocks sent, total blocks).
+    """
+    self._check_auth()
+    local_manifest = get_block_hashes(local_path)
+    total = len(local_manifest['hashes'])
+    remote_manifest = self.get_manifest(remote_path)
+    sftp = self._client.open_sftp()
+    if not self._manifest_matches(sftp, remote_path, remote_manifest):
+      self.upload_file(local_path, remote_path)
+      return total, total
+
+    changed = get_changed_blocks(local_manifest, remote_manifest)
+    # an interrupted patch must not leave a manifest that looks current
+    sftp.remove(f'{remote_path}.manifest')
+    with sftp.open(remote_path, 'r+') as fh:
+      for index, data in read_blocks(local_path, changed):
+        fh.seek(index * DELTA_BLOCK_SIZE)
+        fh.write(data)
+      fh.truncate(local_manifest['size'])
+    with sftp.open(remote_path, 'r') as fh:
+      fh.prefetch()
+      patched = hash_blocks(fh)
+    if patched != local_manifest:
+      self.upload_file(local_path, remote_path)
+      return total, total
+    self._put_manifest(sftp, remote_path, local_manifest)
+    return len(changed), total
 
   def get_file(self, remote_path, local_path):
     self._check_auth()
@@ -0,0 +1,52 @@
+"""Asyncio network layer for ABQ Data Entry
+
+One event loop runs on a dedicated thread, so many requests can be
+in flight at once without an OS thread per request.  Coroutines are
+scheduled from the Tk thread with submit(); results come back through
+a callback, which runs on the loop thread, so callbacks should only
+do thread-safe things such as putting a Message on a Queue.
+
+The layer needs aiohttp.  If it isn't installed, `available` is False
+and the models fall back to their threaded implementations.
+"""
+
+from threading import Thread
+import asyncio
+
+from .lazy import lazy_import, is_installed
+
+aiohttp = lazy_import('aiohttp')
+
+available = is_installed('aiohttp')
+
+
+class AsyncLoop(Thread):
+  """An asyncio event loop running on its own thread"""
+
+  def __init__(self):
+    super().__init__(daemon=True)
+    self.loop = asyncio.new_event_loop()
+
+  def run(self):
+    asyncio.set_event_loop(self.loop)
+    self.loop.run_forever()
+
+  def submit(self, coro, callback=None):
+    """Schedule coro on the loop from any thread
+
+    Returns a concurrent.futures.Future.  If callback is given,
+    it is called with that future once the coroutine finishes.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+    if callback:
+      future.add_done_callback(callback)
+    return future
+
+  def stop(self):
+    """Stop the loop; pending tasks are abandoned"""
+    self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def open_session(cookies=None, **kwargs):
+  """Create an aiohttp ClientSession; must be called on the loop"""
+  return aiohttp.ClientSession(cookies=cookies, **kwargs)
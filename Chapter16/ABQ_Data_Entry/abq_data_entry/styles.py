@@ -0,0 +1,83 @@
+"""A shared registry of ttk styles for ABQ Data Entry
+
+Widgets and forms used to call ttk.Style().configure() and map() for
+their styles every time one was built, costing several Tcl round trips
+per widget.  The registry keeps one record of every style definition
+per Tk interpreter.  A style is sent to Tcl the first time it's
+defined, and a batch of definitions goes over in a single call.
+Styles belong to the current theme, so they are applied again
+when the theme changes.
+"""
+
+from tkinter import ttk
+
+
+# Runs a list of ttk::style subcommands in one trip to Tcl
+BATCH_PROC = '''
+namespace eval ::abq {}
+proc ::abq::style_batch {commands} {
+  foreach command $commands {
+    ttk::style {*}$command
+  }
+}
+'''
+
+
+class StyleRegistry:
+  """Defines each ttk style once per Tk interpreter"""
+
+  def __init__(self, root):
+    self.root = root
+    # style name -> {'configure': {...}, 'map': {...}}
+    self.definitions = dict()
+    root.tk.eval(BATCH_PROC)
+    root.bind('<<ThemeChanged>>', self._on_theme_changed, add='+')
+
+  def define(self, definitions):
+    """Define any of the given styles that aren't defined yet
+
+    definitions maps style names to a dict that may hold a 'configure'
+    dict of options and a 'map' dict of state-specific options, as they
+    would be passed to ttk.Style.configure() and ttk.Style.map().
+    """
+    new = {
+      name: definition for name, definition in definitions.items()
+      if name not in self.definitions
+    }
+    if new:
+      self.definitions.update(new)
+      self._apply(new)
+
+  def define_style(self, name, configure=None, map=None):
+    """Define a single style"""
+    self.define({name: {'configure': configure, 'map': map}})
+
+  def _apply(self, definitions):
+    """Send the definitions to Tcl in one call"""
+    commands = list()
+    for name, definition in definitions.items():
+      if definition.get('configure'):
+        commands.append(
+          ('configure', name) + ttk._format_optdict(definition['configure'])
+        )
+      if definition.get('map'):
+        commands.append(
+          ('map', name) + ttk._format_mapdict(definition['map'])
+        )
+    if commands:
+      self.root.tk.call('::abq::style_batch', tuple(commands))
+
+  def _on_theme_changed(self, event):
+    # Every window gets <<ThemeChanged>> and they all carry the root's
+    # bindtag, so only respond to the root's own event
+    if event.widget is self.root:
+      self._apply(self.definitions)
+
+
+def get_style_registry(widget):
+  """Return the StyleRegistry for widget's Tk interpreter"""
+  root = widget._root()
+  registry = getattr(root, '_style_registry', None)
+  if registry is None:
+    registry = root._style_registry = StyleRegistry(root)
+  return registry
@@ -1,5 +1,5 @@
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import patch, Mock
 from .. import application
 
 
@@ -26,24 +26,29 @@ class TestApplication(TestCase):
         'autofill sheet data': {'type': 'bool', 'value': True},
         'font size': {'type': 'int', 'value': 9},
         'font family': {'type': 'str', 'value': ''},
-        'theme': {'type': 'str', 'value': 'default'}
+        'theme': {'type': 'str', 'value': 'default'},
+        'weather_station': {'type': 'str', 'value': 'KBMG'},
+        'weather_interval': {'type': 'int', 'value': 60}
       }
 
   def setUp(self):
     # can be parenthesized in python 3.10+
     with \
-      patch('abq_data_entry.application.m.CSVModel') as csvmodel,\
+      patch('abq_data_entry.application.m.SQLModel') as sqlmodel,\
       patch('abq_data_entry.application.m.SettingsModel') as settingsmodel,\
-      patch('abq_data_entry.application.Application._show_login') as show_login,\
+      patch('abq_data_entry.application.v.LoginDialog') as logindialog,\
       patch('abq_data_entry.application.v.DataRecordForm'),\
       patch('abq_data_entry.application.v.RecordList'),\
       patch('abq_data_entry.application.ttk.Notebook'),\
+      patch('abq_data_entry.application.m.WeatherCollector'),\
+      patch('abq_data_entry.application.m.RecordJournal'),\
+      patch('abq_data_entry.application.m.JournalReplayer'),\
       patch('abq_data_entry.application.get_main_menu_for_os')\
     :
 
       settingsmodel().fields = self.settings
-      csvmodel().get_all_records.return_value = self.records
-      show_login.return_value = True
+      sqlmodel().get_all_records.return_value = self.records
+      logindialog().result = ('test', 'test')
       self.app = application.Application()
 
   def tearDown(self):
@@ -55,6 +60,15 @@ class TestApplication(TestCase):
     self.app.update()
     self.app.notebook.select.assert_called_with(self.app.recordlist)
 
+  def test_recordform_is_lazy(self):
+    with patch('abq_data_entry.application.v.DataRecordForm') as form:
+      form.assert_not_called()
+      self.app._new_record()
+      form.assert_called_once()
+      form.return_value.load_record.assert_called_with(None, None)
+      self.app._new_record()
+      form.assert_called_once()
+
   def test_populate_recordlist(self):
     # test correct functions
     self.app._populate_recordlist()
@@ -70,3 +84,97 @@ class TestApplication(TestCase):
         title='Error', message='Problem reading file',
         detail='Test message'
       )
+
+
+class TestOfflineLogin(TestCase):
+  """Offering to work offline, without building the window"""
+
+  def setUp(self):
+    self.app = application.Application.__new__(application.Application)
+    self.app.journal = Mock()
+
+  def test_refused_login_is_not_offered_offline(self):
+    self.app._login_error = application.m.pg.OperationalError(
+      'FATAL: no pg_hba.conf entry for host'
+    )
+    with patch('abq_data_entry.application.messagebox') as messagebox:
+      self.assertFalse(self.app._offline_login())
+      messagebox.askyesno.assert_not_called()
+
+  def test_unreachable_server_is_offered_offline(self):
+    self.app._login_error = application.m.DatabaseUnavailable('refused')
+    with \
+      patch('abq_data_entry.application.messagebox') as messagebox,\
+      patch('abq_data_entry.application.m.OfflineModel') as offline\
+    :
+      messagebox.askyesno.return_value = True
+      self.assertTrue(self.app._offline_login())
+      offline.assert_called_once_with(self.app.journal)
+
+
+class TestSaveBatch(TestCase):
+  """Saving the batch entry grid, without building the window"""
+
+  records = [
+    {'Date': '2021-06-01', 'Time': '8:00', 'Lab': 'A', 'Plot': str(plot)}
+    for plot in (1, 2, 3)
+  ]
+
+  def setUp(self):
+    self.app = application.Application.__new__(application.Application)
+    self.app.batchgrid = Mock()
+    self.app.batchgrid.get_errors.return_value = dict()
+    self.app.batchgrid.get.return_value = self.records
+    self.app.model = Mock(offline=False)
+    self.app.status = Mock()
+    self.app.journal = Mock()
+    self.app.replayer = Mock()
+    self.app.inserted_rows = list()
+    self.app.updated_rows = list()
+    self.app.records_saved = 0
+    self.app._show_saved_count = Mock()
+    self.app._load_recordlist = Mock()
+
+  def test_rows_are_journaled(self):
+    self.app._on_save_batch()
+    # saved through the journal, never on the Tk thread
+    self.app.model.save_records.assert_not_called()
+    self.app.model.insert_records.assert_not_called()
+    self.app.journal.extend.assert_called_once_with(self.records)
+    self.app.replayer.notify.assert_called_once()
+    self.assertEqual(self.app.inserted_rows, [
+      ('2021-06-01', '8:00', 'A', str(plot)) for plot in (1, 2, 3)
+    ])
+    self.assertEqual(self.app.updated_rows, [])
+    self.assertEqual(self.app.records_saved, 3)
+    self.app.batchgrid.reset.assert_called_once()
+    self.app._load_recordlist.assert_not_called()
+
+  def test_offline_rows_are_journaled(self):
+    self.app.model.offline = True
+    self.app._on_save_batch()
+    self.app.journal.extend.assert_called_once_with(self.records)
+    self.app.replayer.notify.assert_called_once()
+    self.assertEqual(self.app.records_saved, 3)
+    self.app.batchgrid.reset.assert_called_once()
+    # the offline model lists journaled records, so show them now
+    self.app._load_recordlist.assert_called_once()
+
+  def test_errors_prevent_saving(self):
+    self.app.batchgrid.get_errors.return_value = {
+      ('2', 'Med Height'): 'Must be between min and max height'
+    }
+    with patch('abq_data_entry.application.messagebox') as messagebox:
+      self.assertFalse(self.app._on_save_batch())
+      messagebox.showerror.assert_called_once()
+    self.app.journal.extend.assert_not_called()
+    self.app.status.set.assert_called_with(
+      'Cannot save, error in fields: Plot 2 Med Height'
+    )
+    self.app.batchgrid.reset.assert_not_called()
+
+  def test_no_rows(self):
+    self.app.batchgrid.get.return_value = []
+    self.assertFalse(self.app._on_save_batch())
+    self.app.journal.extend.assert_not_called()
+    self.app.status.set.assert_called_with('No rows to save')
@@ -0,0 +1,97 @@
+from .. import dispatch
+from unittest import TestCase
+from unittest.mock import Mock
+from threading import Thread
+
+
+class TestDispatchQueue(TestCase):
+  """DispatchQueue against a mock widget
+
+  The widget's event_generate and after are mocks, so the tests can
+  decide whether a cross-thread wakeup gets through, and run the
+  Tk side (the bound _drain, the after() poll) themselves.
+  """
+
+  def setUp(self):
+    self.widget = Mock()
+    self.handler = Mock()
+    self.queue = dispatch.DispatchQueue(self.widget, self.handler)
+
+  def poll(self):
+    """Run the most recently scheduled fallback poll"""
+    callback = self.widget.after.call_args[0][1]
+    callback()
+
+  def delivered(self):
+    return [
+      message for call in self.handler.call_args_list
+      for message in call[0][0]
+    ]
+
+  def test_one_wakeup_per_batch(self):
+    self.queue.put('a')
+    self.queue.put('b')
+    self.widget.event_generate.assert_called_once_with(
+      self.queue.event, when='tail'
+    )
+    self.queue._drain()
+    self.handler.assert_called_once_with(['a', 'b'])
+    self.queue.put('c')
+    self.assertEqual(self.widget.event_generate.call_count, 2)
+
+  def test_batches_messages_from_threads(self):
+    def worker(n):
+      for i in range(50):
+        self.queue.put((n, i))
+
+    threads = [Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+      thread.start()
+    while any(thread.is_alive() for thread in threads):
+      self.queue._drain()
+    self.queue._drain()
+
+    self.assertEqual(len(self.delivered()), 200)
+    # one wakeup per batch, not one per message
+    self.assertEqual(
+      self.widget.event_generate.call_count, self.handler.call_count
+    )
+
+  def test_failed_wakeup_is_retried(self):
+    # what tkinter raises for a cross-thread call outside mainloop()
+    self.widget.event_generate.side_effect = [
+      RuntimeError('main thread is not in main loop'), None
+    ]
+    worker = Thread(target=self.queue.put, args=('a',))
+    worker.start()
+    worker.join()
+    self.queue.put('b')
+    self.assertEqual(self.widget.event_generate.call_count, 2)
+    self.queue._drain()
+    self.handler.assert_called_once_with(['a', 'b'])
+
+  def test_poll_delivers_lost_wakeups(self):
+    self.widget.event_generate.side_effect = RuntimeError
+    self.poll()
+    self.handler.assert_not_called()
+
+    for message in ('a', 'b'):
+      worker = Thread(target=self.queue.put, args=(message,))
+      worker.start()
+      worker.join()
+    self.poll()
+    self.handler.assert_called_once_with(['a', 'b'])
+
+    # once Tk is running, wakeups work again
+    self.widget.event_generate.side_effect = None
+    self.widget.event_generate.reset_mock()
+    self.queue.put('c')
+    self.widget.event_generate.assert_called_once()
+    self.queue._drain()
+    self.assertEqual(self.delivered(), ['a', 'b', 'c'])
+
+  def test_poll_reschedules(self):
+    self.poll()
+    self.poll()
+    self.assertEqual(self.widget.after.call_count, 3)
+    self.handler.assert_not_called()
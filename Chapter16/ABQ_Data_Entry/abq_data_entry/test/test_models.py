@@ -1,8 +1,17 @@
 from .. import models
-from unittest import TestCase
+from .. import network
+from unittest import TestCase, skipUnless
 from unittest import mock
 
+import io
+import os
 from pathlib import Path
+from threading import RLock
+from time import perf_counter, sleep
+from tempfile import TemporaryDirectory
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from queue import Queue
 
 class TestCSVModel(TestCase):
 
@@ -135,3 +144,842 @@ class TestCSVModel(TestCase):
       ])
       with self.assertRaises(IndexError):
         self.model2.save_record(record, 2)
+
+
+class TestSQLModelSaveRecords(TestCase):
+
+  record = {
+    'Date': '2021-06-01', 'Time': '8:00', 'Technician': 'J Simms',
+    'Lab': 'A', 'Plot': '1', 'Seed Sample': 'AX477',
+    'Humidity': '24.09', 'Light': '1.03', 'Temperature': '22.01',
+    'Equipment Fault': False, 'Plants': '9', 'Blossoms': '21',
+    'Fruit': '3', 'Max Height': '8.7', 'Med Height': '2.73',
+    'Min Height': '1.67', 'Notes': ''
+  }
+
+  def setUp(self):
+    # skip __init__, which connects and loads the lookup tables
+    self.model = models.SQLModel.__new__(models.SQLModel)
+    self.model.connection = mock.MagicMock()
+    self.model._lock = RLock()
+
+  @mock.patch('psycopg2.extras.execute_values')
+  def test_save_records(self, execute_values):
+    records = [
+      dict(self.record, Plot='1'),
+      dict(self.record, Plot='2'),
+      dict(self.record, Plot='1', Notes='corrected'),
+      dict(self.record, Time='12:00', Plot='1')
+    ]
+    # plot 1 at 8:00 is already in the database, so only
+    # the other two rows come back as inserted
+    execute_values.side_effect = [
+      None,
+      [
+        {'Date': '2021-06-01', 'Time': '8:00', 'Lab': 'A', 'Plot': 2},
+        {'Date': '2021-06-01', 'Time': '12:00', 'Lab': 'A', 'Plot': 1},
+      ]
+    ]
+    outcomes = self.model.save_records(records)
+    self.assertEqual(
+      outcomes, ['duplicate', 'inserted', 'duplicate', 'inserted']
+    )
+
+    # one lab check row per date, time and lab
+    lc_call, pc_call = execute_values.call_args_list
+    self.assertEqual(len(lc_call.args[2]), 2)
+    # one plot check row per key, keeping the first record
+    self.assertEqual(len(pc_call.args[2]), 3)
+    self.assertIn(records[0], pc_call.args[2])
+    self.assertNotIn(records[2], pc_call.args[2])
+    # existing plot checks are never updated
+    self.assertIn('DO NOTHING', pc_call.args[1])
+    self.assertNotIn('UPDATE', pc_call.args[1])
+
+  @mock.patch('psycopg2.extras.execute_values')
+  def test_weather_table_without_station(self, execute_values):
+    # let errors out of the mocked transaction and cursor
+    self.model.connection.__exit__.return_value = False
+    self.model.connection.cursor().__exit__.return_value = False
+    execute_values.side_effect = models.pg.errors.UndefinedColumn(
+      'column "station_id" of relation "local_weather" does not exist'
+    )
+    with self.assertRaisesRegex(
+      models.OutdatedSchema, 'migrate_local_weather.sql'
+    ):
+      self.model.add_weather_data_batch([{
+        'observation_time_rfc822': 'Mon, 19 Oct 2026 10:53:00 -0400',
+        'temp_c': '12.8', 'relative_humidity': '62',
+        'pressure_mb': '1018.5', 'weather': 'Fair'
+      }])
+
+  @mock.patch('psycopg2.extras.execute_values')
+  def test_insert_records(self, execute_values):
+    records = [dict(self.record, Plot='1'), dict(self.record, Plot='1')]
+    self.model.insert_records(records)
+    lc_call, pc_call = execute_values.call_args_list
+    # every record is inserted; a duplicate is left for the database to reject
+    self.assertEqual(pc_call.args[1], models.SQLModel.pc_insert_many_query)
+    self.assertNotIn('ON CONFLICT', pc_call.args[1])
+    self.assertEqual(pc_call.args[2], records)
+
+  @mock.patch('abq_data_entry.models.pg.connect')
+  def test_unreachable_server(self, connect):
+    connect.side_effect = models.pg.OperationalError('connection refused')
+    with mock.patch.object(
+      models.SQLModel, '_server_reachable', return_value=False
+    ):
+      with self.assertRaises(models.DatabaseUnavailable):
+        models.SQLModel('db', 'abq', 'user', 'pw')
+    # a server that answers but refuses the login is not "unavailable"
+    connect.side_effect = models.pg.OperationalError('password failed')
+    with mock.patch.object(
+      models.SQLModel, '_server_reachable', return_value=True
+    ):
+      with self.assertRaises(models.pg.OperationalError):
+        models.SQLModel('db', 'abq', 'user', 'pw')
+
+
+@skipUnless(
+  os.environ.get('ABQ_TEST_DB_NAME'),
+  'Set ABQ_TEST_DB_NAME (and ABQ_TEST_DB_HOST, ABQ_TEST_DB_USER, '
+  'ABQ_TEST_DB_PASSWORD) to benchmark against PostgreSQL'
+)
+class TestSQLModelBulkBenchmark(TestCase):
+  """Compare save_record() and save_records() on a real database"""
+
+  first_date = '2099-01-01'
+
+  def setUp(self):
+    self.model = models.SQLModel(
+      os.environ.get('ABQ_TEST_DB_HOST', 'localhost'),
+      os.environ['ABQ_TEST_DB_NAME'],
+      os.environ.get('ABQ_TEST_DB_USER', ''),
+      os.environ.get('ABQ_TEST_DB_PASSWORD', '')
+    )
+
+  def tearDown(self):
+    for table in ('plot_checks', 'lab_checks'):
+      self.model.query(
+        f'DELETE FROM {table} WHERE date >= %(date)s',
+        {'date': self.first_date}
+      )
+    self.model.connection.close()
+
+  def make_records(self, day):
+    fields = self.model.fields
+    return [
+      dict(
+        TestSQLModelSaveRecords.record,
+        Date=f'2099-01-{day:02d}', Time=time, Lab=fields['Lab']['values'][0],
+        Plot=plot, Technician=fields['Technician']['values'][0]
+      )
+      for time in fields['Time']['values']
+      for plot in fields['Plot']['values']
+    ]
+
+  def test_bulk_is_faster(self):
+    single = self.make_records(1)
+    bulk = self.make_records(2)
+
+    started = perf_counter()
+    for record in single:
+      self.model.save_record(record, None)
+    single_time = perf_counter() - started
+
+    started = perf_counter()
+    outcomes = self.model.save_records(bulk)
+    bulk_time = perf_counter() - started
+
+    print(
+      f'\n{len(bulk)} records: save_record {single_time:.3f}s, '
+      f'save_records {bulk_time:.3f}s'
+    )
+    self.assertEqual(set(outcomes), {'inserted'})
+    self.assertLess(bulk_time, single_time)
+
+    # saving again changes nothing
+    self.assertEqual(set(self.model.save_records(bulk)), {'duplicate'})
+
+
+class TestRecordJournal(TestCase):
+
+  record = TestSQLModelSaveRecords.record
+
+  def setUp(self):
+    self.tempdir = TemporaryDirectory()
+    self.journal = models.RecordJournal(
+      Path(self.tempdir.name) / 'journal.sqlite'
+    )
+
+  def tearDown(self):
+    self.journal.connection.close()
+    self.tempdir.cleanup()
+
+  def test_append_and_remove(self):
+    first = self.journal.append(self.record)
+    rowkey = ('2021-06-01', '8:00', 'A', '2')
+    second = self.journal.append(dict(self.record, Plot='2'), rowkey)
+    self.journal.extend([dict(self.record, Plot='3')])
+    pending = self.journal.pending()
+    self.assertEqual(len(pending), 3)
+    self.assertEqual(pending[0], (first, self.record, None))
+    self.assertEqual(pending[1][2], rowkey)
+    self.assertEqual(len(self.journal.pending(limit=1)), 1)
+
+    self.journal.remove([first])
+    self.journal.set_error(second, 'rejected')
+    self.assertEqual(self.journal.count(), 1)
+    self.assertEqual(self.journal.pending()[0][1]['Plot'], '3')
+
+  def test_rejected_and_retry(self):
+    id_ = self.journal.append(self.record)
+    self.journal.set_error(id_, 'rejected')
+    self.assertEqual(
+      self.journal.rejected(), [(id_, self.record, None, 'rejected')]
+    )
+    self.journal.retry([id_])
+    self.assertEqual(self.journal.rejected(), [])
+    self.assertEqual(self.journal.count(), 1)
+
+  def test_offline_model_keeps_sqlmodel_fields(self):
+    self.journal.save_lookups({'Lab': ['X', 'Y']})
+    before = models.SQLModel.fields['Lab']['values']
+    offline = models.OfflineModel(self.journal)
+    self.assertEqual(offline.fields['Lab']['values'], ['X', 'Y'])
+    self.assertIs(models.SQLModel.fields['Lab']['values'], before)
+
+  def test_survives_reopening(self):
+    self.journal.append(self.record)
+    self.journal.save_lookups({'Lab': ['A', 'B']})
+    self.journal.connection.close()
+    self.journal = models.RecordJournal(self.journal.filepath)
+    self.assertEqual(self.journal.count(), 1)
+    self.assertEqual(self.journal.load_lookups(), {'Lab': ['A', 'B']})
+
+
+class TestJournalReplayer(TestCase):
+
+  record = TestSQLModelSaveRecords.record
+
+  def setUp(self):
+    self.tempdir = TemporaryDirectory()
+    self.journal = models.RecordJournal(
+      Path(self.tempdir.name) / 'journal.sqlite'
+    )
+    self.queue = Queue()
+    self.model = mock.Mock()
+    self.model.save_records.side_effect = (
+      lambda records: ['inserted'] * len(records)
+    )
+
+  def tearDown(self):
+    self.journal.connection.close()
+    self.tempdir.cleanup()
+
+  def messages(self):
+    return [self.queue.get_nowait() for _ in range(self.queue.qsize())]
+
+  def test_replay_in_order(self):
+    rowkey = ('2021-06-01', '8:00', 'A', '1')
+    self.journal.append(dict(self.record, Plot='1'))
+    self.journal.append(dict(self.record, Plot='2'))
+    self.journal.append(dict(self.record, Notes='edit'), rowkey)
+    self.journal.append(dict(self.record, Plot='3'))
+
+    replayer = models.JournalReplayer(self.journal, self.queue, self.model)
+    self.assertEqual(replayer.replay(), 4)
+    self.assertEqual(self.journal.count(), 0)
+    self.assertEqual(
+      [c[0] for c in self.model.method_calls],
+      ['save_records', 'save_record', 'save_records']
+    )
+    self.assertEqual(
+      len(self.model.save_records.call_args_list[0].args[0]), 2
+    )
+    self.assertEqual(self.messages()[-1].status, 'synced')
+
+  def test_rejected_records_are_kept(self):
+    self.journal.append(dict(self.record, Plot='1'))
+    self.journal.append(dict(self.record, Plot='99'))
+
+    def insert_records(records):
+      if any(record['Plot'] == '99' for record in records):
+        raise ValueError('violates foreign key constraint')
+      return ['inserted'] * len(records)
+    self.model.save_records.side_effect = insert_records
+    self.model.insert_records.side_effect = insert_records
+
+    replayer = models.JournalReplayer(self.journal, self.queue, self.model)
+    replayer.replay()
+    self.assertEqual(self.journal.count(), 0)
+    rejected = self.journal.connection.execute(
+      'SELECT error FROM records'
+    ).fetchall()
+    self.assertEqual(rejected, [('violates foreign key constraint',)])
+    self.assertIn('rejected', [m.status for m in self.messages()])
+
+  def test_new_record_never_overwrites(self):
+    self.journal.append(dict(self.record, Plot='1'))
+    self.journal.append(dict(self.record, Plot='2'))
+    self.model.save_records.side_effect = None
+    self.model.save_records.return_value = ['duplicate', 'inserted']
+
+    replayer = models.JournalReplayer(self.journal, self.queue, self.model)
+    replayer.replay()
+    self.model.save_record.assert_not_called()
+    self.assertEqual(self.journal.count(), 0)
+
+    (id_, record, rowkey, error), = self.journal.rejected()
+    self.assertEqual(record['Plot'], '1')
+    self.assertIsNone(rowkey)
+    self.assertIn('already exists', error)
+    rejected, = [m for m in self.messages() if m.status == 'rejected']
+    self.assertIn('plot 1', rejected.body)
+
+    # the user can send it again, or discard it
+    self.journal.retry([id_])
+    self.assertEqual(self.journal.count(), 1)
+    self.model.save_records.return_value = ['inserted']
+    replayer.replay()
+    self.assertEqual(self.journal.count(), 0)
+    self.assertEqual(self.journal.rejected(), [])
+
+  def test_integrity_errors_are_told_apart(self):
+    self.journal.append(dict(self.record, Plot='1'))
+    self.journal.append(dict(self.record, Plot='2'))
+    self.model.save_records.side_effect = models.pg.IntegrityError()
+
+    class ForeignKeyViolation(models.pg.IntegrityError):
+      pgcode = '23503'
+      def __str__(self):
+        return 'violates foreign key constraint "lab_tech_id_fkey"'
+
+    class UniqueViolation(models.pg.IntegrityError):
+      pgcode = '23505'
+
+    self.model.insert_records.side_effect = [
+      UniqueViolation(), ForeignKeyViolation()
+    ]
+    replayer = models.JournalReplayer(self.journal, self.queue, self.model)
+    replayer.replay()
+    errors = [error for _, _, _, error in self.journal.rejected()]
+    self.assertEqual(errors, [
+      models.JournalReplayer.duplicate_error,
+      'violates foreign key constraint "lab_tech_id_fkey"'
+    ])
+
+  def test_connection_loss_keeps_records(self):
+    self.journal.append(self.record)
+    self.model.save_records.side_effect = models.pg.OperationalError('down')
+    connect = mock.Mock(side_effect=models.pg.OperationalError('down'))
+
+    replayer = models.JournalReplayer(
+      self.journal, self.queue, self.model, connect
+    )
+    self.assertEqual(replayer.replay(), 0)
+    self.assertEqual(self.journal.count(), 1)
+    self.assertIsNone(replayer.model)
+
+    # still offline
+    replayer.replay()
+    self.assertEqual(self.journal.count(), 1)
+
+    # back online
+    connect.side_effect = None
+    connect.return_value = self.model
+    self.model.save_records.side_effect = None
+    self.model.save_records.return_value = ['inserted']
+    self.assertEqual(replayer.replay(), 1)
+    self.assertEqual(self.journal.count(), 0)
+    self.assertIn('online', [m.status for m in self.messages()])
+
+
+class FakeSFTPFile(io.FileIO):
+  """A local file with the parts of paramiko's SFTPFile we use"""
+
+  def write(self, data):
+    return super().write(data.encode() if isinstance(data, str) else data)
+
+  def prefetch(self):
+    pass
+
+
+class FakeSFTP:
+  """An SFTP client that works in a local directory"""
+
+  def __init__(self, root):
+    self.root = Path(root)
+
+  def open(self, path, mode='r'):
+    return FakeSFTPFile(self.root / path, mode.replace('b', ''))
+
+  def stat(self, path):
+    return os.stat(self.root / path)
+
+  def remove(self, path):
+    os.remove(self.root / path)
+
+
+class TestSFTPDeltaUpload(TestCase):
+
+  block = models.DELTA_BLOCK_SIZE
+
+  def setUp(self):
+    tmpdir = TemporaryDirectory()
+    self.addCleanup(tmpdir.cleanup)
+    self.local = Path(tmpdir.name) / 'extract.csv'
+    self.remote = Path(tmpdir.name) / 'remote'
+    self.remote.mkdir()
+    self.sftp = FakeSFTP(self.remote)
+    # skip __init__, which sets up a real SSHClient
+    self.model = models.SFTPModel.__new__(models.SFTPModel)
+    self.model._client = mock.Mock()
+    self.model._client.open_sftp.return_value = self.sftp
+    self.model.upload_file = mock.Mock(side_effect=self.full_upload)
+
+    self.local.write_bytes(b'a' * self.block + b'b' * self.block)
+    self.full_upload(self.local, 'extract.csv')
+    self.model.upload_file.reset_mock()
+
+  def full_upload(self, local_path, remote_path):
+    (self.remote / remote_path).write_bytes(Path(local_path).read_bytes())
+    self.model._put_manifest(
+      self.sftp, remote_path, models.get_block_hashes(local_path)
+    )
+
+  def test_sends_changed_blocks(self):
+    self.local.write_bytes(b'a' * self.block + b'x' * self.block + b'c')
+    self.assertEqual(
+      self.model.upload_file_delta(self.local, 'extract.csv'), (2, 3)
+    )
+    self.model.upload_file.assert_not_called()
+    self.assertEqual(
+      (self.remote / 'extract.csv').read_bytes(), self.local.read_bytes()
+    )
+    manifest = self.model.get_manifest('extract.csv')
+    self.assertEqual(manifest['size'], 2 * self.block + 1)
+
+  def test_replaced_remote_file_is_uploaded_in_full(self):
+    # the remote file changed, but its manifest wasn't updated
+    (self.remote / 'extract.csv').write_bytes(b'z' * 3 * self.block)
+    self.local.write_bytes(b'a' * self.block + b'x' * self.block)
+    self.assertEqual(
+      self.model.upload_file_delta(self.local, 'extract.csv'), (2, 2)
+    )
+    self.model.upload_file.assert_called_once()
+    self.assertEqual(
+      (self.remote / 'extract.csv').read_bytes(), self.local.read_bytes()
+    )
+
+  def test_touched_remote_file_is_uploaded_in_full(self):
+    # same size, but edited since the manifest was written
+    remote = self.remote / 'extract.csv'
+    remote.write_bytes(b'b' * self.block + b'b' * self.block)
+    stat = remote.stat()
+    os.utime(remote, (stat.st_atime, stat.st_mtime + 10))
+    self.local.write_bytes(b'a' * self.block + b'x' * self.block)
+    self.model.upload_file_delta(self.local, 'extract.csv')
+    self.model.upload_file.assert_called_once()
+    self.assertEqual(remote.read_bytes(), self.local.read_bytes())
+
+  def test_patch_is_verified(self):
+    self.local.write_bytes(b'a' * self.block + b'x' * self.block)
+    # a remote write that goes wrong is caught by hashing the result
+    with mock.patch.object(
+      models, 'read_blocks', return_value=[(1, b'y' * self.block)]
+    ):
+      self.model.upload_file_delta(self.local, 'extract.csv')
+    self.model.upload_file.assert_called_once()
+    self.assertEqual(
+      (self.remote / 'extract.csv').read_bytes(), self.local.read_bytes()
+    )
+
+
+class TestBlockManifest(TestCase):
+
+  def setUp(self):
+    tmpdir = TemporaryDirectory()
+    self.addCleanup(tmpdir.cleanup)
+    self.path = Path(tmpdir.name) / 'extract.csv'
+    self.path.write_bytes(b'a' * 10 + b'b' * 10 + b'c' * 5)
+
+  def test_get_block_hashes(self):
+    manifest = models.get_block_hashes(self.path, block_size=10)
+    self.assertEqual(manifest['size'], 25)
+    self.assertEqual(manifest['block_size'], 10)
+    self.assertEqual(len(manifest['hashes']), 3)
+    self.assertNotEqual(manifest['hashes'][0], manifest['hashes'][1])
+
+  def test_get_changed_blocks(self):
+    remote = models.get_block_hashes(self.path, block_size=10)
+    self.path.write_bytes(b'a' * 10 + b'x' * 10 + b'c' * 5 + b'd' * 12)
+    local = models.get_block_hashes(self.path, block_size=10)
+    changed = models.get_changed_blocks(local, remote)
+    # block 1 was edited, blocks 2 and 3 grew or are new
+    self.assertEqual(changed, [1, 2, 3])
+
+    blocks = dict(models.read_blocks(self.path, changed, block_size=10))
+    self.assertEqual(blocks[1], b'x' * 10)
+    self.assertEqual(blocks[3], b'd' * 7)
+
+  def test_plan_delta_upload(self):
+    remote = models.get_block_hashes(self.path)
+    self.assertIsNone(models.plan_delta_upload(self.path, None))
+    self.assertIsNone(
+      models.plan_delta_upload(self.path, dict(remote, block_size=10))
+    )
+    self.path.write_bytes(b'a' * 10 + b'x' * 10 + b'c' * 5)
+    local, blocks = models.plan_delta_upload(self.path, remote)
+    self.assertEqual(local['size'], 25)
+    self.assertEqual(blocks, [(0, self.path.read_bytes())])
+    message = models.delta_upload_message(self.path, local, blocks)
+    self.assertEqual(message.status, 'done')
+    self.assertIn('Sent 1 of 1 blocks (25 bytes)', message.body)
+
+
+class WeatherFixtureServer:
+  """A local HTTP server that serves weather.gov-style XML
+
+  Observations are kept in the `observations` dict by station,
+  and conditional requests are answered using an ETag.
+  """
+
+  xml_template = (
+    '<?xml version="1.0" encoding="ISO-8859-1"?>'
+    '<current_observation version="1.0">'
+    '<credit>NOAA\'s National Weather Service</credit>'
+    '<station_id>{station}</station_id>'
+    '<observation_time_rfc822>{time}</observation_time_rfc822>'
+    '<weather>Fair</weather>'
+    '<temp_c>12.8</temp_c>'
+    '<relative_humidity>80</relative_humidity>'
+    '<pressure_mb>1017.2</pressure_mb>'
+    '</current_observation>'
+  )
+
+  def __init__(self):
+    self.observations = dict()
+    self.requests = list()
+    fixture = self
+
+    class Handler(BaseHTTPRequestHandler):
+
+      def do_GET(self):
+        fixture.requests.append(self.path)
+        station = Path(self.path).stem
+        if station not in fixture.observations:
+          self.send_error(404)
+          return
+        time = fixture.observations[station]
+        etag = f'"{station}-{hash(time)}"'
+        if self.headers.get('If-None-Match') == etag:
+          self.send_response(304)
+          self.end_headers()
+          return
+        body = fixture.xml_template.format(
+          station=station, time=time
+        ).encode('ISO-8859-1')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/xml')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+      def log_message(self, *args):
+        pass
+
+    self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    host, port = self.server.server_address
+    self.base_url = f'http://{host}:{port}/xml/current_obs/{{}}.xml'
+    self.thread = Thread(target=self.server.serve_forever, daemon=True)
+
+  def __enter__(self):
+    self.thread.start()
+    return self
+
+  def __exit__(self, *_):
+    self.server.shutdown()
+    self.server.server_close()
+
+
+class TestWeatherDataModel(TestCase):
+
+  def setUp(self):
+    models.WeatherDataModel.clear_cache()
+    self.fixture = WeatherFixtureServer().__enter__()
+    self.addCleanup(self.fixture.__exit__)
+    self.fixture.observations['KBMG'] = 'Mon, 19 Oct 2026 10:53:00 -0400'
+    self.fixture.observations['KIND'] = 'Mon, 19 Oct 2026 10:54:00 -0400'
+
+  def test_get_weather_data(self):
+    model = models.WeatherDataModel('KBMG', self.fixture.base_url)
+    data = model.get_weather_data()
+    self.assertEqual(data['station_id'], 'KBMG')
+    self.assertEqual(data['temp_c'], '12.8')
+    self.assertEqual(data['weather'], 'Fair')
+    self.assertEqual(
+      data['observation_time_rfc822'], 'Mon, 19 Oct 2026 10:53:00 -0400'
+    )
+
+  def test_conditional_get(self):
+    model = models.WeatherDataModel('KBMG', self.fixture.base_url)
+    # always go to the server
+    model.update_interval = 0
+    self.assertIsNotNone(model.get_weather_data(conditional=True))
+    # unchanged observation is skipped
+    self.assertIsNone(model.get_weather_data(conditional=True))
+    self.fixture.observations['KBMG'] = 'Mon, 19 Oct 2026 11:53:00 -0400'
+    data = model.get_weather_data(conditional=True)
+    self.assertEqual(
+      data['observation_time_rfc822'], 'Mon, 19 Oct 2026 11:53:00 -0400'
+    )
+
+  def test_cache(self):
+    model1 = models.WeatherDataModel('KBMG', self.fixture.base_url)
+    model2 = models.WeatherDataModel('KBMG', self.fixture.base_url)
+    data1 = model1.get_weather_data()
+    data2 = model2.get_weather_data()
+    self.assertEqual(data1, data2)
+    # the second request was served from the cache
+    self.assertEqual(len(self.fixture.requests), 1)
+
+    model2.update_interval = 0
+    model2.get_weather_data()
+    self.assertEqual(len(self.fixture.requests), 2)
+
+    # an explicit request goes to the station anyway
+    model1.get_weather_data(force=True)
+    self.assertEqual(len(self.fixture.requests), 3)
+
+  def test_forced_collect(self):
+    sink = mock.Mock()
+    queue = Queue()
+    collector = models.WeatherCollector(
+      ['KBMG'], 60, sink, queue, self.fixture.base_url
+    )
+    collector.collect()
+    queue.get()
+    self.fixture.observations['KBMG'] = 'Mon, 19 Oct 2026 11:53:00 -0400'
+
+    # the periodic poll is answered from the cache
+    sink.reset_mock()
+    collector.collect()
+    sink.assert_not_called()
+    self.assertTrue(queue.empty())
+
+    # "Update Weather Data" asks the station
+    collector.collect(force=True)
+    rows = sink.call_args[0][0]
+    self.assertEqual(
+      rows[0]['observation_time_rfc822'], 'Mon, 19 Oct 2026 11:53:00 -0400'
+    )
+    queue.get()
+    collector.collect(force=True)
+    self.assertEqual(queue.get().subject, 'Weather data is up to date')
+
+  def test_collector_batches_new_observations(self):
+    sink = mock.Mock()
+    queue = Queue()
+    collector = models.WeatherCollector(
+      ['KBMG', 'KIND', 'NOPE'], 60, sink, queue, self.fixture.base_url
+    )
+    collector.collect()
+    sink.assert_called_once()
+    rows = sink.call_args[0][0]
+    self.assertEqual([row['station_id'] for row in rows], ['KBMG', 'KIND'])
+    # the missing station is reported but doesn't stop the batch
+    self.assertEqual(queue.get().status, 'warning')
+
+    sink.reset_mock()
+    collector.collect()
+    sink.assert_not_called()
+
+  @skipUnless(network.available, 'aiohttp is not installed')
+  def test_collector_on_async_loop(self):
+    loop = network.AsyncLoop()
+    loop.start()
+    self.addCleanup(loop.stop)
+    sink = mock.Mock()
+    collector = models.WeatherCollector(
+      ['KBMG', 'KIND'], 60, sink, Queue(), self.fixture.base_url, loop
+    )
+    collector.collect()
+    rows = sink.call_args[0][0]
+    self.assertEqual([row['station_id'] for row in rows], ['KBMG', 'KIND'])
+    self.assertEqual(rows[1]['temp_c'], '12.8')
+
+
+class FileFixtureServer:
+  """A local HTTP server for resumable downloads
+
+  Serves `body` with `etag`, honouring Range and If-Range.  The first
+  `drops` responses are cut off after `drop_after` bytes, and the
+  headers of every request are kept in `requests`.
+  """
+
+  def __init__(self, body, etag='"v1"'):
+    self.body = body
+    self.etag = etag
+    self.drops = 0
+    self.drop_after = 0
+    self.requests = list()
+    fixture = self
+
+    class Handler(BaseHTTPRequestHandler):
+      protocol_version = 'HTTP/1.1'
+
+      def do_GET(self):
+        fixture.requests.append(dict(self.headers))
+        body, start = fixture.body, 0
+        byte_range = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        if byte_range and if_range in (None, fixture.etag):
+          start = int(byte_range[len('bytes='):].rstrip('-'))
+          if start >= len(body):
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{len(body)}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+          self.send_response(206)
+          self.send_header(
+            'Content-Range', f'bytes {start}-{len(body) - 1}/{len(body)}'
+          )
+        else:
+          self.send_response(200)
+        self.send_header('Content-Length', str(len(body) - start))
+        self.send_header('ETag', fixture.etag)
+        self.end_headers()
+        if fixture.drops:
+          fixture.drops -= 1
+          self.wfile.write(body[start:start + fixture.drop_after])
+          self.wfile.flush()
+          # let the client read the partial body before the drop
+          sleep(0.1)
+          self.close_connection = True
+          return
+        self.wfile.write(body[start:])
+
+      def log_message(self, *args):
+        pass
+
+    self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    host, port = self.server.server_address
+    self.base_url = f'http://{host}:{port}'
+    self.thread = Thread(target=self.server.serve_forever, daemon=True)
+
+  def __enter__(self):
+    self.thread.start()
+    return self
+
+  def __exit__(self, *_):
+    self.server.shutdown()
+    self.server.server_close()
+
+
+class TestResumableDownload(TestCase):
+
+  chunk = models.ResumableDownload.chunk_size
+  body = bytes(range(256)) * 1024
+
+  def setUp(self):
+    self.fixture = FileFixtureServer(self.body).__enter__()
+    self.addCleanup(self.fixture.__exit__)
+    tmpdir = TemporaryDirectory()
+    self.addCleanup(tmpdir.cleanup)
+    self.path = Path(tmpdir.name) / 'extract.csv'
+    self.part_path = Path(tmpdir.name) / 'extract.csv.part'
+    self.queue = Queue()
+    patcher = mock.patch.object(models.ResumableDownload, 'retry_delay', 0)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+
+  def download(self):
+    downloader = models.ThreadedDownloader(
+      'cookie', f'{self.fixture.base_url}/files/extract.csv',
+      self.path, self.queue
+    )
+    downloader.start()
+    downloader.join()
+    messages = [self.queue.get_nowait() for _ in range(self.queue.qsize())]
+    return messages[-1]
+
+  def test_resume_after_drop(self):
+    self.fixture.drops = 1
+    self.fixture.drop_after = self.chunk
+    self.assertEqual(self.download().status, 'done')
+    self.assertEqual(self.path.read_bytes(), self.body)
+    self.assertFalse(self.part_path.exists())
+
+    first, second = self.fixture.requests
+    self.assertNotIn('Range', first)
+    self.assertEqual(second['Range'], f'bytes={self.chunk}-')
+    self.assertEqual(second['If-Range'], '"v1"')
+
+  def test_changed_file_starts_over(self):
+    self.fixture.drops = 1
+    self.fixture.drop_after = self.chunk
+
+    def change(*_):
+      self.fixture.body = b'new' * 1000
+      self.fixture.etag = '"v2"'
+      return 0
+    with mock.patch.object(models.ResumableDownload, 'backoff', change):
+      self.assertEqual(self.download().status, 'done')
+    self.assertEqual(self.path.read_bytes(), b'new' * 1000)
+
+  def test_failure_keeps_part_for_next_download(self):
+    self.fixture.drops = 2
+    self.fixture.drop_after = self.chunk
+    with mock.patch.object(models.ResumableDownload, 'max_attempts', 2):
+      message = self.download()
+    self.assertEqual(message.status, 'error')
+    self.assertIn('downloading again will resume', message.body)
+    self.assertFalse(self.path.exists())
+    kept = self.part_path.stat().st_size
+    self.assertEqual(kept, 2 * self.chunk)
+
+    self.fixture.requests.clear()
+    self.assertEqual(self.download().status, 'done')
+    self.assertEqual(self.path.read_bytes(), self.body)
+    self.assertEqual(self.fixture.requests[0]['Range'], f'bytes={kept}-')
+    self.assertFalse(self.part_path.exists())
+
+  def test_complete_part_is_not_an_error(self):
+    # a resume request for a file we already have gets a 416
+    self.part_path.write_bytes(self.body)
+    Path(f'{self.part_path}.etag').write_text('"v1"')
+    self.assertEqual(self.download().status, 'done')
+    self.assertEqual(self.path.read_bytes(), self.body)
+    self.assertEqual(len(self.fixture.requests), 1)
+
+  def test_unwritable_destination(self):
+    self.path = self.path.parent / 'missing' / 'extract.csv'
+    message = self.download()
+    self.assertEqual(message.status, 'error')
+    self.assertEqual(message.subject, 'Download Error')
+    self.assertIn('No such file or directory', message.body)
+    self.assertEqual(self.fixture.requests, [])
+
+  def test_backoff(self):
+    download = models.ResumableDownload('url', self.path, self.queue)
+    download.retry_delay = 1
+    delays = [download.backoff(n) for n in download.attempts()]
+    self.assertEqual(delays, [1, 2, 4, 8, 0])
+
+  @skipUnless(network.available, 'aiohttp is not installed')
+  def test_async_resume_after_drop(self):
+    loop = network.AsyncLoop()
+    loop.start()
+    self.addCleanup(loop.stop)
+    self.fixture.drops = 1
+    self.fixture.drop_after = self.chunk
+    rest = models.CorporateRestModel(
+      self.fixture.base_url, loop=loop, queue=self.queue
+    )
+    loop.submit(rest.async_download_file('extract.csv', self.path)).result()
+    self.assertEqual(self.path.read_bytes(), self.body)
+    self.assertEqual(len(self.fixture.requests), 2)
+    self.assertIn('Range', self.fixture.requests[1])
@@ -0,0 +1,28 @@
+import subprocess
+import sys
+from pathlib import Path
+from unittest import TestCase
+
+
+class TestStartupImports(TestCase):
+  """Guard the cold-start imports of the application"""
+
+  deferred_modules = (
+    'matplotlib', 'paramiko', 'requests', 'psycopg2', 'aiohttp'
+  )
+
+  @classmethod
+  def setUpClass(cls):
+    # a fresh interpreter, so nothing imported by other tests counts
+    result = subprocess.run(
+      [sys.executable, '-c',
+       'import sys, abq_data_entry.application; print(*sys.modules)'],
+      cwd=Path(__file__).parents[2],
+      capture_output=True, text=True, check=True
+    )
+    cls.imported = set(result.stdout.split())
+
+  def test_heavy_modules_are_deferred(self):
+    self.assertIn('abq_data_entry.application', self.imported)
+    for module in self.deferred_modules:
+      self.assertNotIn(module, self.imported)
@@ -0,0 +1,55 @@
+from .. import styles
+from .test_widgets import TkTestCase
+from unittest.mock import patch
+from tkinter import ttk
+
+
+class TestStyleRegistry(TkTestCase):
+
+  def setUp(self):
+    self.registry = styles.get_style_registry(self.root)
+    self.style = ttk.Style(self.root)
+
+  def test_one_registry_per_interpreter(self):
+    label = ttk.Label(self.root)
+    self.assertIs(styles.get_style_registry(label), self.registry)
+
+  def test_define(self):
+    self.registry.define({
+      'Test.TLabel': {'configure': {'foreground': 'darkred'}},
+      'Test.TEntry': {
+        'map': {'fieldbackground': [('invalid', 'darkred')]}
+      }
+    })
+    self.assertEqual(
+      self.style.lookup('Test.TLabel', 'foreground'), 'darkred'
+    )
+    self.assertEqual(
+      self.style.lookup(
+        'Test.TEntry', 'fieldbackground', state=['invalid']
+      ),
+      'darkred'
+    )
+
+  def test_define_once(self):
+    with patch.object(self.registry, '_apply') as apply:
+      self.registry.define_style(
+        'Once.TLabel', configure={'foreground': 'blue'}
+      )
+      self.registry.define_style(
+        'Once.TLabel', configure={'foreground': 'blue'}
+      )
+    apply.assert_called_once()
+
+  def test_theme_change(self):
+    self.registry.define_style(
+      'Theme.TLabel', configure={'foreground': 'darkgreen'}
+    )
+    current = self.style.theme_use()
+    other = next(t for t in self.style.theme_names() if t != current)
+    self.style.theme_use(other)
+    self.root.update()
+    self.assertEqual(
+      self.style.lookup('Theme.TLabel', 'foreground'), 'darkgreen'
+    )
+    self.style.theme_use(current)
@@ -0,0 +1,111 @@
+from .. import validation
+from .. import models
+from ..constants import FieldTypes as FT
+from unittest import TestCase
+from datetime import date
+
+
+class TestCompileField(TestCase):
+
+  def test_required(self):
+    check = validation.compile_field({'req': True, 'type': FT.string})
+    self.assertEqual(check(''), 'A value is required')
+    self.assertEqual(check(None), 'A value is required')
+    self.assertEqual(check('AX477'), '')
+
+    check = validation.compile_field({'req': False, 'type': FT.string})
+    self.assertEqual(check(''), '')
+
+  def test_date(self):
+    check = validation.compile_field(
+      {'req': True, 'type': FT.iso_date_string}
+    )
+    self.assertEqual(check('2021-06-01'), '')
+    self.assertEqual(check(date(2021, 6, 1)), '')
+    self.assertEqual(check('2021-13-01'), 'Invalid date')
+    self.assertEqual(check('06/01/2021'), 'Invalid date')
+
+  def test_number(self):
+    check = validation.compile_field(
+      {'req': True, 'type': FT.decimal, 'min': 0.5, 'max': 52.0, 'inc': .01}
+    )
+    self.assertEqual(check('24.09'), '')
+    self.assertEqual(check(24.09), '')
+    self.assertEqual(check('0.4'), 'Value is too low (min 0.5)')
+    self.assertEqual(check('52.01'), 'Value is too high (max 52.0)')
+    self.assertEqual(check('abc'), 'Invalid number string: abc')
+    self.assertEqual(
+      check('1.001'),
+      'Value has too many decimal places (increment 0.01)'
+    )
+
+    check = validation.compile_field(
+      {'req': True, 'type': FT.integer, 'min': 0, 'max': 20}
+    )
+    self.assertEqual(check('20'), '')
+    self.assertEqual(check(9), '')
+    self.assertTrue(check('1.5'))
+    self.assertTrue(check('21'))
+
+  def test_choices(self):
+    check = validation.compile_field(
+      {'req': True, 'type': FT.string_list, 'values': ['8:00', '12:00']}
+    )
+    self.assertEqual(check('8:00'), '')
+    self.assertEqual(check('9:00'), 'Invalid choice: 9:00')
+
+    # an empty values list allows anything
+    check = validation.compile_field(
+      {'req': True, 'type': FT.string_list, 'values': []}
+    )
+    self.assertEqual(check('9:00'), '')
+
+  def test_boolean(self):
+    check = validation.compile_field({'req': False, 'type': FT.boolean})
+    self.assertEqual(check(True), '')
+    self.assertEqual(check('False'), '')
+    self.assertEqual(check('maybe'), 'Invalid boolean: maybe')
+
+
+class TestRecordValidator(TestCase):
+
+  record = {
+    'Date': '2021-06-01', 'Time': '8:00', 'Technician': 'J Simms',
+    'Lab': 'A', 'Plot': '2', 'Seed Sample': 'AX478',
+    'Humidity': '24.47', 'Light': '1.01', 'Temperature': '21.44',
+    'Equipment Fault': 'False', 'Plants': '14', 'Blossoms': '27',
+    'Fruit': '1', 'Min Height': '2.35', 'Max Height': '9.2',
+    'Med Height': '5.09', 'Notes': ''
+  }
+
+  def setUp(self):
+    self.validator = validation.RecordValidator(models.CSVModel.fields)
+
+  def test_validate(self):
+    self.assertEqual(self.validator.validate(self.record), {})
+    record = dict(self.record, Lab='D', Plants='21')
+    self.assertEqual(
+      self.validator.validate(record),
+      {'Lab': 'Invalid choice: D', 'Plants': 'Value is too high (max 20)'}
+    )
+
+  def test_validate_records(self):
+    records = [self.record] * 5
+    records[1] = dict(self.record, Humidity='')
+    records[3] = dict(self.record, Humidity='99', Date='2021-02-30')
+    errors = self.validator.validate_records(records)
+    self.assertEqual(errors, {
+      'Humidity': {
+        1: 'A value is required', 3: 'Value is too high (max 52.0)'
+      },
+      'Date': {3: 'Invalid date'}
+    })
+
+  def test_validate_columns_missing_field(self):
+    columns = {
+      name: [value] * 3 for name, value in self.record.items()
+      if name != 'Seed Sample'
+    }
+    errors = self.validator.validate_columns(columns)
+    self.assertEqual(list(errors), ['Seed Sample'])
+    self.assertEqual(len(errors['Seed Sample']), 3)
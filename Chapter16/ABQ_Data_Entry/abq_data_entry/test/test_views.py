@@ -0,0 +1,109 @@
+from .. import views
+from .. import models
+from .test_widgets import TkTestCase
+from unittest.mock import Mock
+import tkinter as tk
+
+
+class ViewTestCase(TkTestCase):
+  """Builds views against a mock model with fixed lookup values"""
+
+  def setUp(self):
+    self.model = Mock()
+    self.model.fields = {
+      name: dict(spec) for name, spec in models.SQLModel.fields.items()
+    }
+    self.model.fields['Technician']['values'] = ['J Simms', 'P Stevens']
+    self.model.fields['Lab']['values'] = ['A', 'B']
+    self.model.fields['Plot']['values'] = [str(n) for n in range(1, 21)]
+    self.model.get_lab_check.return_value = dict()
+    self.model.get_current_seed_sample.return_value = ''
+    self.settings = {
+      'autofill date': tk.BooleanVar(self.root, False),
+      'autofill sheet data': tk.BooleanVar(self.root, False)
+    }
+
+
+class TestDataRecordForm(ViewTestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.form = views.DataRecordForm(self.root, self.model, self.settings)
+    self.root.update()
+
+  def tearDown(self):
+    self.form.destroy()
+
+  def test_reenabled_fields_are_validated_again(self):
+    fault = self.form._vars['Equipment Fault']
+    environment = ('Humidity', 'Light', 'Temperature')
+
+    fault.set(True)
+    errors = self.form.get_errors()
+    for key in environment:
+      self.assertNotIn(key, errors)
+
+    # unchecking the fault only changes the fields' state,
+    # but the empty required fields must be reported again
+    fault.set(False)
+    errors = self.form.get_errors()
+    for key in environment:
+      self.assertIn(key, errors)
+
+
+class TestBatchEntryGrid(ViewTestCase):
+
+  heights = ('Min Height', 'Med Height', 'Max Height')
+
+  def setUp(self):
+    super().setUp()
+    self.grid = views.BatchEntryGrid(self.root, self.model, self.settings)
+    sheet = {
+      'Date': '2021-06-01', 'Time': '8:00', 'Lab': 'A',
+      'Technician': 'J Simms'
+    }
+    for key, value in sheet.items():
+      self.grid._sheet_vars[key].set(value)
+    self.root.update()
+
+  def tearDown(self):
+    self.grid.destroy()
+
+  def fill_row(self, index, min_height, med_height, max_height):
+    row = self.grid._rows[index]
+    values = {
+      'Seed Sample': 'AX477', 'Humidity': '24.09', 'Light': '1.03',
+      'Temperature': '22.01', 'Plants': '9', 'Blossoms': '21', 'Fruit': '3',
+      'Min Height': min_height, 'Med Height': med_height,
+      'Max Height': max_height
+    }
+    for key, value in values.items():
+      row[key].set(value)
+
+  def test_heights_in_order(self):
+    self.fill_row(0, '1.67', '2.73', '8.7')
+    self.fill_row(1, '2', '2', '2')
+    self.assertEqual(self.grid.get_errors(), dict())
+
+  def test_median_outside_min_and_max(self):
+    self.fill_row(0, '1.67', '9.5', '8.7')
+    self.fill_row(1, '3.1', '2.73', '8.7')
+    self.fill_row(2, '1.67', '2.73', '8.7')
+    errors = self.grid.get_errors()
+    self.assertEqual(
+      set(errors), {('1', 'Med Height'), ('2', 'Med Height')}
+    )
+    self.assertTrue(self.grid._cells[0]['Med Height'].instate(['invalid']))
+    self.assertFalse(self.grid._cells[2]['Med Height'].instate(['invalid']))
+
+  def test_invalid_height_skips_order_check(self):
+    self.fill_row(0, 'abc', '2.73', '8.7')
+    errors = self.grid.get_errors()
+    self.assertIn(('1', 'Min Height'), errors)
+    self.assertNotIn(('1', 'Med Height'), errors)
+
+  def test_blank_rows_are_skipped(self):
+    self.fill_row(3, '1.67', '2.73', '8.7')
+    self.assertEqual(self.grid.get_errors(), dict())
+    records = self.grid.get()
+    self.assertEqual([r['Plot'] for r in records], ['4'])
@@ -1,6 +1,6 @@
 from .. import widgets
 from unittest import TestCase
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 import tkinter as tk
 from tkinter import ttk
 
@@ -111,6 +111,40 @@ class TestValidatedMixin(TkTestCase):
     fake_focusout_val.assert_called_with(event='focusout')
     fake_focusout_invalid.assert_called_with(event='focusout')
 
+  def test_validated_event(self):
+    handler = Mock()
+    self.vw1.bind('<<Validated>>', handler)
+    self.vw1._validate('a', '', 'a', 'key', '0', '1')
+    handler.assert_not_called()
+    self.vw1.trigger_focusout_validation()
+    handler.assert_called_once()
+
+  def test_state_changed_event(self):
+    handler = Mock()
+    self.vw1.bind('<<StateChanged>>', handler)
+    self.vw1.configure(width=10)
+    handler.assert_not_called()
+    self.vw1.configure(state=tk.DISABLED)
+    self.vw1.configure(state=tk.NORMAL)
+    self.assertEqual(handler.call_count, 2)
+
+  def test_ttk_state_changes(self):
+    handler = Mock()
+    self.vw1.bind('<<StateChanged>>', handler)
+    self.vw1._key_validate = Mock(return_value=False)
+
+    self.vw1.state(['disabled'])
+    self.assertTrue(self.vw1._disabled)
+    self.assertTrue(self.vw1._validate('a', '', 'a', 'key', '0', '1'))
+    self.vw1._key_validate.assert_not_called()
+
+    self.vw1.state(['invalid'])
+    self.assertTrue(self.vw1._disabled)
+    self.vw1.state(['!disabled'])
+    self.assertFalse(self.vw1._disabled)
+    self.assertFalse(self.vw1._validate('a', '', 'a', 'key', '0', '1'))
+    self.assertEqual(handler.call_count, 2)
+
 
 class TestValidatedSpinbox(TkTestCase):
 
@@ -167,6 +201,19 @@ class TestValidatedSpinbox(TkTestCase):
     valid = self.key_validate('0', '10')
     self.assertFalse(valid)
 
+  def test__key_validate_uses_cached_options(self):
+    with patch.object(self.vsb, 'cget') as cget:
+      self.assertTrue(self.vsb._validate('5', '', '5', 'key', '0', '1'))
+      self.assertFalse(self.vsb._validate('50', '5', '0', 'key', '1', '1'))
+    cget.assert_not_called()
+
+    # reconfiguring the bounds refreshes the cache
+    self.vsb.configure(to=100)
+    self.assertTrue(self.vsb._key_validate('0', '1', '5', '50', '1'))
+    self.vsb.configure(state=tk.DISABLED)
+    self.assertTrue(self.vsb._validate('a', '', 'a', 'key', '0', '1'))
+    self.vsb.configure(state=tk.NORMAL)
+
   def test__key_validate_integration(self):
     ##########################
     # Integration test style #
@@ -0,0 +1,160 @@
+"""Validation of records against the models' field specs
+
+The rules in a model's `fields` dict (req, min, max, inc, values)
+are compiled into one check function per field.  A check takes a
+value and returns an error message, or an empty string if the value
+is valid.  None of this needs Tk, so bulk imports and API callers can
+validate records without a display; the input widgets use the same
+checks for their focus-out validation.
+
+RecordValidator.validate_columns() checks many records a column at a
+time.  Field values in a batch repeat a great deal, so each distinct
+value in a column is checked only once.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from .constants import FieldTypes as FT
+
+
+def _is_empty(value):
+  return value is None or value == ''
+
+
+def _check_date(value):
+  if isinstance(value, date):
+    return ''
+  try:
+    datetime.strptime(value, '%Y-%m-%d')
+  except (TypeError, ValueError):
+    return 'Invalid date'
+  return ''
+
+
+def _compile_choice(values):
+  choices = frozenset(str(value) for value in values)
+
+  def check(value):
+    if str(value) not in choices:
+      return f'Invalid choice: {value}'
+    return ''
+  return check
+
+
+def _compile_number(field_type, min_val, max_val, inc):
+  min_val = None if min_val is None else Decimal(str(min_val))
+  max_val = None if max_val is None else Decimal(str(max_val))
+  if inc is None:
+    precision = 0 if field_type == FT.integer else None
+  else:
+    precision = Decimal(str(inc)).normalize().as_tuple().exponent
+
+  def check(value):
+    try:
+      d_value = Decimal(str(value))
+    except InvalidOperation:
+      return f'Invalid number string: {value}'
+    if not d_value.is_finite():
+      return f'Invalid number string: {value}'
+    if min_val is not None and d_value < min_val:
+      return f'Value is too low (min {min_val})'
+    if max_val is not None and d_value > max_val:
+      return f'Value is too high (max {max_val})'
+    if (
+      precision is not None
+      and d_value.normalize().as_tuple().exponent < precision
+    ):
+      return f'Value has too many decimal places (increment {inc})'
+    return ''
+  return check
+
+
+_booleans = frozenset((True, False, 'True', 'False', 'true', 'false'))
+
+
+def _check_boolean(value):
+  if value not in _booleans:
+    return f'Invalid boolean: {value}'
+  return ''
+
+
+def compile_field(spec):
+  """Compile a field spec into a check function"""
+  field_type = spec.get('type', FT.string)
+  required = spec.get('req', False)
+
+  if field_type == FT.iso_date_string:
+    check_value = _check_date
+  elif field_type in (FT.decimal, FT.integer):
+    check_value = _compile_number(
+      field_type, spec.get('min'), spec.get('max'), spec.get('inc')
+    )
+  elif field_type == FT.boolean:
+    check_value = _check_boolean
+  elif spec.get('values'):
+    check_value = _compile_choice(spec['values'])
+  else:
+    check_value = None
+
+  def check(value):
+    if _is_empty(value):
+      return 'A value is required' if required else ''
+    return check_value(value) if check_value else ''
+  return check
+
+
+class RecordValidator:
+  """Validates records against a model's fields"""
+
+  def __init__(self, fields):
+    self.checks = {
+      name: compile_field(spec) for name, spec in fields.items()
+    }
+
+  def validate(self, record):
+    """Return a dict of field names to error messages for one record"""
+    errors = dict()
+    for name, check in self.checks.items():
+      error = check(record.get(name))
+      if error:
+        errors[name] = error
+    return errors
+
+  def validate_columns(self, columns):
+    """Validate many records stored as columns
+
+    columns maps field names to equal-length sequences of values;
+    a field missing from columns is treated as empty in every row.
+    Returns a dict of field names to {row index: error message},
+    holding only the fields that had errors.
+    """
+    length = max((len(column) for column in columns.values()), default=0)
+    errors = dict()
+    for name, check in self.checks.items():
+      column = columns.get(name)
+      if column is None:
+        error = check(None)
+        if error:
+          errors[name] = dict.fromkeys(range(length), error)
+        continue
+      bad_values = dict()
+      for value in set(column):
+        error = check(value)
+        if error:
+          bad_values[value] = error
+      if bad_values:
+        errors[name] = {
+          index: bad_values[value]
+          for index, value in enumerate(column)
+          if value in bad_values
+        }
+    return errors
+
+  def validate_records(self, records):
+    """Validate a sequence of record dicts column by column"""
+    columns = {
+      name: [record.get(name) for record in records]
+      for name in self.checks
+    }
+    return self.validate_columns(columns)
@@ -1,19 +1,36 @@
 import tkinter as tk
 from tkinter import ttk
+from tkinter import messagebox
 from tkinter.simpledialog import Dialog
 from datetime import datetime
 from . import widgets as w
+from . import validation
 from .constants import FieldTypes as FT
+from .styles import get_style_registry
 from . import images
 
-# new ch15
-import matplotlib
-matplotlib.use('TkAgg')
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import (
-  FigureCanvasTkAgg,
-  NavigationToolbar2Tk
-)
+
+def populate_tech_for_lab_check(model, settings, variables):
+  """Set the Technician variable from the lab check in `variables`
+
+  Shared by the record form and the batch grid, which both keep
+  Date, Time, Lab and Technician variables for the lab check.
+  """
+  if not settings['autofill sheet data'].get():
+    return
+  date = variables['Date'].get()
+  try:
+    datetime.fromisoformat(date)
+  except ValueError:
+    return
+  time = variables['Time'].get()
+  lab = variables['Lab'].get()
+
+  if all([date, time, lab]):
+    check = model.get_lab_check(date, time, lab)
+    tech = check['lab_tech'] if check else ''
+    variables['Technician'].set(tech)
+
 
 class DataRecordForm(tk.Frame):
   """The input form for our widgets"""
@@ -29,6 +46,37 @@ class DataRecordForm(tk.Frame):
     FT.boolean: tk.BooleanVar
   }
 
+  # Frame, label and button styles for the form sections
+  styles = {
+    'RecordInfo.TLabelframe': {
+      'configure': {'background': 'khaki', 'padx': 10, 'pady': 10}
+    },
+    'EnvironmentInfo.TLabelframe': {
+      'configure': {'background': 'lightblue', 'padx': 10, 'pady': 10}
+    },
+    'PlantInfo.TLabelframe': {
+      'configure': {'background': 'lightgreen', 'padx': 10, 'pady': 10}
+    },
+    # Style the label Element as well
+    'RecordInfo.TLabelframe.Label': {
+      'configure': {'background': 'khaki', 'padx': 10, 'pady': 10}
+    },
+    'EnvironmentInfo.TLabelframe.Label': {
+      'configure': {'background': 'lightblue', 'padx': 10, 'pady': 10}
+    },
+    'PlantInfo.TLabelframe.Label': {
+      'configure': {'background': 'lightgreen', 'padx': 10, 'pady': 10}
+    },
+    # Style for the form labels and buttons
+    'RecordInfo.TLabel': {'configure': {'background': 'khaki'}},
+    'RecordInfo.TRadiobutton': {'configure': {'background': 'khaki'}},
+    'EnvironmentInfo.TLabel': {'configure': {'background': 'lightblue'}},
+    'EnvironmentInfo.TCheckbutton': {
+      'configure': {'background': 'lightblue'}
+    },
+    'PlantInfo.TLabel': {'configure': {'background': 'lightgreen'}},
+  }
+
   def _add_frame(self, label, style='', cols=3):
     """Add a labelframe to the form"""
 
@@ -48,45 +96,7 @@ class DataRecordForm(tk.Frame):
     fields = self.model.fields
 
     # new for ch9
-    style = ttk.Style()
-
-    # Frame styles
-    style.configure(
-      'RecordInfo.TLabelframe',
-      background='khaki', padx=10, pady=10
-    )
-    style.configure(
-      'EnvironmentInfo.TLabelframe', background='lightblue',
-      padx=10, pady=10
-    )
-    style.configure(
-      'PlantInfo.TLabelframe',
-      background='lightgreen', padx=10, pady=10
-    )
-    # Style the label Element as well
-    style.configure(
-      'RecordInfo.TLabelframe.Label', background='khaki',
-      padx=10, pady=10
-    )
-    style.configure(
-      'EnvironmentInfo.TLabelframe.Label',
-      background='lightblue', padx=10, pady=10
-    )
-    style.configure(
-      'PlantInfo.TLabelframe.Label',
-      background='lightgreen', padx=10, pady=10
-    )
-
-    # Style for the form labels and buttons
-    style.configure('RecordInfo.TLabel', background='khaki')
-    style.configure('RecordInfo.TRadiobutton', background='khaki')
-    style.configure('EnvironmentInfo.TLabel', background='lightblue')
-    style.configure(
-      'EnvironmentInfo.TCheckbutton',
-      background='lightblue'
-    )
-    style.configure('PlantInfo.TLabel', background='lightgreen')
-
+    get_style_registry(self).define(self.styles)
 
     # Create a dict to keep track of input widgets
     self._vars = {
@@ -278,6 +288,19 @@ class DataRecordForm(tk.Frame):
       self._vars[field].trace_add(
         'write', self._populate_tech_for_lab_check)
 
+    # Track the fields changed since they were last validated,
+    # and the errors found when they were
+    self._errors = dict()
+    self._dirty = set()
+    for key, var in self._vars.items():
+      inp = var.label_widget.input
+      if not hasattr(inp, 'trigger_focusout_validation'):
+        continue
+      self._dirty.add(key)
+      var.trace_add('write', lambda *_, key=key: self._dirty.add(key))
+      inp.bind('<<Validated>>', lambda _, key=key: self._on_validated(key))
+      inp.bind('<<StateChanged>>', lambda _, key=key: self._dirty.add(key))
+
     # default the form
     self.reset()
 
@@ -347,20 +370,27 @@ class DataRecordForm(tk.Frame):
       self._vars['Plot'].set(plot_values[next_plot_index])
       self._vars['Seed Sample'].label_widget.input.focus()
 
+  def _on_validated(self, key):
+    """Cache the error message of a field that was just validated"""
+    self._dirty.discard(key)
+    error = self._vars[key].label_widget.error.get()
+    if error:
+      self._errors[key] = error
+    else:
+      self._errors.pop(key, None)
+
   def get_errors(self):
-    """Get a list of field errors in the form"""
+    """Get a list of field errors in the form
 
-    errors = dict()
-    for key, var in self._vars.items():
-      inp = var.label_widget.input
-      error = var.label_widget.error
+    Only fields changed since they were last validated are validated
+    again; the rest keep their cached errors.
+    """
 
-      if hasattr(inp, 'trigger_focusout_validation'):
-        inp.trigger_focusout_validation()
-      if error.get():
-        errors[key] = error.get()
+    for key in list(self._dirty):
+      self._vars[key].label_widget.input.trigger_focusout_validation()
+      self._on_validated(key)
 
-    return errors
+    return dict(self._errors)
 
   # rewrite for ch12
   def load_record(self, rowkey, data=None):
@@ -395,20 +425,234 @@ class DataRecordForm(tk.Frame):
 
   def _populate_tech_for_lab_check(self, *_):
     """Populate technician based on the current lab check"""
+    populate_tech_for_lab_check(self.model, self.settings, self._vars)
+
+
+class BatchEntryGrid(tk.Frame):
+  """A grid for entering every plot of one lab check at once"""
+
+  # Fields shared by every row, since they make up the lab check
+  sheet_fields = ('Date', 'Time', 'Lab', 'Technician')
+
+  # The per-plot columns and their widths in characters
+  columns = {
+    'Seed Sample': 8,
+    'Equipment Fault': 0,
+    'Humidity': 7,
+    'Light': 7,
+    'Temperature': 7,
+    'Plants': 5,
+    'Blossoms': 5,
+    'Fruit': 5,
+    'Min Height': 7,
+    'Max Height': 7,
+    'Med Height': 7,
+    'Notes': 30
+  }
+
+  # Columns left empty when the environment sensors failed
+  fault_fields = ('Humidity', 'Light', 'Temperature')
+
+  # A row with none of these filled in is skipped
+  data_fields = (
+    'Humidity', 'Light', 'Temperature', 'Plants', 'Blossoms', 'Fruit',
+    'Min Height', 'Max Height', 'Med Height'
+  )
+
+  styles = {
+    'BatchCell.TEntry': {
+      'map': {
+        'foreground': [('invalid', 'white'), ('!invalid', 'black')],
+        'fieldbackground': [('invalid', 'darkred'), ('!invalid', 'white')]
+      }
+    }
+  }
+
+  def __init__(self, parent, model, settings, *args, **kwargs):
+    super().__init__(parent, *args, **kwargs)
+    self.model = model
+    self.settings = settings
+    fields = self.model.fields
+    self.checks = validation.RecordValidator(fields).checks
+    get_style_registry(self).define(self.styles)
+    self.columnconfigure(0, weight=1)
+
+    # The lab check
+    sheet = ttk.LabelFrame(self, text='Lab Check')
+    sheet.grid(row=0, sticky=tk.W + tk.E, padx=10)
+    self._sheet_vars = dict()
+    for column, key in enumerate(self.sheet_fields):
+      self._sheet_vars[key] = tk.StringVar()
+      w.LabelInput(
+        sheet, key, field_spec=fields[key], var=self._sheet_vars[key]
+      ).grid(row=0, column=column)
+      sheet.columnconfigure(column, weight=1)
+
+    # The plot rows
+    table = ttk.Frame(self)
+    table.grid(row=1, sticky=tk.W + tk.E, padx=10, pady=10)
+    ttk.Label(table, text='Plot').grid(row=0, column=0)
+    for column, key in enumerate(self.columns, start=1):
+      ttk.Label(table, text=key).grid(row=0, column=column)
+    table.columnconfigure(len(self.columns), weight=1)
+
+    self.plots = [str(plot) for plot in fields['Plot']['values']]
+    self._rows = list()
+    self._cells = list()
+    for row, plot in enumerate(self.plots, start=1):
+      ttk.Label(table, text=plot).grid(row=row, column=0)
+      row_vars = dict()
+      row_cells = dict()
+      for column, (key, width) in enumerate(self.columns.items(), start=1):
+        if fields[key]['type'] == FT.boolean:
+          var = tk.BooleanVar()
+          cell = ttk.Checkbutton(table, variable=var)
+          var.trace_add(
+            'write', lambda *_, index=row - 1: self._check_fault(index)
+          )
+        else:
+          var = tk.StringVar()
+          cell = ttk.Entry(
+            table, textvariable=var, width=width, style='BatchCell.TEntry'
+          )
+          cell.bind(
+            '<FocusOut>',
+            lambda _, index=row - 1, key=key: self._check_cell(index, key)
+          )
+        cell.grid(row=row, column=column, sticky=tk.W + tk.E)
+        row_vars[key] = var
+        row_cells[key] = cell
+      self._rows.append(row_vars)
+      self._cells.append(row_cells)
+
+    # The error display and buttons
+    self.error = tk.StringVar()
+    ttk.Label(self, textvariable=self.error, foreground='darkred').grid(
+      row=2, sticky=tk.W + tk.E, padx=10
+    )
+    buttons = tk.Frame(self)
+    buttons.grid(sticky=tk.W + tk.E, row=3)
+    ttk.Button(buttons, text='Save All', command=self._on_save).pack(
+      side=tk.RIGHT
+    )
+    ttk.Button(buttons, text='Reset', command=self.reset).pack(
+      side=tk.RIGHT
+    )
+
+    self._sheet_vars['Lab'].trace_add('write', self._populate_seed_samples)
+    for key in ('Date', 'Time', 'Lab'):
+      self._sheet_vars[key].trace_add(
+        'write', self._populate_tech_for_lab_check
+      )
+
+    self.reset()
+
+  def _on_save(self):
+    self.event_generate('<<SaveBatch>>')
+
+  def _check_fault(self, index):
+    """Disable the environment cells of a row with an equipment fault"""
+    fault = self._rows[index]['Equipment Fault'].get()
+    for key in self.fault_fields:
+      cell = self._cells[index][key]
+      if fault:
+        self._rows[index][key].set('')
+        cell.state(['disabled', '!invalid'])
+      else:
+        cell.state(['!disabled'])
+
+  def _row_is_blank(self, index):
+    return not any(self._rows[index][key].get() for key in self.data_fields)
+
+  def _cell_error(self, index, key):
+    """Check one cell against its field spec"""
+    if self._rows[index]['Equipment Fault'].get() and key in self.fault_fields:
+      return ''
+    return self.checks[key](self._rows[index][key].get())
+
+  def _check_cell(self, index, key):
+    """Validate a cell when the user leaves it"""
+    error = '' if self._row_is_blank(index) else self._cell_error(index, key)
+    self._cells[index][key].state(['invalid' if error else '!invalid'])
+    self.error.set(f'Plot {self.plots[index]} {key}: {error}' if error else '')
+
+  def get_errors(self):
+    """Return a dict of errors keyed by field, or by (plot, field)"""
+    errors = dict()
+    for key, var in self._sheet_vars.items():
+      error = self.checks[key](var.get())
+      if error:
+        errors[key] = error
+    for index, plot in enumerate(self.plots):
+      if self._row_is_blank(index):
+        continue
+      for key in self.columns:
+        if self.model.fields[key]['type'] == FT.boolean:
+          continue
+        error = self._cell_error(index, key)
+        self._cells[index][key].state(['invalid' if error else '!invalid'])
+        if error:
+          errors[(plot, key)] = error
+      if not any(
+        (plot, key) in errors
+        for key in ('Min Height', 'Max Height', 'Med Height')
+      ):
+        row = self._rows[index]
+        heights = [
+          float(row[key].get())
+          for key in ('Min Height', 'Med Height', 'Max Height')
+        ]
+        if heights != sorted(heights):
+          errors[(plot, 'Med Height')] = 'Must be between min and max height'
+          self._cells[index]['Med Height'].state(['invalid'])
+    if errors:
+      self.error.set(f'{len(errors)} fields have errors')
+    return errors
+
+  def get(self):
+    """Return a list of records for the rows that were filled in"""
+    sheet = {key: var.get() for key, var in self._sheet_vars.items()}
+    records = list()
+    for index, plot in enumerate(self.plots):
+      if self._row_is_blank(index):
+        continue
+      record = dict(sheet, Plot=plot)
+      for key, var in self._rows[index].items():
+        value = var.get()
+        record[key] = None if value == '' else value
+      record['Notes'] = record['Notes'] or ''
+      records.append(record)
+    return records
+
+  def reset(self):
+    """Clear the rows, keeping the lab check for the next time slot"""
+    for index, row in enumerate(self._rows):
+      for key, var in row.items():
+        if key != 'Seed Sample':
+          var.set(False if key == 'Equipment Fault' else '')
+      for cell in self._cells[index].values():
+        cell.state(['!invalid'])
+    self.error.set('')
+    if (
+      self.settings['autofill date'].get()
+      and not self._sheet_vars['Date'].get()
+    ):
+      self._sheet_vars['Date'].set(datetime.today().strftime('%Y-%m-%d'))
+
+  def _populate_seed_samples(self, *_):
+    """Fill in the seed samples currently planted in the lab"""
     if not self.settings['autofill sheet data'].get():
       return
-    date = self._vars['Date'].get()
-    try:
-      datetime.fromisoformat(date)
-    except ValueError:
+    lab = self._sheet_vars['Lab'].get()
+    if not lab:
       return
-    time = self._vars['Time'].get()
-    lab = self._vars['Lab'].get()
+    seeds = self.model.get_seed_samples(lab)
+    for index, plot in enumerate(self.plots):
+      self._rows[index]['Seed Sample'].set(seeds.get(plot, ''))
 
-    if all([date, time, lab]):
-      check = self.model.get_lab_check(date, time, lab)
-      tech = check['lab_tech'] if check else ''
-      self._vars['Technician'].set(tech)
+  def _populate_tech_for_lab_check(self, *_):
+    """Populate technician based on the current lab check"""
+    populate_tech_for_lab_check(self.model, self.settings, self._sheet_vars)
 
 
 class LoginDialog(Dialog):
@@ -458,6 +702,68 @@ class LoginDialog(Dialog):
     self.result = (self._user.get(), self._pw.get())
 
 
+class RejectedRecordsDialog(Dialog):
+  """Lists journaled records the database rejected
+
+  result is ('retry', ids) or ('discard', ids) for the selected
+  records, or None if the dialog was closed.
+  """
+
+  columns = ('Date', 'Time', 'Lab', 'Plot', 'Error')
+
+  def __init__(self, parent, entries):
+    self._entries = entries
+    self._action = None
+    super().__init__(parent, title='Rejected Records')
+
+  def body(self, frame):
+    ttk.Label(
+      frame, text='These records could not be saved to the database:'
+    ).grid(sticky=tk.W)
+    self.treeview = ttk.Treeview(
+      frame, columns=self.columns, show='headings', height=10
+    )
+    for column in self.columns:
+      self.treeview.heading(column, text=column)
+      self.treeview.column(column, width=80, stretch=False)
+    self.treeview.column('Error', width=360, stretch=True)
+    for id_, record, _, error in self._entries:
+      values = [record.get(column, '') for column in self.columns[:-1]]
+      self.treeview.insert('', 'end', iid=str(id_), values=values + [error])
+    self.treeview.selection_set(self.treeview.get_children())
+    self.treeview.grid(row=1, sticky='NSEW')
+    return self.treeview
+
+  def buttonbox(self):
+    box = ttk.Frame(self)
+    ttk.Button(
+      box, text='Retry', command=lambda: self._choose('retry')
+    ).grid(padx=5, pady=5)
+    ttk.Button(
+      box, text='Discard', command=lambda: self._choose('discard')
+    ).grid(row=0, column=1, padx=5, pady=5)
+    ttk.Button(
+      box, text='Close', command=self.cancel
+    ).grid(row=0, column=2, padx=5, pady=5)
+    self.bind("<Escape>", self.cancel)
+    box.pack()
+
+  def _choose(self, action):
+    if action == 'discard' and not messagebox.askyesno(
+      'Discard records',
+      'Discard the selected records?  They will not be saved.',
+      parent=self
+    ):
+      return
+    self._action = action
+    self.ok()
+
+  def apply(self):
+    ids = [int(iid) for iid in self.treeview.selection()]
+    if self._action and ids:
+      self.result = (self._action, ids)
+
+
 class RecordList(tk.Frame):
   """Display for CSV file contents"""
 
@@ -522,12 +828,20 @@ class RecordList(tk.Frame):
     # For ch12, hide first column since row # is no longer meaningful
     self.treeview.config(show='headings')
 
+    # shown over the treeview while records are being fetched
+    self.loading_label = ttk.Label(self, text='Loading records...')
+
+  def show_loading(self):
+    """Show a placeholder until populate() is called"""
+    self.loading_label.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
+
   # new for ch12
 
   # update for ch12
   def populate(self, rows):
     """Clear the treeview and write the supplied data rows to it."""
 
+    self.loading_label.place_forget()
     for row in self.treeview.get_children():
       self.treeview.delete(row)
 
@@ -679,6 +993,15 @@ class YieldChartView(tk.Frame):
 
   def __init__(self, parent, x_axis, y_axis, title):
     super().__init__(parent)
+    # matplotlib is slow to import, so wait until a chart is shown
+    import matplotlib
+    matplotlib.use('TkAgg')
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_tkagg import (
+      FigureCanvasTkAgg,
+      NavigationToolbar2Tk
+    )
+
     self.figure = Figure(figsize=(6, 4), dpi=100)
     self.canvas_tkagg = FigureCanvasTkAgg(self.figure, master=self)
     canvas = self.canvas_tkagg.get_tk_widget()
@@ -1,8 +1,9 @@
 import tkinter as tk
 from tkinter import ttk
-from datetime import datetime
-from decimal import Decimal, InvalidOperation
+from decimal import Decimal
 from .constants import FieldTypes as FT
+from .styles import get_style_registry
+from .validation import compile_field
 
 
 ##################
@@ -10,31 +11,72 @@ from .constants import FieldTypes as FT
 ##################
 
 class ValidatedMixin:
-  """Adds a validation functionality to an input widget"""
+  """Adds a validation functionality to an input widget
+
+  Options that validation reads are cached in Python whenever they
+  are configured, so validating a keystroke doesn't query Tcl.
+  """
+
+  # Options copied into self._options by _cache_options()
+  cached_options = ('state',)
 
   def __init__(self, *args, error_var=None, **kwargs):
     self.error = error_var or tk.StringVar()
     super().__init__(*args, **kwargs)
+    self._cache_options()
 
     vcmd = self.register(self._validate)
     invcmd = self.register(self._invalid)
 
-    style = ttk.Style()
     widget_class = self.winfo_class()
     validated_style = 'ValidatedInput.' + widget_class
-    style.map(
+    get_style_registry(self).define_style(
       validated_style,
-      foreground=[('invalid', 'white'), ('!invalid', 'black')],
-      fieldbackground=[('invalid', 'darkred'), ('!invalid', 'white')]
+      map={
+        'foreground': [('invalid', 'white'), ('!invalid', 'black')],
+        'fieldbackground': [('invalid', 'darkred'), ('!invalid', 'white')]
+      }
     )
-    self.configure(style=validated_style)
 
     self.configure(
+      style=validated_style,
       validate='all',
       validatecommand=(vcmd, '%P', '%s', '%S', '%V', '%i', '%d'),
       invalidcommand=(invcmd, '%P', '%s', '%S', '%V', '%i', '%d')
     )
 
+  def configure(self, cnf=None, **kwargs):
+    result = super().configure(cnf, **kwargs)
+    options = dict(cnf, **kwargs) if isinstance(cnf, dict) else kwargs
+    # options like from_ lose their trailing underscore in Tcl
+    if {name.rstrip('_') for name in options} & set(self.cached_options):
+      self._cache_options()
+    if 'state' in options:
+      # A field that was skipped while disabled needs validating again
+      self.event_generate('<<StateChanged>>')
+    return result
+
+  config = configure
+
+  def state(self, statespec=None):
+    """Change or query the ttk state, keeping the disabled flag current"""
+    result = super().state(statespec)
+    if statespec is not None:
+      disabled = self._disabled
+      self._disabled = self.instate(['disabled'])
+      if self._disabled != disabled:
+        self.event_generate('<<StateChanged>>')
+    return result
+
+  def _cache_options(self):
+    """Copy the options validation reads from Tcl into Python"""
+    self._options = {
+      name: self.cget(name) for name in self.cached_options
+    }
+    # the state option sets the disabled flag, but state() doesn't
+    # change the option, so read the flag
+    self._disabled = self.instate(['disabled'])
+
   def _toggle_error(self, on=False):
     self.configure(foreground=('red' if on else 'black'))
 
@@ -47,11 +89,9 @@ class ValidatedMixin:
 
     valid = True
     # if the widget is disabled, don't validate
-    state = str(self.configure('state')[-1])
-    if state == tk.DISABLED:
-      return valid
-
-    if event == 'focusout':
+    if self._disabled:
+      pass
+    elif event == 'focusout':
       valid = self._focusout_validate(event=event)
     elif event == 'key':
       valid = self._key_validate(
@@ -62,6 +102,9 @@ class ValidatedMixin:
       index=index,
       action=action
     )
+    if event == 'focusout':
+      # the error message is now current for the widget's value
+      self.event_generate('<<Validated>>')
     return valid
 
   def _focusout_validate(self, **kwargs):
@@ -113,31 +156,38 @@ class DateEntry(ValidatedMixin, ttk.Entry):
       valid = False
     return valid
 
+  _check = staticmethod(
+    compile_field({'req': True, 'type': FT.iso_date_string})
+  )
+
   def _focusout_validate(self, event):
-    valid = True
-    if not self.get():
-      self.error.set('A value is required')
-      valid = False
-    try:
-      datetime.strptime(self.get(), '%Y-%m-%d')
-    except ValueError:
-      self.error.set('Invalid date')
-      valid = False
-    return valid
+    error = self._check(self.get())
+    self.error.set(error)
+    return not error
 
 
 class RequiredEntry(ValidatedMixin, ttk.Entry):
 
+  _check = staticmethod(compile_field({'req': True, 'type': FT.string}))
+
   def _focusout_validate(self, event):
-    valid = True
-    if not self.get():
-      valid = False
-      self.error.set('A value is required')
-    return valid
+    error = self._check(self.get())
+    self.error.set(error)
+    return not error
 
 
 class ValidatedCombobox(ValidatedMixin, ttk.Combobox):
 
+  cached_options = ('state', 'values')
+
+  def _cache_options(self):
+    super()._cache_options()
+    values = self.tk.splitlist(self._options['values'])
+    self._values = [(value.lower(), value) for value in values]
+    self._check = compile_field(
+      {'req': True, 'type': FT.string_list, 'values': values}
+    )
+
   def _key_validate(self, proposed, action, **kwargs):
     valid = True
     # if the user tries to delete,
@@ -146,12 +196,11 @@ class ValidatedCombobox(ValidatedMixin, ttk.Combobox):
       self.set('')
       return True
 
-    # get our values list
-    values = self.cget('values')
     # Do a case-insensitve match against the entered text
+    proposed = proposed.lower()
     matching = [
-      x for x in values
-      if x.lower().startswith(proposed.lower())
+      value for lowered, value in self._values
+      if lowered.startswith(proposed)
     ]
     if len(matching) == 0:
       valid = False
@@ -162,22 +211,20 @@ class ValidatedCombobox(ValidatedMixin, ttk.Combobox):
     return valid
 
   def _focusout_validate(self, **kwargs):
-    valid = True
-    if not self.get():
-      valid = False
-      self.error.set('A value is required')
-    return valid
+    error = self._check(self.get())
+    self.error.set(error)
+    return not error
 
 
 class ValidatedSpinbox(ValidatedMixin, ttk.Spinbox):
   """A Spinbox that only accepts Numbers"""
 
+  cached_options = ('state', 'from', 'to', 'increment')
+
   def __init__(self, *args, min_var=None, max_var=None,
     focus_update_var=None, from_='-Infinity', to='Infinity', **kwargs
    ):
     super().__init__(*args, from_=from_, to=to, **kwargs)
-    increment = Decimal(str(kwargs.get('increment', '1.0')))
-    self.precision = increment.normalize().as_tuple().exponent
     # there should always be a variable,
     # or some of our code will fail
     self.variable = kwargs.get('textvariable')
@@ -194,6 +241,19 @@ class ValidatedSpinbox(ValidatedMixin, ttk.Spinbox):
     self.focus_update_var = focus_update_var
     self.bind('<FocusOut>', self._set_focus_update_var)
 
+  def _cache_options(self):
+    super()._cache_options()
+    self.min_val = Decimal(str(self._options['from']))
+    self.max_val = Decimal(str(self._options['to']))
+    increment = Decimal(str(self._options['increment']))
+    self.precision = increment.normalize().as_tuple().exponent
+    self._no_negative = self.min_val >= 0
+    self._no_decimal = self.precision >= 0
+    self._check = compile_field({
+      'req': True, 'type': FT.decimal,
+      'min': self.min_val, 'max': self.max_val, 'inc': increment
+    })
+
   def _set_focus_update_var(self, event):
     value = self.get()
     if self.focus_update_var and not self.error.get():
@@ -231,16 +291,12 @@ class ValidatedSpinbox(ValidatedMixin, ttk.Spinbox):
     if action == '0':
       return True
     valid = True
-    min_val = self.cget('from')
-    max_val = self.cget('to')
-    no_negative = min_val >= 0
-    no_decimal = self.precision >= 0
 
     # First, filter out obviously invalid keystrokes
     if any([
         (char not in '-1234567890.'),
-        (char == '-' and (no_negative or index != '0')),
-        (char == '.' and (no_decimal or '.' in current))
+        (char == '-' and (self._no_negative or index != '0')),
+        (char == '.' and (self._no_decimal or '.' in current))
     ]):
       return False
 
@@ -255,7 +311,7 @@ class ValidatedSpinbox(ValidatedMixin, ttk.Spinbox):
     proposed_precision = proposed.as_tuple().exponent
 
     if any([
-      (proposed > max_val),
+      (proposed > self.max_val),
       (proposed_precision < self.precision)
     ]):
       return False
@@ -263,25 +319,9 @@ class ValidatedSpinbox(ValidatedMixin, ttk.Spinbox):
     return valid
 
   def _focusout_validate(self, **kwargs):
-    valid = True
-    value = self.get()
-    min_val = self.cget('from')
-    max_val = self.cget('to')
-
-    try:
-      d_value = Decimal(value)
-    except InvalidOperation:
-      self.error.set(f'Invalid number string: {value}')
-      return False
-
-    if d_value < min_val:
-      self.error.set(f'Value is too low (min {min_val})')
-      valid = False
-    if d_value > max_val:
-      self.error.set(f'Value is too high (max {max_val})')
-      valid = False
-
-    return valid
+    error = self._check(self.get())
+    self.error.set(error)
+    return not error
 
 class ValidatedRadioGroup(ttk.Frame):
   """A validated radio button group"""
@@ -307,6 +347,7 @@ class ValidatedRadioGroup(ttk.Frame):
     self.error.set('')
     if not self.variable.get():
       self.error.set('A value is required')
+    self.event_generate('<<Validated>>')
 
 
 class BoundText(tk.Text):
@@ -414,7 +455,9 @@ class LabelInput(ttk.Frame):
 
     # Set up error handling & display
     error_style = 'Error.' + label_args.get('style', 'TLabel')
-    ttk.Style().configure(error_style, foreground='darkred')
+    get_style_registry(self).define_style(
+      error_style, configure={'foreground': 'darkred'}
+    )
     self.error = getattr(self.input, 'error', tk.StringVar())
     ttk.Label(self, textvariable=self.error, style=error_style).grid(
         row=2, column=0, sticky=(tk.W + tk.E)
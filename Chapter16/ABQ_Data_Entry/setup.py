@@ -20,6 +20,10 @@ setup(
   install_requires=[
       'requests', 'paramiko', 'matplotlib', 'psycopg2'
   ],
+  extras_require={
+      # concurrent network requests on a single event loop thread
+      'async': ['aiohttp']
+  },
   python_requires='>=3.6',
   package_data={'abq_data_entry.images': ['*.png', '*.xbm']},
   entry_points={
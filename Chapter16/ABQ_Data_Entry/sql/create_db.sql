@@ -53,6 +53,17 @@ CREATE TABLE plot_checks(
 	FOREIGN KEY(lab_id, plot) REFERENCES plots(lab_id, plot)
 	);
 
+-- Weather observations, one row per station per observation time
+CREATE TABLE local_weather (
+	datetime TIMESTAMP(0) WITH TIME ZONE NOT NULL,
+	temperature NUMERIC(5, 2),
+	rel_hum NUMERIC(5, 2),
+	pressure NUMERIC(7, 2),
+	conditions VARCHAR(32),
+	station_id VARCHAR(8) NOT NULL DEFAULT '',
+	PRIMARY KEY(station_id, datetime)
+	);
+
 DROP VIEW IF EXISTS data_record_view;
 CREATE VIEW data_record_view AS (
     SELECT pc.date AS "Date",
@@ -0,0 +1,14 @@
+-- Upgrade a local_weather table created before weather was collected
+-- from several stations: that table has five columns and is keyed by
+-- datetime alone.  Existing rows get an empty station_id, just like
+-- observations saved without one.
+-- Running it again on an upgraded table changes nothing.
+BEGIN;
+
+ALTER TABLE local_weather
+	ADD COLUMN IF NOT EXISTS station_id VARCHAR(8) NOT NULL DEFAULT '';
+
+ALTER TABLE local_weather DROP CONSTRAINT IF EXISTS local_weather_pkey;
+ALTER TABLE local_weather ADD PRIMARY KEY(station_id, datetime);
+
+COMMIT;
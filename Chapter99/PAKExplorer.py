@@ -1,16 +1,274 @@
+import mmap
+import os
+import struct
+import threading
 import tkinter as tk
-from tkinter import ttk
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, islice
+from operator import le
+from tkinter import ttk, filedialog, messagebox
+
+try:
+    import numpy as np
+except ImportError:  # optional: the PAK directory is then decoded and sorted in Python
+    np = None
+
+
+# ---------------------------
+# Archive formats
+# ---------------------------
+# Quake PAK:
+#   header: char magic[4] = "PACK", int32 dir_offset, int32 dir_length
+#   directory: dir_length / 64 entries of
+#     char name[56] (NUL-padded, "/"-separated), int32 offset, int32 size
+#
+# RPF7 (GTA V):
+#   header: uint32 magic = "RPF7", entry_count, names_length, encryption
+#   entry_count 16-byte entries, then names_length bytes of NUL-terminated names.
+#   Directory entry: name_offset, 0x7FFFFF00, first_entry_index, entry_count
+#   File entry: uint64 bits 0-15 name_offset, 16-39 size, 40-62 offset / 512,
+#   bit 63 resource flag; then uint32 uncompressed size (binary files).
+#   Only unencrypted tables (encryption 0 or "OPEN") can be read here; the
+#   AES/NG ones need the game's keys.
+# ---------------------------
+
+PAK_HEADER_STRUCT = struct.Struct("<4sii")   # 12 bytes
+PAK_ENTRY_STRUCT = struct.Struct("<56sii")   # 64 bytes
+PAK_ENTRY_DTYPE = [("name", "S56"), ("offset", "<i4"), ("size", "<i4")]
+
+RPF7_MAGIC = 0x52504637
+RPF7_HEADER_STRUCT = struct.Struct("<4I")     # 16 bytes
+RPF7_ENTRY_SIZE = 16
+RPF7_DIRECTORY = 0x7FFFFF00
+RPF7_UNENCRYPTED = {0, 0x4E45504F}            # none, OpenIV "OPEN"
+RPF7_BLOCK = 512
+
+LIST_LIMIT = 20000
+SEARCH_LIMIT = 5000
+
+
+def _decode_names(raws: list[bytes]) -> list[str]:
+    # One decode of the joined names instead of one per entry
+    blob = b"\n".join(raws)
+    if not raws or b"\x00" in blob or blob.count(b"\n") != len(raws) - 1:
+        # junk after a terminator, or names that would split wrongly
+        raws = [raw.split(b"\x00", 1)[0] for raw in raws]
+        return [raw.decode("utf-8", errors="replace").replace("\\", "/") for raw in raws]
+    return blob.decode("utf-8", errors="replace").replace("\\", "/").split("\n")
+
+
+def _read_pak_entries(view: memoryview) -> tuple[list[str], list[int], list[int]]:
+    """Names, offsets and sizes of a PAK's entries; sorted by name when numpy is present."""
+    magic, dir_offset, dir_length = PAK_HEADER_STRUCT.unpack_from(view, 0)
+    if dir_offset < 0 or dir_length < 0 or dir_offset + dir_length > len(view):
+        raise ValueError("PAK directory lies outside the file")
+    count = dir_length // PAK_ENTRY_STRUCT.size
+    table = view[dir_offset:dir_offset + count * PAK_ENTRY_STRUCT.size]
+    try:
+        if np is not None:
+            entries = np.frombuffer(table, dtype=PAK_ENTRY_DTYPE)
+            entries = entries[np.argsort(entries["name"], kind="stable")]  # a copy, off the mmap
+            raws = entries["name"].tolist()
+            offsets = entries["offset"].tolist()
+            sizes = entries["size"].tolist()
+        else:
+            raws, offsets, sizes = [], [], []
+            for raw, offset, size in PAK_ENTRY_STRUCT.iter_unpack(table):
+                raws.append(raw)
+                offsets.append(offset)
+                sizes.append(size)
+    finally:
+        table.release()
+    return _decode_names(raws), offsets, sizes
+
+
+def _read_rpf7_entries(view: memoryview) -> tuple[list[str], list[int], list[int]]:
+    magic, count, names_length, encryption = RPF7_HEADER_STRUCT.unpack_from(view, 0)
+    if encryption not in RPF7_UNENCRYPTED:
+        raise ValueError(f"Encrypted RPF archives are not supported (encryption 0x{encryption:08X})")
+    base = RPF7_HEADER_STRUCT.size
+    names_at = base + count * RPF7_ENTRY_SIZE
+    if count == 0 or names_at + names_length > len(view):
+        raise ValueError("RPF entry table lies outside the file")
+    name_block = bytes(view[names_at:names_at + names_length])
+
+    def name_of(off: int) -> str:
+        end = name_block.find(b"\x00", off)
+        return name_block[off:end if end >= 0 else None].decode("utf-8", errors="replace")
+
+    names, offsets, sizes = [], [], []
+    stack = [(0, "")]  # (directory entry, path prefix); entry 0 is the root
+    seen = set()
+    while stack:
+        k, prefix = stack.pop()
+        if k in seen:
+            raise ValueError("RPF directory tree loops")
+        seen.add(k)
+        _, _, first, n = struct.unpack_from("<4I", view, base + k * RPF7_ENTRY_SIZE)
+        if first + n > count:
+            raise ValueError("RPF directory points past the entry table")
+        for c in range(first, first + n):
+            pos = base + c * RPF7_ENTRY_SIZE
+            h0, h1, uncompressed, _ = struct.unpack_from("<4I", view, pos)
+            if h1 == RPF7_DIRECTORY:
+                stack.append((c, prefix + name_of(h0) + "/"))
+                continue
+            bits = h0 | (h1 << 32)
+            size = (bits >> 16) & 0xFFFFFF
+            if size == 0 and not h1 >> 31:
+                size = uncompressed  # stored binary file
+            names.append(prefix + name_of(bits & 0xFFFF))
+            offsets.append(((bits >> 40) & 0x7FFFFF) * RPF7_BLOCK)
+            sizes.append(size)
+    return names, offsets, sizes
+
+
+class ArchiveIndex:
+    """The entries of one archive, sorted by path.
+
+    Directories aren't stored: every path under "a/b/" sits in one
+    contiguous range of the sorted list, found by bisection, so the
+    children of any folder can be listed without building a tree. A
+    lower-cased, NUL-joined copy of the paths serves substring search.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < RPF7_HEADER_STRUCT.size:
+                raise ValueError("File too small (no header)")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    magic = bytes(view[:4])
+                    if magic == b"PACK":
+                        self.kind = "PAK"
+                        names, offsets, sizes = _read_pak_entries(view)
+                    elif int.from_bytes(magic, "little") == RPF7_MAGIC:
+                        self.kind = "RPF7"
+                        names, offsets, sizes = _read_rpf7_entries(view)
+                    else:
+                        raise ValueError(f"Not a PAK or RPF7 archive (magic {magic!r})")
+
+        if not all(map(le, names, islice(names, 1, None))):
+            order = sorted(range(len(names)), key=names.__getitem__)
+            names = [names[i] for i in order]
+            offsets = [offsets[i] for i in order]
+            sizes = [sizes[i] for i in order]
+        self.paths = names
+        self.offsets = offsets
+        self.sizes = sizes
+
+        self._lower: str | None = None
+        self._starts: list[int] = []
+        self._search_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def _range(self, prefix: str) -> tuple[int, int]:
+        # "/" + 1 == "0": every path under prefix sorts below prefix[:-1] + "0"
+        if not prefix:
+            return 0, len(self.paths)
+        return bisect_left(self.paths, prefix), bisect_left(self.paths, prefix[:-1] + "0")
+
+    def children(self, prefix: str) -> list[tuple[str, bool, int, int]]:
+        """Immediate children of a folder ("" or "a/b/").
+
+        Returns (name, is_dir, first, end): for a file, first is its entry
+        index; for a folder, [first, end) is the range of its contents.
+        Each sub-folder costs one bisection, however much it holds.
+        """
+        lo, hi = self._range(prefix)
+        out = []
+        i = lo
+        cut = len(prefix)
+        while i < hi:
+            rest = self.paths[i][cut:]
+            slash = rest.find("/")
+            if slash < 0:
+                out.append((rest, False, i, i + 1))
+                i += 1
+            else:
+                name = rest[:slash]
+                j = bisect_left(self.paths, prefix + name + "0", i, hi)
+                out.append((name, True, i, j))
+                i = j
+        return out
+
+    def build_search_index(self):
+        """Join the lower-cased paths for search; done once, off the UI thread."""
+        with self._search_lock:
+            if self._lower is None:
+                lower = [path.lower() for path in self.paths]  # may change a path's length
+                self._starts = list(accumulate(map((1).__add__, map(len, lower)), initial=0))
+                self._lower = "\x00".join(lower)
+
+    def search(self, text: str, limit: int = SEARCH_LIMIT) -> list[int]:
+        """Entries whose path contains text (case-insensitive), up to limit."""
+        self.build_search_index()
+        text = text.lower()
+        hay, starts = self._lower, self._starts
+        hits = []
+        pos = hay.find(text)
+        while pos != -1 and len(hits) < limit:
+            i = bisect_right(starts, pos) - 1
+            hits.append(i)
+            pos = hay.find(text, starts[i + 1])
+        return hits
+
+    @staticmethod
+    def _outside(off: int, size: int, end: int) -> bool:
+        # PAK offsets and sizes are signed: a negative one is corrupt
+        return off < 0 or size < 0 or off + size > end
+
+    def read(self, i: int) -> bytes:
+        with open(self.path, "rb") as f:
+            off, size = self.offsets[i], self.sizes[i]
+            if self._outside(off, size, os.fstat(f.fileno()).st_size):
+                raise ValueError(f"Entry lies outside the archive (offset {off}, size {size})")
+            f.seek(off)
+            return f.read(size)
+
+    def scan(self) -> tuple[int, int]:
+        """(total bytes of the good entries, entries lying outside the file)."""
+        end = os.path.getsize(self.path)
+        total = bad = 0
+        for off, size in zip(self.offsets, self.sizes):
+            if self._outside(off, size, end):
+                bad += 1
+            else:
+                total += size
+        return total, bad
+
+
+def _format_size(n: int) -> str:
+    if n < 1024:
+        return f"{n} B"
+    if n < 1024 * 1024:
+        return f"{n // 1024} KB"
+    return f"{n / (1024 * 1024):.1f} MB"
 
 
 class PAKExplorer(tk.Tk):
     def __init__(self):
         super().__init__()
-        self.title("RPF Explorer (Tkinter Mock)")
+        self.title("PAK/RPF Explorer")
         self.geometry("1100x700")
         self.minsize(900, 500)
 
         # ---- status text variable
-        self.status_var = tk.StringVar(value="Ready.")
+        self.status_var = tk.StringVar(value="Open a PAK or RPF archive (File > Open...).")
+
+        # ---- archive state
+        self.archive: ArchiveIndex | None = None
+        self._tree_prefix: dict[str, str] = {}   # tree item -> folder prefix
+        self._tree_item: dict[str, str] = {}     # folder prefix -> tree item
+        self._unfilled: set[str] = set()         # tree items still holding a placeholder
+        self._list_items: dict[str, tuple[str, bool, int]] = {}  # list item -> (path, is_dir, entry)
+        self._current: str | None = None
+        self._history: list[str] = []
+        self._load_gen = 0
+        self._search_gen = 0
 
         # ---- layout: menu, toolbar, main, status
         self._build_menu()
@@ -18,14 +276,12 @@ class PAKExplorer(tk.Tk):
         self._build_main_panes()
         self._build_statusbar()
 
-        # demo data
-        self._populate_demo_tree()
-        self._populate_demo_list(root_name="(no selection)")
-
         # bindings
         self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.tree.bind("<<TreeviewOpen>>", self._on_tree_open)
         self.listview.bind("<Double-1>", self._on_list_double_click)
-        self.bind("<F5>", lambda e: self._set_status("Refresh (F5)"))
+        self.search_entry.bind("<Return>", lambda e: self._on_search())
+        self.bind("<F5>", lambda e: self.refresh())
 
     # -----------------------------
     # UI builders
@@ -34,8 +290,8 @@ class PAKExplorer(tk.Tk):
         menubar = tk.Menu(self)
 
         file_menu = tk.Menu(menubar, tearoff=False)
-        file_menu.add_command(label="Open...", command=lambda: self._set_status("File > Open..."))
-        file_menu.add_command(label="Close", command=lambda: self._set_status("File > Close"))
+        file_menu.add_command(label="Open...", command=self.open_archive)
+        file_menu.add_command(label="Close", command=self.close_archive)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.destroy)
 
@@ -43,7 +299,7 @@ class PAKExplorer(tk.Tk):
         edit_menu.add_command(label="Copy", command=lambda: self._set_status("Edit > Copy"))
         edit_menu.add_command(label="Paste", command=lambda: self._set_status("Edit > Paste"))
         edit_menu.add_separator()
-        edit_menu.add_command(label="Find...", command=lambda: self._set_status("Edit > Find..."))
+        edit_menu.add_command(label="Find...", command=self.search_entry_focus)
 
         view_menu = tk.Menu(menubar, tearoff=False)
         self.show_toolbar_var = tk.BooleanVar(value=True)
@@ -51,11 +307,11 @@ class PAKExplorer(tk.Tk):
         view_menu.add_checkbutton(label="Toolbar", variable=self.show_toolbar_var, command=self._toggle_toolbar)
         view_menu.add_checkbutton(label="Status Bar", variable=self.show_status_var, command=self._toggle_statusbar)
         view_menu.add_separator()
-        view_menu.add_command(label="Refresh (F5)", command=lambda: self._set_status("View > Refresh"))
+        view_menu.add_command(label="Refresh (F5)", command=self.refresh)
 
         tools_menu = tk.Menu(menubar, tearoff=False)
-        tools_menu.add_command(label="Scan", command=lambda: self._set_status("Tools > Scan"))
-        tools_menu.add_command(label="Export selected", command=lambda: self._set_status("Tools > Export selected"))
+        tools_menu.add_command(label="Scan", command=self.scan_archive)
+        tools_menu.add_command(label="Export selected", command=self.export_selected)
 
         options_menu = tk.Menu(menubar, tearoff=False)
         options_menu.add_command(label="Settings...", command=lambda: self._set_status("Options > Settings..."))
@@ -79,11 +335,11 @@ class PAKExplorer(tk.Tk):
         self.toolbar.pack(side=tk.TOP, fill=tk.X)
 
         # left tool buttons
-        ttk.Button(self.toolbar, text="Open", command=lambda: self._set_status("Toolbar: Open")).pack(side=tk.LEFT, padx=(0, 4))
-        ttk.Button(self.toolbar, text="Back", command=lambda: self._set_status("Toolbar: Back")).pack(side=tk.LEFT, padx=4)
-        ttk.Button(self.toolbar, text="Up", command=lambda: self._set_status("Toolbar: Up")).pack(side=tk.LEFT, padx=4)
+        ttk.Button(self.toolbar, text="Open", command=self.open_archive).pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Button(self.toolbar, text="Back", command=self.go_back).pack(side=tk.LEFT, padx=4)
+        ttk.Button(self.toolbar, text="Up", command=self.go_up).pack(side=tk.LEFT, padx=4)
         ttk.Separator(self.toolbar, orient=tk.VERTICAL).pack(side=tk.LEFT, fill=tk.Y, padx=8)
-        ttk.Button(self.toolbar, text="Refresh", command=lambda: self._set_status("Toolbar: Refresh")).pack(side=tk.LEFT, padx=4)
+        ttk.Button(self.toolbar, text="Refresh", command=self.refresh).pack(side=tk.LEFT, padx=4)
 
         # edit mode checkbox (like the screenshot top-right)
         ttk.Separator(self.toolbar, orient=tk.VERTICAL).pack(side=tk.LEFT, fill=tk.Y, padx=8)
@@ -172,38 +428,192 @@ class PAKExplorer(tk.Tk):
         self.right_status.pack(side=tk.RIGHT)
 
     # -----------------------------
-    # Demo population
+    # Archive
     # -----------------------------
-    def _populate_demo_tree(self):
-        self.tree.delete(*self.tree.get_children())
+    def open_archive(self):
+        path = filedialog.askopenfilename(
+            parent=self,
+            title="Open archive",
+            filetypes=[("Archives", "*.pak *.rpf"), ("All files", "*.*")]
+        )
+        if path:
+            self.load_archive(path)
+
+    def load_archive(self, path: str):
+        """Read the archive's directory on a worker thread, then show its root."""
+        self._load_gen += 1
+        gen = self._load_gen
+        self._set_status(f"Reading {os.path.basename(path)}...")
+        self.right_status.config(text="Busy")
+
+        def worker():
+            try:
+                result = ArchiveIndex(path)
+            except (OSError, ValueError) as ex:
+                result = ex
+            self.after(0, lambda: self._archive_loaded(gen, result))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _archive_loaded(self, gen: int, result):
+        if gen != self._load_gen:
+            return  # superseded by a later open or a close
+        self.right_status.config(text="OK")
+        if isinstance(result, Exception):
+            messagebox.showerror("Error", f"Failed to open archive:\n{result}")
+            self._set_status("Open failed.")
+            return
 
-        root = self.tree.insert("", "end", text="update", open=True)
-        x64 = self.tree.insert(root, "end", text="x64", open=True)
-        dlcpacks = self.tree.insert(x64, "end", text="dlcpacks", open=True)
-        mpjan = self.tree.insert(dlcpacks, "end", text="mpjanuary2016", open=True)
-        self.tree.insert(mpjan, "end", text="dlc.rpf", open=True)
-        self.tree.insert(mpjan, "end", text="dlc2.rpf", open=False)
+        self._clear()
+        self.archive = result
+        root = self.tree.insert("", "end", text=os.path.basename(result.path), open=True)
+        self._tree_prefix[root] = ""
+        self._tree_item[""] = root
+        self._unfilled.add(root)
+        self._fill_tree_node(root)
+        self._show_folder("")
+        threading.Thread(target=result.build_search_index, daemon=True).start()
+        self.tree.selection_set(root)
+        self._set_status(f"{os.path.basename(result.path)}: {len(result)} entries ({result.kind})")
+
+    def close_archive(self):
+        self._load_gen += 1
+        self._clear()
+        self._set_status("Closed.")
+
+    def _clear(self):
+        self._search_gen += 1
+        self.archive = None
+        self.tree.delete(*self.tree.get_children())
+        self.listview.delete(*self.listview.get_children())
+        self._tree_prefix.clear()
+        self._tree_item.clear()
+        self._unfilled.clear()
+        self._list_items.clear()
+        self._current = None
+        self._history.clear()
+
+    def _fill_tree_node(self, item: str):
+        """Replace an item's placeholder with its sub-folders, the first time it opens."""
+        if item not in self._unfilled:
+            return
+        self._unfilled.discard(item)
+        self.tree.delete(*self.tree.get_children(item))
+        prefix = self._tree_prefix[item]
+        for name, is_dir, _, _ in self.archive.children(prefix):
+            if not is_dir:
+                continue
+            child = self.tree.insert(item, "end", text=name)
+            self._tree_prefix[child] = f"{prefix}{name}/"
+            self._tree_item[f"{prefix}{name}/"] = child
+            self.tree.insert(child, "end", text="...")
+            self._unfilled.add(child)
+
+    def _show_folder(self, prefix: str, remember: bool = True):
+        if remember and self._current is not None and self._current != prefix:
+            self._history.append(self._current)
+        self._current = prefix
+        self.listview.delete(*self.listview.get_children())
+        self._list_items.clear()
+
+        rows = self.archive.children(prefix)
+        rows.sort(key=lambda r: not r[1])  # folders first, each group still by name
+        for name, is_dir, first, end in rows[:LIST_LIMIT]:
+            if is_dir:
+                item = self.listview.insert("", "end", values=(f"{name}/", "Folder", f"{end - first} files", ""))
+                self._list_items[item] = (f"{prefix}{name}/", True, first)
+            else:
+                values = (name, self._file_type(name), _format_size(self.archive.sizes[first]), "R")
+                item = self.listview.insert("", "end", values=values)
+                self._list_items[item] = (prefix + name, False, first)
+
+        shown = f", showing first {LIST_LIMIT}" if len(rows) > LIST_LIMIT else ""
+        self._set_status(f"Listing: /{prefix} ({len(rows)} items{shown})")
+
+    def _reveal_folder(self, prefix: str, remember: bool = True):
+        """List a folder and select it in the tree, filling in its ancestors on the way."""
+        parts = prefix.split("/")[:-1]
+        for depth in range(len(parts) + 1):
+            ancestor = "".join(f"{p}/" for p in parts[:depth])
+            item = self._tree_item.get(ancestor)
+            if item is None:
+                break
+            self._fill_tree_node(item)
+            self.tree.item(item, open=True)
+        self._show_folder(prefix, remember)
+        item = self._tree_item.get(prefix)
+        if item is not None:
+            self.tree.selection_set(item)
+            self.tree.see(item)
+
+    def go_back(self):
+        if self.archive is None or not self._history:
+            self._set_status("Back: nothing to go back to")
+            return
+        self._reveal_folder(self._history.pop(), remember=False)
 
-        common = self.tree.insert("", "end", text="common.rpf", open=False)
-        self.tree.insert(common, "end", text="data", open=False)
-        self.tree.insert(common, "end", text="textures", open=False)
+    def go_up(self):
+        if self.archive is None or not self._current:
+            self._set_status("Up: already at the root")
+            return
+        parent = self._current[:-1].rpartition("/")[0]
+        self._reveal_folder(f"{parent}/" if parent else "")
 
-    def _populate_demo_list(self, root_name: str):
-        self.listview.delete(*self.listview.get_children())
+    def refresh(self):
+        if self.archive is None:
+            self._set_status("Refresh: no archive open")
+            return
+        self._show_folder(self._current or "", remember=False)
 
-        # header-ish row simulation: not needed, but good for status
-        self._set_status(f"Listing: {root_name}")
+    def scan_archive(self):
+        """Check on a worker thread that every entry lies inside the file."""
+        archive = self.archive
+        if archive is None:
+            self._set_status("Scan: no archive open")
+            return
+        self._set_status("Scanning...")
+        self.right_status.config(text="Busy")
+
+        def worker():
+            try:
+                total, bad = archive.scan()
+            except OSError as ex:
+                self.after(0, lambda: self._scan_finished(archive, f"Scan failed: {ex}", True))
+                return
+            msg = f"Scan: {len(archive)} entries, {_format_size(total)}, {bad} outside the file"
+            self.after(0, lambda: self._scan_finished(archive, msg, bad > 0))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _scan_finished(self, archive: ArchiveIndex, msg: str, failed: bool):
+        if archive is not self.archive:
+            return
+        self.right_status.config(text="Errors" if failed else "OK")
+        self._set_status(msg)
 
-        demo_rows = [
-            ("vehicles.meta", "XML", "12 KB", "R"),
-            ("handling.meta", "XML", "8 KB", "R"),
-            ("carcols.meta", "XML", "21 KB", "R"),
-            ("carvariations.meta", "XML", "15 KB", "R"),
-            ("stream/", "Folder", "", ""),
-        ]
+    def export_selected(self):
+        sel = self.listview.selection()
+        entry = self._list_items.get(sel[0]) if sel else None
+        if entry is None or entry[1]:
+            self._set_status("Export: select a file")
+            return
+        path, _, index = entry
+        out = filedialog.asksaveasfilename(parent=self, initialfile=path.rpartition("/")[2])
+        if not out:
+            return
+        try:
+            data = self.archive.read(index)
+            with open(out, "wb") as f:
+                f.write(data)
+        except (OSError, ValueError) as ex:
+            messagebox.showerror("Error", f"Export failed:\n{ex}")
+            return
+        self._set_status(f"Exported {path} ({_format_size(len(data))})")
 
-        for name, typ, size, attr in demo_rows:
-            self.listview.insert("", "end", values=(name, typ, size, attr))
+    @staticmethod
+    def _file_type(name: str) -> str:
+        ext = os.path.splitext(name)[1]
+        return ext[1:].upper() if ext else "File"
 
     # -----------------------------
     # Callbacks
@@ -211,27 +621,69 @@ class PAKExplorer(tk.Tk):
     def _set_status(self, msg: str):
         self.status_var.set(msg)
 
+    def search_entry_focus(self):
+        self.search_entry.focus_set()
+        self.search_entry.select_range(0, tk.END)
+
+    def _on_tree_open(self, _event):
+        item = self.tree.focus()
+        if item:
+            self._fill_tree_node(item)
+
     def _on_tree_select(self, _event):
         sel = self.tree.selection()
         if not sel:
             return
-        node = sel[0]
-        path = self._tree_item_path(node)
-        self._populate_demo_list(root_name=path)
+        prefix = self._tree_prefix.get(sel[0])
+        if prefix is not None and prefix != self._current:
+            self._show_folder(prefix)
 
     def _on_list_double_click(self, _event):
         sel = self.listview.selection()
-        if not sel:
+        entry = self._list_items.get(sel[0]) if sel else None
+        if entry is None:
+            return
+        path, is_dir, index = entry
+        if is_dir:
+            self._reveal_folder(path)
             return
-        values = self.listview.item(sel[0], "values")
-        self._set_status(f"Open item: {values[0]}")
+        size, offset = self.archive.sizes[index], self.archive.offsets[index]
+        self._set_status(f"{path}: {_format_size(size)} at offset {offset}")
 
     def _on_search(self):
         q = self.search_var.get().strip()
         if not q:
             self._set_status("Search: (empty)")
             return
-        self._set_status(f"Search: {q}")
+        archive = self.archive
+        if archive is None:
+            self._set_status("Search: no archive open")
+            return
+        self._search_gen += 1
+        gen = self._search_gen
+        self._set_status(f"Searching for {q}...")
+
+        def worker():
+            hits = archive.search(q)
+            self.after(0, lambda: self._search_finished(gen, q, hits))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _search_finished(self, gen: int, q: str, hits: list[int]):
+        if gen != self._search_gen:
+            return  # a newer search, or the archive was closed
+        if self._current is not None:
+            self._history.append(self._current)  # Back returns to the folder
+        self.listview.delete(*self.listview.get_children())
+        self._list_items.clear()
+        archive = self.archive
+        for i in hits:
+            path = archive.paths[i]
+            values = (path, self._file_type(path), _format_size(archive.sizes[i]), "R")
+            item = self.listview.insert("", "end", values=values)
+            self._list_items[item] = (path, False, i)
+        more = "+" if len(hits) == SEARCH_LIMIT else ""
+        self._set_status(f"Search: {q} ({len(hits)}{more} matches)")
 
     def _toggle_toolbar(self):
         if self.show_toolbar_var.get():
@@ -5,13 +5,38 @@
     https://www.mediafire.com/folder/y8dfcdqbc7vvh/Defiance_Game_Directories_Folder
     '''
 
+import mmap
 import os
 import struct
+import sys
 import threading
+import base64
+import codecs
 import datetime
+import errno
+import hashlib
+import io
+import multiprocessing
+import queue
+import sqlite3
+from bisect import bisect, bisect_right
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from array import array
+from itertools import accumulate
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
+try:
+    import numpy as np
+except ImportError:  # optional: index columns fall back to array.array
+    np = None
+
+try:
+    from PIL import Image, ImageTk
+except ImportError:  # optional: previews fall back to Tk's own PNG/GIF support
+    Image = ImageTk = None
+
 
 # ---------------------------
 # WAD format (from wadf.h / wadlib.c)
@@ -33,21 +58,93 @@ from tkinter import ttk, filedialog, messagebox
 WADF_HEADER_STRUCT = struct.Struct("<8I")          # 32 bytes
 WADF_INDEX_HEADER_STRUCT = struct.Struct("<4I")    # 16 bytes
 WADF_INDEX_RECORD_STRUCT = struct.Struct("<4IQ2I") # 32 bytes
+WADF_INDEX_RECORD_FIELDS = ("id", "data_offset", "data_size", "name_offset", "modified_time", "type", "null1")
+
+# Columns kept from each index record, with their array.array typecodes
+INDEX_COLUMNS = {
+    "id": "I",
+    "data_offset": "I",
+    "data_size": "I",
+    "name_offset": "I",
+    "modified_time": "Q",
+    "type": "I",
+}
+
+# (word size, word index) of each column within a 32-byte index record
+_RECORD_WORDS = {
+    "id": (4, 0),
+    "data_offset": (4, 1),
+    "data_size": (4, 2),
+    "name_offset": (4, 3),
+    "modified_time": (8, 2),
+    "type": (4, 6),
+}
+
+if np is not None:
+    WADF_INDEX_RECORD_DTYPE = np.dtype([
+        ("id", "<u4"),
+        ("data_offset", "<u4"),
+        ("data_size", "<u4"),
+        ("name_offset", "<u4"),
+        ("modified_time", "<u8"),
+        ("type", "<u4"),
+        ("null1", "<u4"),
+    ])
 
 MAGIC_ACCEPT = {b"WADF", b"FDAW"}  # be tolerant
 
 NAME_FIELD_SIZE = 256
 
-
-def _safe_decode_cstr_256(b: bytes) -> str:
-    # Trim at first NUL; decode as latin-1/utf-8 tolerant
-    raw = b.split(b"\x00", 1)[0]
-    if not raw:
-        return ""
-    try:
-        return raw.decode("utf-8", errors="replace")
-    except Exception:
-        return raw.decode("latin-1", errors="replace")
+# Name reads closer together than this are merged into one range
+NAME_RANGE_GAP = 64 * 1024
+NAME_RANGE_MAX = 16 * 1024 * 1024
+
+
+def _read_names(buf, offsets: list[int]) -> dict[int, str]:
+    """Resolve the names at the given sorted offsets of a mapped WAD file.
+
+    Offsets are grouped into ranges, each range is copied out once and
+    the raw names are decoded together.
+    """
+    size = len(buf)
+    found: list[int] = []
+    raws: list[bytes] = []
+    if not offsets:
+        return {}
+
+    # Start a new range wherever the next name is too far away
+    bounds = [0]
+    run_start = offsets[0]
+    for k, (prev, off) in enumerate(zip(offsets, offsets[1:]), 1):
+        if off - prev > NAME_RANGE_GAP or off - run_start > NAME_RANGE_MAX:
+            bounds.append(k)
+            run_start = off
+    bounds.append(len(offsets))
+
+    for i, j in zip(bounds, bounds[1:]):
+        start = offsets[i]
+        chunk = bytes(buf[start:min(offsets[j - 1] + NAME_FIELD_SIZE, size)])
+        # Names are usually packed back to back: one split finds them all
+        parts = chunk.split(b"\x00")
+        part_starts = accumulate(map((1).__add__, map(len, parts)), initial=start)
+        by_pos = dict(zip(part_starts, parts))
+        run = offsets[i:j]
+        picked = list(map(by_pos.get, run))
+        if None in picked or max(map(len, picked)) > NAME_FIELD_SIZE:
+            # Some offsets point into the middle of a string, or at an
+            # over-long one: read those the way wadlib.c does
+            for k, off in enumerate(run):
+                raw = picked[k]
+                if raw is None:
+                    a = off - start
+                    nul = chunk.find(b"\x00", a, a + NAME_FIELD_SIZE)
+                    raw = chunk[a:nul if nul >= 0 else a + NAME_FIELD_SIZE]
+                picked[k] = raw[:NAME_FIELD_SIZE]
+        raws.extend(picked)
+        found.extend(run)
+    # NUL never occurs inside a UTF-8 sequence, so one decode splits cleanly
+    names = b"\x00".join(raws).decode("utf-8", errors="replace").split("\x00")
+    return dict(zip(found, names))
 
 
 def _format_unix_like_time(sec: int) -> str:
@@ -78,67 +175,1268 @@ class WadRecord:
         self.data_offset = data_offset
         self.data_size = data_size
         self.modified_time = modified_time
-        self.name = None  # lazy-loaded like WadRecordResolveName
+        self.name = None  # filled in by RecordTable once resolve_names() reads it
 
-    def ensure_name_loaded(self) -> None:
-        if self.name is not None:
-            return
-        with open(self.wad_path, "rb") as f:
-            f.seek(self.name_offset, os.SEEK_SET)
-            b = f.read(NAME_FIELD_SIZE)
-        self.name = _safe_decode_cstr_256(b)
+
+class RecordTable:
+    """The records of a WAD index, stored as columns.
+
+    Columns are NumPy arrays when NumPy is installed, otherwise
+    array.array. Indexing returns a WadRecord, made the first time
+    that row is asked for, so a large index costs a handful of arrays
+    rather than one object per record.
+    """
+
+    def __init__(self, wad_path: str, columns: dict, names: list[str] | None = None):
+        self.wad_path = wad_path
+        self.columns = columns
+        self.names: list[str | None] = names if names is not None else [None] * len(columns["id"])
+        self._records: dict[int, WadRecord] = {}
+
+    def __len__(self) -> int:
+        return len(self.columns["id"])
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        rec = self._records.get(i)
+        if rec is None:
+            c = self.columns
+            rec = WadRecord(
+                wad_path=self.wad_path,
+                rid=int(c["id"][i]),
+                rtype=int(c["type"][i]),
+                name_offset=int(c["name_offset"][i]),
+                data_offset=int(c["data_offset"][i]),
+                data_size=int(c["data_size"][i]),
+                modified_time=int(c["modified_time"][i]),
+            )
+            rec.name = self.names[i]
+            self._records[i] = rec
+        return rec
+
+    def column_values(self, name: str, rows) -> list[int]:
+        """The values of one column for the given rows, as Python ints."""
+        col = self.columns[name]
+        if np is not None and isinstance(col, np.ndarray):
+            return col[np.asarray(rows, dtype=np.intp)].tolist()
+        return [col[i] for i in rows]
+
+    def set_names(self, rows, names) -> None:
+        for i, name in zip(rows, names):
+            self.names[i] = name
+        for i, rec in self._records.items():
+            if rec.name is None:
+                rec.name = self.names[i]
+
+
+def _read_index_blocks(view: memoryview) -> list[tuple[int, int]]:
+    """Walk the index-header chain; return (offset, num_records) per block."""
+    if len(view) < WADF_HEADER_STRUCT.size:
+        raise ValueError("File too small (no header)")
+    magic_u32, unk1, total_records, *_ = WADF_HEADER_STRUCT.unpack_from(view, 0)
+
+    # Interpret magic both ways (u32 -> bytes)
+    magic_bytes = struct.pack("<I", magic_u32)
+    if magic_bytes not in MAGIC_ACCEPT:
+        # Some environments might pack differently; also try big-endian view:
+        magic_be = struct.pack(">I", magic_u32)
+        if magic_be not in MAGIC_ACCEPT:
+            raise ValueError(f"Bad magic: {magic_bytes!r} / {magic_be!r}")
+
+    blocks = []
+    seen = set()
+    total_read = 0
+    pos = WADF_HEADER_STRUCT.size
+
+    # wadlib.c reads index headers until total_records_read == total_records
+    while total_read < total_records:
+        if pos in seen:
+            raise ValueError(f"Index header chain loops at offset {pos}")
+        seen.add(pos)
+        if pos + WADF_INDEX_HEADER_STRUCT.size > len(view):
+            raise ValueError("Unexpected EOF in index header")
+        num_records, next_header_offset, ih_unk1, ih_unk2 = WADF_INDEX_HEADER_STRUCT.unpack_from(view, pos)
+        pos += WADF_INDEX_HEADER_STRUCT.size
+
+        end = pos + num_records * WADF_INDEX_RECORD_STRUCT.size
+        if end > len(view):
+            raise ValueError("Unexpected EOF in index record")
+        blocks.append((pos, num_records))
+        total_read += num_records
+
+        pos = next_header_offset if next_header_offset != 0 else end
+    return blocks
+
+
+def parse_index(view: memoryview) -> dict:
+    """Decode the index of a mapped WAD file into columns (see RecordTable)."""
+    blocks = _read_index_blocks(view)
+
+    if np is not None:
+        # Each block is a run of packed records: view it as a structured
+        # array in place, then copy it out of the mapping.
+        table = np.concatenate([
+            np.frombuffer(view, dtype=WADF_INDEX_RECORD_DTYPE, count=n, offset=off)
+            for off, n in blocks
+        ] or [np.empty(0, dtype=WADF_INDEX_RECORD_DTYPE)])
+        return {name: np.ascontiguousarray(table[name]) for name in INDEX_COLUMNS}
+
+    columns = {name: array(code) for name, code in INDEX_COLUMNS.items()}
+    for off, n in blocks:
+        if not n:
+            continue
+        with view[off:off + n * WADF_INDEX_RECORD_STRUCT.size] as block:
+            if sys.byteorder == "little":
+                # Native layout matches the file: take each field as a
+                # strided slice of the block viewed as u32 / u64 words.
+                with block.cast("I") as words, block.cast("Q") as dwords:
+                    for name, (size, pos) in _RECORD_WORDS.items():
+                        src = dwords if size == 8 else words
+                        with src[pos::WADF_INDEX_RECORD_STRUCT.size // size] as field:
+                            columns[name].extend(field.tolist())
+            else:
+                rows = list(WADF_INDEX_RECORD_STRUCT.iter_unpack(block))
+                for name, values in zip(WADF_INDEX_RECORD_FIELDS, zip(*rows)):
+                    if name in columns:
+                        columns[name].extend(values)
+    return columns
 
 
 class WadFile:
     def __init__(self, path: str):
         self.path = path
-        self.records: list[WadRecord] = []
+        self.records = RecordTable(path, {name: array(code) for name, code in INDEX_COLUMNS.items()})
+        self._search_index: "SearchIndex | None" = None
+        self._map: mmap.mmap | None = None
+        # read_data runs on the preview thread while close() runs on the UI
+        self._map_lock = threading.Lock()
+        self._closed = False
 
     def load_index(self) -> None:
         with open(self.path, "rb") as f:
-            head = f.read(WADF_HEADER_STRUCT.size)
-            if len(head) != WADF_HEADER_STRUCT.size:
+            if os.fstat(f.fileno()).st_size < WADF_HEADER_STRUCT.size:
                 raise ValueError("File too small (no header)")
-            magic_u32, unk1, total_records, *_ = WADF_HEADER_STRUCT.unpack(head)
-
-            # Interpret magic both ways (u32 -> bytes)
-            magic_bytes = struct.pack("<I", magic_u32)
-            if magic_bytes not in MAGIC_ACCEPT:
-                # Some environments might pack differently; also try big-endian view:
-                magic_be = struct.pack(">I", magic_u32)
-                if magic_be not in MAGIC_ACCEPT:
-                    raise ValueError(f"Bad magic: {magic_bytes!r} / {magic_be!r}")
-
-            total_read = 0
-
-            # wadlib.c reads index headers until total_records_read == total_records
-            while total_read < total_records:
-                ih_raw = f.read(WADF_INDEX_HEADER_STRUCT.size)
-                if len(ih_raw) != WADF_INDEX_HEADER_STRUCT.size:
-                    raise ValueError("Unexpected EOF in index header")
-                num_records, next_header_offset, ih_unk1, ih_unk2 = WADF_INDEX_HEADER_STRUCT.unpack(ih_raw)
-
-                for _ in range(num_records):
-                    ir_raw = f.read(WADF_INDEX_RECORD_STRUCT.size)
-                    if len(ir_raw) != WADF_INDEX_RECORD_STRUCT.size:
-                        raise ValueError("Unexpected EOF in index record")
-                    rid, data_offset, data_size, name_offset, modified_time, rtype, null1 = WADF_INDEX_RECORD_STRUCT.unpack(ir_raw)
-
-                    self.records.append(
-                        WadRecord(
-                            wad_path=self.path,
-                            rid=rid,
-                            rtype=rtype,
-                            name_offset=name_offset,
-                            data_offset=data_offset,
-                            data_size=data_size,
-                            modified_time=modified_time,
-                        )
-                    )
-                    total_read += 1
-
-                if next_header_offset != 0:
-                    f.seek(next_header_offset, os.SEEK_SET)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    columns = parse_index(view)
+        self.records = RecordTable(self.path, columns)
+
+    def resolve_names(self, rows=None) -> None:
+        """Load the names of the given rows (default: all) in one mapping."""
+        table = self.records
+        if rows is None:
+            rows = range(len(table))
+        todo = [i for i in rows if table.names[i] is None]
+        if not todo:
+            return
+        name_offsets = table.columns["name_offset"]
+        if np is not None:
+            row_offsets = name_offsets[todo].tolist()
+        else:
+            row_offsets = [name_offsets[i] for i in todo]
+        with open(self.path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                names = _read_names(mm, sorted(set(row_offsets)))
+        table.set_names(todo, [names[off] for off in row_offsets])
+
+    def read_data(self, row: int, limit: int | None = None) -> bytes:
+        """A record's data, or its first `limit` bytes, through a kept mapping."""
+        c = self.records.columns
+        offset, size = int(c["data_offset"][row]), int(c["data_size"][row])
+        if limit is not None:
+            size = min(size, limit)
+        with self._map_lock:
+            if self._closed:
+                raise ValueError("WAD file is closed")
+            if self._map is None:
+                with open(self.path, "rb") as f:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._map[offset:offset + size]
+
+    def close(self) -> None:
+        """Unmap the file; later read_data calls fail instead of remapping it."""
+        with self._map_lock:
+            self._closed = True
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+    def search_index(self) -> "SearchIndex":
+        """The archive's SearchIndex, built on first use (resolves all names)."""
+        if self._search_index is None or self._search_index.table is not self.records:
+            self.resolve_names()
+            self._search_index = SearchIndex(self.records)
+        return self._search_index
+
+    def load(self, cache: "WadIndexCache | None" = None) -> bool:
+        """Load the index and all names, from the cache if the file is unchanged.
+
+        Returns True when the records came from the cache.
+        """
+        if cache is not None and cache.load(self):
+            return True
+        self.load_index()
+        self.resolve_names()
+        if cache is not None:
+            cache.store(self)
+        return False
+
+
+def _parse_int(v: str) -> int | None:
+    try:
+        return int(v, 16) if v.lower().startswith("0x") else int(v, 10)
+    except ValueError:
+        return None
+
+
+class SearchIndex:
+    """Lookup structures for filtering one archive's records.
+
+    Built once per archive: id and type hash maps (made on first use)
+    and the lower-cased names joined into one NUL-separated haystack,
+    so a substring query is a run of str.find calls that jump to the
+    next row after each hit. search() also remembers its last query;
+    when a new query can only narrow it, only the previous hits are
+    re-checked.
+    """
+
+    # Past this share of matching rows, scanning every name is cheaper
+    # than jumping through the haystack hit by hit
+    SCAN_FRACTION = 16
+
+    def __init__(self, table: RecordTable):
+        self.table = table
+        self.lower_names = [(name or "").lower() for name in table.names]
+        self.haystack = "\x00".join(self.lower_names)
+        self.starts = list(accumulate(map((1).__add__, map(len, self.lower_names)), initial=0))
+        self._by_id: dict | None = None
+        self._by_type: dict | None = None
+        self._last: tuple[list, list[int]] | None = None
+
+    @staticmethod
+    def _group_rows(column) -> dict:
+        """Map each value of a column to its row, or list of rows if repeated."""
+        values = column.tolist()
+        rows = dict(zip(values, range(len(values))))
+        if len(rows) == len(values):
+            # All distinct, the usual case for ids
+            return rows
+        groups: dict[int, list[int]] = {}
+        for i, v in enumerate(values):
+            groups.setdefault(v, []).append(i)
+        return groups
+
+    @staticmethod
+    def _lookup(groups: dict, value: int) -> list[int]:
+        rows = groups.get(value, [])
+        return [rows] if isinstance(rows, int) else rows
+
+    def rows_with_id(self, rid: int) -> list[int]:
+        if self._by_id is None:
+            self._by_id = self._group_rows(self.table.columns["id"])
+        return self._lookup(self._by_id, rid)
+
+    def rows_with_type(self, rtype: int) -> list[int]:
+        if self._by_type is None:
+            self._by_type = self._group_rows(self.table.columns["type"])
+        return self._lookup(self._by_type, rtype)
+
+    def rows_with_name(self, text: str) -> list[int]:
+        """Rows whose lower-cased name contains text (already lower-cased)."""
+        if not text:
+            # e.g. a bare "name:" term: no filter, and "" would be found at every row
+            return list(range(len(self.lower_names)))
+        hay, starts = self.haystack, self.starts
+        limit = len(self.lower_names) // self.SCAN_FRACTION
+        rows = []
+        pos = hay.find(text)
+        while pos != -1:
+            if len(rows) > limit:
+                return [i for i, name in enumerate(self.lower_names) if text in name]
+            row = bisect_right(starts, pos) - 1
+            rows.append(row)
+            pos = hay.find(text, starts[row + 1])
+        return rows
+
+    @staticmethod
+    def normalize(terms) -> list[tuple[str, object]]:
+        """Turn _parse_filter terms into (kind, value) pairs.
+
+        id/type values become ints (None if not a number yet); anything
+        else is a lower-cased name substring, as before.
+        """
+        out = []
+        for k, v in terms:
+            if k in ("id", "type"):
+                out.append((k, _parse_int(v)))
+            else:
+                out.append(("name", v.lower()))
+        return out
+
+    @staticmethod
+    def _narrows(old, new) -> bool:
+        # Every old term must be implied by some new term
+        for k, v in old:
+            if not any(
+                k2 == k and (v2 == v or (k == "name" and v in v2))
+                for k2, v2 in new
+            ):
+                return False
+        return True
+
+    def search(self, terms) -> list[int]:
+        """Rows matching all terms, in index order."""
+        terms = self.normalize(terms)
+        if self._last is not None and self._narrows(self._last[0], terms):
+            candidates = self._last[1]
+        else:
+            candidates = None
+
+        # Exact-match terms first: they are the most selective
+        names = self.lower_names
+        for k, v in sorted(terms, key=lambda t: t[0] == "name"):
+            if k == "name":
+                if candidates is None:
+                    candidates = self.rows_with_name(v)
+                else:
+                    candidates = [i for i in candidates if v in names[i]]
+            else:
+                found = [] if v is None else (self.rows_with_id(v) if k == "id" else self.rows_with_type(v))
+                if candidates is None:
+                    candidates = found
+                else:
+                    keep = set(found)
+                    candidates = [i for i in candidates if i in keep]
+            if not candidates:
+                break
+
+        rows = candidates if candidates is not None else list(range(len(names)))
+        self._last = (terms, rows)
+        return rows
+
+
+def pack_table(table: RecordTable) -> tuple[int, bytes, bytes]:
+    """Flatten a record table to (count, column bytes, NUL-separated names)."""
+    blob = b"".join(table.columns[name].tobytes() for name in INDEX_COLUMNS)
+    names_blob = "\x00".join(name or "" for name in table.names).encode("utf-8")
+    return len(table), blob, names_blob
+
+
+def unpack_table(wad_path: str, count: int, blob: bytes, names_blob: bytes) -> RecordTable:
+    """Rebuild a record table flattened by pack_table."""
+    columns = {}
+    pos = 0
+    for name, code in INDEX_COLUMNS.items():
+        end = pos + count * array(code).itemsize
+        if np is not None:
+            columns[name] = np.frombuffer(blob, dtype=np.dtype(code), count=count, offset=pos)
+        else:
+            columns[name] = array(code, blob[pos:end])
+        pos = end
+    names = names_blob.decode("utf-8").split("\x00") if count else []
+    return RecordTable(wad_path, columns, names)
+
+
+def parse_wad_packed(path: str) -> tuple[int, bytes, bytes]:
+    """Process-pool entry point: parse one archive and return it packed.
+
+    Only three plain values cross the process boundary, whatever the
+    number of records.
+    """
+    wf = WadFile(path)
+    wf.load_index()
+    wf.resolve_names()
+    return pack_table(wf.records)
+
+
+def _default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "wadexplorer")
+
+
+class WadIndexCache:
+    """Decoded indexes and names of the WAD files in one folder.
+
+    One SQLite database per folder, kept in the user's cache directory
+    since game folders are often read-only. Entries are keyed by path,
+    size and mtime, so a changed archive is parsed again and replaced.
+    Columns are stored as their raw array bytes, names as one
+    NUL-separated UTF-8 blob. Content hashes from a duplicate scan are
+    kept per record under the same key. Any database error disables the
+    cache rather than failing the load.
+    """
+
+    VERSION = 1
+
+    def __init__(self, folder: str, cache_dir: str | None = None):
+        folder = os.path.abspath(folder)
+        cache_dir = cache_dir or _default_cache_dir()
+        key = hashlib.sha1(folder.encode("utf-8", errors="surrogateescape")).hexdigest()[:16]
+        self.db_path = os.path.join(cache_dir, f"{key}.sqlite")
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.db = sqlite3.connect(self.db_path)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS wad_index ("
+                " path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER,"
+                " version INTEGER, byteorder TEXT, record_count INTEGER,"
+                " columns BLOB, names BLOB)"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS record_hash ("
+                " path TEXT, size INTEGER, mtime_ns INTEGER, row INTEGER,"
+                " digest BLOB, PRIMARY KEY (path, row))"
+            )
+        except (OSError, sqlite3.Error):
+            self.db = None
+
+    @staticmethod
+    def _stat(path: str) -> tuple[int, int]:
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+
+    def load(self, wf: WadFile) -> bool:
+        if self.db is None:
+            return False
+        try:
+            size, mtime_ns = self._stat(wf.path)
+            row = self.db.execute(
+                "SELECT record_count, columns, names FROM wad_index"
+                " WHERE path = ? AND size = ? AND mtime_ns = ? AND version = ? AND byteorder = ?",
+                (os.path.abspath(wf.path), size, mtime_ns, self.VERSION, sys.byteorder),
+            ).fetchone()
+        except (OSError, sqlite3.Error):
+            return False
+        if row is None:
+            return False
+
+        wf.records = unpack_table(wf.path, *row)
+        return True
+
+    def store(self, wf: WadFile) -> None:
+        if self.db is None:
+            return
+        count, blob, names_blob = pack_table(wf.records)
+        try:
+            size, mtime_ns = self._stat(wf.path)
+            with self.db:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO wad_index VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (os.path.abspath(wf.path), size, mtime_ns, self.VERSION, sys.byteorder,
+                     count, blob, names_blob),
+                )
+                # Hashes of an older copy of the archive no longer apply
+                self.db.execute("DELETE FROM record_hash WHERE path = ?", (os.path.abspath(wf.path),))
+        except (OSError, sqlite3.Error):
+            pass
+
+    def load_hashes(self, wf: WadFile) -> dict[int, bytes]:
+        """Content hashes already stored for the archive, by row."""
+        if self.db is None:
+            return {}
+        try:
+            size, mtime_ns = self._stat(wf.path)
+            return dict(self.db.execute(
+                "SELECT row, digest FROM record_hash WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (os.path.abspath(wf.path), size, mtime_ns),
+            ))
+        except (OSError, sqlite3.Error):
+            return {}
+
+    def store_hashes(self, wf: WadFile, rows: list[int], digests: list[bytes]) -> None:
+        if self.db is None:
+            return
+        try:
+            size, mtime_ns = self._stat(wf.path)
+            path = os.path.abspath(wf.path)
+            with self.db:
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO record_hash VALUES (?, ?, ?, ?, ?)",
+                    ((path, size, mtime_ns, row, digest) for row, digest in zip(rows, digests)),
+                )
+        except (OSError, sqlite3.Error):
+            pass
+
+    def forget_missing(self, paths: list[str]) -> None:
+        """Drop entries for archives that are no longer in the folder."""
+        if self.db is None:
+            return
+        keep = {os.path.abspath(p) for p in paths}
+        try:
+            with self.db:
+                stale = [(p,) for (p,) in self.db.execute("SELECT path FROM wad_index") if p not in keep]
+                self.db.executemany("DELETE FROM wad_index WHERE path = ?", stale)
+                self.db.executemany("DELETE FROM record_hash WHERE path = ?", stale)
+        except sqlite3.Error:
+            pass
+
+    def close(self) -> None:
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+HASH_DIGEST_SIZE = 16
+HASH_BATCH_BYTES = 64 * 1024 * 1024
+HASH_BATCH_RECORDS = 4096
+
+
+def hash_record_ranges(path: str, offsets, sizes) -> bytes:
+    """Process-pool entry point: blake2b digests of byte ranges of one file.
+
+    offsets and sizes are arrays; the digests come back concatenated,
+    HASH_DIGEST_SIZE bytes each.
+    """
+    out = bytearray()
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            for offset, size in zip(offsets, sizes):
+                with view[offset:offset + size] as data:
+                    out += hashlib.blake2b(data, digest_size=HASH_DIGEST_SIZE).digest()
+    return bytes(out)
+
+
+class DuplicateScan:
+    """Finds records with identical content across the loaded archives.
+
+    Only records that share their size with another record are hashed:
+    blake2b over the mapped byte range, in batches on a process pool,
+    each archive read in offset order. Each batch's hashes go into the
+    folder's WadIndexCache as soon as it finishes, so a cancelled scan
+    picks up where it stopped. Progress counters are polled by the UI
+    as with ExtractJob.
+    """
+
+    def __init__(self, wad_files: list[WadFile]):
+        self.wad_files = list(wad_files)
+        self.total_bytes = 0
+        self.done_bytes = 0
+        self.total_files = 0
+        self.done_files = 0
+        self.failed: list[tuple[str, Exception]] = []
+        self.groups: list[list[tuple[WadFile, int]]] = []
+        self.finished = False
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def start(self) -> None:
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def progress_text(self) -> str:
+        return (
+            f"Hashing {self.done_files}/{self.total_files} records, "
+            f"{_format_bytes(self.done_bytes)} / {_format_bytes(self.total_bytes)}"
+        )
+
+    def _candidates(self) -> list:
+        """Per archive, the rows whose size occurs more than once overall."""
+        sizes = [wf.records.columns["data_size"] for wf in self.wad_files]
+        if np is not None:
+            values, counts = np.unique(np.concatenate([np.asarray(c) for c in sizes]), return_counts=True)
+            shared = values[(counts > 1) & (values > 0)]
+            return [np.flatnonzero(np.isin(np.asarray(c), shared)).tolist() for c in sizes]
+        counts = Counter()
+        for c in sizes:
+            counts.update(c)
+        return [[i for i, size in enumerate(c) if size and counts[size] > 1] for c in sizes]
+
+    def _batches(self, wf: WadFile, rows: list[int]):
+        """Split rows into (rows, offsets, sizes) batches in file order."""
+        offsets = wf.records.column_values("data_offset", rows)
+        sizes = wf.records.column_values("data_size", rows)
+        order = sorted(range(len(rows)), key=offsets.__getitem__)
+        batch: list[int] = []
+        batch_bytes = 0
+        for k in order:
+            batch.append(k)
+            batch_bytes += sizes[k]
+            if batch_bytes >= HASH_BATCH_BYTES or len(batch) >= HASH_BATCH_RECORDS:
+                yield ([rows[k] for k in batch], array("Q", (offsets[k] for k in batch)),
+                       array("Q", (sizes[k] for k in batch)))
+                batch, batch_bytes = [], 0
+        if batch:
+            yield ([rows[k] for k in batch], array("Q", (offsets[k] for k in batch)),
+                   array("Q", (sizes[k] for k in batch)))
+
+    def _run(self) -> None:
+        caches: dict[str, WadIndexCache] = {}
+        digests: dict[tuple[int, int], bytes] = {}
+        try:
+            tasks = []
+            for wi, (wf, rows) in enumerate(zip(self.wad_files, self._candidates())):
+                d = os.path.dirname(os.path.abspath(wf.path))
+                if d not in caches:
+                    caches[d] = WadIndexCache(d)
+                known = caches[d].load_hashes(wf)
+                sizes = wf.records.column_values("data_size", rows)
+                todo = []
+                for row, size in zip(rows, sizes):
+                    self.total_bytes += size
+                    self.total_files += 1
+                    if row in known:
+                        digests[(wi, row)] = known[row]
+                        self.done_bytes += size
+                        self.done_files += 1
+                    else:
+                        todo.append(row)
+                tasks.extend((wi, batch) for batch in self._batches(wf, todo))
+
+            def finished_batch(wi, batch, result):
+                wf = self.wad_files[wi]
+                rows, _, sizes = batch
+                found = [result[k:k + HASH_DIGEST_SIZE] for k in range(0, len(result), HASH_DIGEST_SIZE)]
+                for row, digest in zip(rows, found):
+                    digests[(wi, row)] = digest
+                caches[os.path.dirname(os.path.abspath(wf.path))].store_hashes(wf, rows, found)
+                self.done_bytes += sum(sizes)
+                self.done_files += len(rows)
+
+            workers = min(len(tasks), os.cpu_count() or 1)
+            if workers <= 1:
+                for wi, batch in tasks:
+                    if self.cancelled:
+                        return
+                    try:
+                        result = hash_record_ranges(self.wad_files[wi].path, batch[1], batch[2])
+                    except Exception as ex:
+                        self.failed.append((self.wad_files[wi].path, ex))
+                        continue
+                    finished_batch(wi, batch, result)
+            else:
+                ctx = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                    futures = {
+                        pool.submit(hash_record_ranges, self.wad_files[wi].path, batch[1], batch[2]): (wi, batch)
+                        for wi, batch in tasks
+                    }
+                    for fut in as_completed(futures):
+                        if self.cancelled:
+                            pool.shutdown(cancel_futures=True)
+                            return
+                        wi, batch = futures[fut]
+                        try:
+                            result = fut.result()
+                        except Exception as ex:
+                            self.failed.append((self.wad_files[wi].path, ex))
+                            continue
+                        finished_batch(wi, batch, result)
+
+            groups: dict[tuple[int, bytes], list[tuple[WadFile, int]]] = {}
+            for (wi, row), digest in digests.items():
+                wf = self.wad_files[wi]
+                size = int(wf.records.columns["data_size"][row])
+                groups.setdefault((size, digest), []).append((wf, row))
+            # Most wasted space first
+            self.groups = sorted(
+                (g for g in groups.values() if len(g) > 1),
+                key=lambda g: -int(g[0][0].records.columns["data_size"][g[0][1]]) * (len(g) - 1),
+            )
+        except Exception as ex:
+            self.failed.append(("", ex))
+        finally:
+            for cache in caches.values():
+                cache.close()
+            self.finished = True
+
+
+PREVIEW_HEAD = 4096
+PREVIEW_MAX_IMAGE = 64 * 1024 * 1024
+# Without Pillow, tk.PhotoImage decodes at full size on the Tk thread
+PREVIEW_MAX_TK_IMAGE = 4 * 1024 * 1024
+PREVIEW_MAX_TK_PIXELS = 2048 * 2048
+PREVIEW_CACHE_SIZE = 128
+THUMBNAIL_SIZE = 256
+
+# (magic at offset 0, kind, description)
+MAGIC_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image", "PNG image"),
+    (b"\xff\xd8\xff", "image", "JPEG image"),
+    (b"GIF87a", "image", "GIF image"),
+    (b"GIF89a", "image", "GIF image"),
+    (b"DDS ", "image", "DirectDraw Surface"),
+    (b"OggS", "audio", "Ogg stream"),
+    (b"FSB5", "audio", "FMOD sound bank"),
+    (b"BKHD", "audio", "Wwise sound bank"),
+    (b"ID3", "audio", "MP3 audio"),
+    (b"PK\x03\x04", "archive", "ZIP archive"),
+    (b"\x1f\x8b", "archive", "gzip data"),
+    (b"%PDF", "document", "PDF document"),
+    (b"<?xml", "text", "XML text"),
+)
+RIFF_FORMS = {
+    b"WAVE": ("audio", "WAV audio"),
+    b"WEBP": ("image", "WebP image"),
+    b"AVI ": ("video", "AVI video"),
+}
+
+
+def sniff_format(head: bytes) -> tuple[str, str]:
+    """Guess (kind, description) of a record from its first bytes."""
+    for magic, kind, desc in MAGIC_SIGNATURES:
+        if head.startswith(magic):
+            return kind, desc
+    if head[:4] == b"RIFF" and head[8:12] in RIFF_FORMS:
+        return RIFF_FORMS[head[8:12]]
+    if head[:2] == b"BM" and len(head) >= 26 and int.from_bytes(head[2:6], "little") > 26:
+        return "image", "BMP image"
+    if len(head) >= 2 and head[0] == 0x78 and int.from_bytes(head[:2], "big") % 31 == 0:
+        return "archive", "zlib stream"
+    if head and b"\x00" not in head:
+        try:
+            # a full head may end inside a multi-byte character; a shorter one is the whole record
+            codecs.getincrementaldecoder("utf-8")().decode(head, final=len(head) < PREVIEW_HEAD)
+            return "text", "Text"
+        except UnicodeDecodeError:
+            pass
+    return "binary", "Binary data"
+
+
+def _hex_dump(data: bytes, width: int = 16) -> str:
+    lines = []
+    for pos in range(0, len(data), width):
+        chunk = data[pos:pos + width]
+        hexes = " ".join(f"{b:02X}" for b in chunk)
+        text = "".join(chr(b) if 32 <= b < 127 else "." for b in chunk)
+        lines.append(f"{pos:08X}  {hexes:<{width * 3}} {text}")
+    return "\n".join(lines)
+
+
+class Preview:
+    """What the preview pane shows for one record."""
+
+    __slots__ = ("info", "text", "image", "tk_data")
+
+    def __init__(self, info: str, text: str = "", image=None, tk_data: bytes | None = None):
+        self.info = info
+        self.text = text
+        self.image = image        # PIL thumbnail, when Pillow is installed
+        self.tk_data = tk_data    # base64 PNG/GIF for tk.PhotoImage otherwise
+
+
+def _image_pixels(head: bytes, desc: str) -> int | None:
+    """Width times height from a PNG or GIF header, if it is readable."""
+    if desc == "PNG image" and len(head) >= 24:
+        return int.from_bytes(head[16:20], "big") * int.from_bytes(head[20:24], "big")
+    if desc == "GIF image" and len(head) >= 10:
+        return int.from_bytes(head[6:8], "little") * int.from_bytes(head[8:10], "little")
+    return None
+
+
+def build_preview(wf: WadFile, row: int) -> Preview:
+    """Sniff a record and decode a thumbnail when it is an image."""
+    size = int(wf.records.columns["data_size"][row])
+    head = wf.read_data(row, PREVIEW_HEAD)
+    kind, desc = sniff_format(head)
+    info = f"{desc}, {size} bytes"
+
+    if kind == "image" and size <= PREVIEW_MAX_IMAGE:
+        if Image is not None:
+            try:
+                img = Image.open(io.BytesIO(wf.read_data(row)))
+                img.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+                return Preview(f"{info}, {img.width}x{img.height} thumbnail", image=img.convert("RGBA"))
+            except Exception as ex:
+                info = f"{info} (cannot decode: {ex})"
+        elif desc in ("PNG image", "GIF image"):
+            pixels = _image_pixels(head, desc)
+            if size <= PREVIEW_MAX_TK_IMAGE and pixels is not None and pixels <= PREVIEW_MAX_TK_PIXELS:
+                return Preview(info, tk_data=base64.b64encode(wf.read_data(row)))
+            info = f"{info} (too large to preview without Pillow)"
+
+    if kind == "text":
+        return Preview(info, text=head.decode("utf-8", errors="replace"))
+    return Preview(info, text=_hex_dump(head[:512]))
+
+
+class PreviewCache:
+    """Least-recently-used store of built previews."""
+
+    def __init__(self, maxsize: int = PREVIEW_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._items: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        preview = self._items.get(key)
+        if preview is not None:
+            self._items.move_to_end(key)
+        return preview
+
+    def put(self, key, preview: Preview) -> None:
+        self._items[key] = preview
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+class PreviewLoader:
+    """Builds previews on a background thread, newest request only.
+
+    Requests overtaken before the worker reaches them are dropped, so
+    holding down an arrow key doesn't queue up decodes. on_done is
+    called from the worker thread.
+    """
+
+    def __init__(self, on_done):
+        self.on_done = on_done
+        self._queue: queue.Queue = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def request(self, wf: WadFile, row: int) -> None:
+        self._queue.put((wf, row))
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            wf, row = item
+            try:
+                preview = build_preview(wf, row)
+            except Exception as ex:
+                preview = Preview(f"Preview failed: {ex}")
+            self.on_done(wf, row, preview)
+
+
+EXTRACT_CHUNK = 8 * 1024 * 1024
+EXTRACT_WORKERS = 4
+
+# copy_file_range / sendfile failures that mean "not here, use the next way"
+_COPY_FALLBACK_ERRNOS = {
+    errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+    getattr(errno, "ENOTSOCK", errno.EINVAL), getattr(errno, "ENOTSUP", errno.EOPNOTSUPP),
+}
+
+
+def _copy_range(src_fd: int, dst_fd: int, offset: int, size: int, cancel: threading.Event, on_bytes) -> bool:
+    """Copy size bytes at offset of src_fd to the current position of dst_fd.
+
+    Uses copy_file_range (no copy through user space), then sendfile,
+    then plain chunked read/write, moving down as one is refused.
+    Stops early at end of file or when cancel is set; returns False if
+    cancelled before the end.
+    """
+    use_cfr = hasattr(os, "copy_file_range")
+    use_sendfile = hasattr(os, "sendfile")
+    pos, end = offset, offset + size
+    while pos < end and not cancel.is_set():
+        n = min(EXTRACT_CHUNK, end - pos)
+        try:
+            if use_cfr:
+                done = os.copy_file_range(src_fd, dst_fd, n, pos)
+            elif use_sendfile:
+                done = os.sendfile(dst_fd, src_fd, pos, n)
+            else:
+                os.lseek(src_fd, pos, os.SEEK_SET)
+                data = os.read(src_fd, n)
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(dst_fd, view):]
+                done = len(data)
+        except OSError as ex:
+            if (use_cfr or use_sendfile) and ex.errno in _COPY_FALLBACK_ERRNOS:
+                if use_cfr:
+                    use_cfr = False
+                else:
+                    use_sendfile = False
+                continue
+            raise
+        if done == 0:
+            break  # short record at end of file, as f.read() would give
+        pos += done
+        on_bytes(done)
+    return not (pos < end and cancel.is_set())
+
+
+def _output_file_name(rid: int, name: str | None) -> str:
+    base = name.strip() if name else f"id_{rid:08X}"
+    # sanitize
+    base = "".join(c if c not in r'<>:"/\|?*' else "_" for c in base)
+    return f"{base}.bin"
+
+
+class ExtractJob:
+    """Copies a batch of records out of one WAD file on a thread pool.
+
+    The counters are plain attributes for the UI to poll; cancel() stops
+    the workers between chunks, skips the records not started yet and
+    removes any half-written file.
+    """
+
+    def __init__(self, wad_path: str, out_dir: str, records: list[tuple[int, int, int, str | None]],
+                 workers: int = EXTRACT_WORKERS):
+        # records: (id, data_offset, data_size, name)
+        self.wad_path = wad_path
+        self.out_dir = out_dir
+        self.workers = max(1, min(workers, len(records)))
+        self.jobs: list[tuple[int, int, str]] = []
+        # compared lower-cased: Windows and macOS file systems ignore case
+        used: set[str] = set()
+        for rid, data_offset, data_size, name in records:
+            fn = _output_file_name(rid, name)
+            stem, n = fn[:-4], 1
+            while fn.lower() in used:
+                fn = f"{stem}_{rid:08X}.bin" if n == 1 else f"{stem}_{rid:08X}_{n}.bin"
+                n += 1
+            used.add(fn.lower())
+            self.jobs.append((data_offset, data_size, os.path.join(out_dir, fn)))
+
+        self.total_files = len(self.jobs)
+        self.total_bytes = sum(size for _, size, _ in self.jobs)
+        self.done_files = 0
+        self.done_bytes = 0
+        self.failed: list[tuple[str, Exception]] = []
+        self.finished = False
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def start(self) -> None:
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def progress_text(self) -> str:
+        return (
+            f"{self.done_files}/{self.total_files} files, "
+            f"{_format_bytes(self.done_bytes)} / {_format_bytes(self.total_bytes)}"
+        )
+
+    def _run(self) -> None:
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for job in self.jobs:
+                    pool.submit(self._extract_one, *job)
+        finally:
+            self.finished = True
+
+    def _add_bytes(self, n: int) -> None:
+        with self._lock:
+            self.done_bytes += n
+
+    def _extract_one(self, data_offset: int, data_size: int, out_path: str) -> None:
+        if self._cancel.is_set():
+            return
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+        created = False
+        try:
+            src = os.open(self.wad_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+            try:
+                dst = os.open(out_path, flags, 0o666)
+                created = True
+                try:
+                    complete = _copy_range(src, dst, data_offset, data_size, self._cancel, self._add_bytes)
+                finally:
+                    os.close(dst)
+            finally:
+                os.close(src)
+            if not complete:
+                os.remove(out_path)
+                return
+        except Exception as ex:
+            if created:
+                # don't leave a truncated file that looks like a good extract
+                try:
+                    os.remove(out_path)
+                except OSError:
+                    pass
+            with self._lock:
+                self.failed.append((out_path, ex))
+            return
+        with self._lock:
+            self.done_files += 1
+
+
+def _format_bytes(n: int) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if n < 1024 or unit == "GiB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+class VirtualRecordGrid(ttk.Frame):
+    """A record list that only builds the rows on screen.
+
+    The filtered result is kept as an array of record indices. The
+    Treeview holds just enough items to fill its height; scrolling
+    re-fills them from the array, formatting ids and times as they come
+    into view. Selection is a set of record indices, so it survives
+    sorting and scrolling; click, Ctrl-click and Shift-click work as in
+    an extended-select Treeview.
+    """
+
+    COLUMNS = (
+        ("id", "ID", 120, "e"),
+        ("type", "Type", 120, "e"),
+        ("size", "Size", 120, "e"),
+        ("mtime", "ModifiedTime", 220, "w"),
+        ("name", "Name", 420, "w"),
+    )
+    # display column -> RecordTable column (None: sort by name)
+    SORT_COLUMNS = {"id": "id", "type": "type", "size": "data_size", "mtime": "modified_time", "name": None}
+
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.tree = ttk.Treeview(self, columns=[c[0] for c in self.COLUMNS], show="headings", selectmode="none")
+        for key, text, width, anchor in self.COLUMNS:
+            self.tree.heading(key, text=text, command=lambda k=key: self.sort_by(k))
+            self.tree.column(key, width=width, anchor=anchor)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+
+        self.scroll = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scroll.grid(row=0, column=1, sticky="ns")
+
+        style = ttk.Style(self)
+        self.tree.tag_configure(
+            "selected",
+            background=style.lookup("Treeview", "background", ["selected"]) or "#4a6984",
+            foreground=style.lookup("Treeview", "foreground", ["selected"]) or "#ffffff",
+        )
+
+        self.table: RecordTable | None = None
+        self.rows = []               # position -> record index
+        self.top = 0                 # position of the first visible row
+        self.selected: int | None = None    # focus row
+        self.selection: set[int] = set()
+        self._anchor = 0                     # position Shift-click extends from
+        self._sort: tuple[str, bool] | None = None
+        self._items: list[str] = []
+
+        self.tree.bind("<Configure>", lambda e: self.refresh())
+        self.tree.bind("<Button-1>", lambda e: self._on_click(e, "set"))
+        self.tree.bind("<Control-Button-1>", lambda e: self._on_click(e, "toggle"))
+        self.tree.bind("<Shift-Button-1>", lambda e: self._on_click(e, "extend"))
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_rows(-3 if e.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda e: self.scroll_rows(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_rows(3))
+        for key, step in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "-page"), ("<Next>", "page"),
+                          ("<Home>", "home"), ("<End>", "end")):
+            self.tree.bind(key, lambda e, step=step: self._on_key(step))
+
+    # --- data ---
+
+    def set_rows(self, table: RecordTable | None, rows) -> None:
+        """Show the given record indices of table, in the current sort order."""
+        self.table = table
+        self.rows = self._sorted(rows) if self._sort and table is not None else rows
+        self.top = 0
+        # Keep only the focus row, and only if it is still selected and listed
+        if self.selected not in self.selection or self._position_of(self.selected) is None:
+            self.selected = None
+        self.selection = {self.selected} if self.selected is not None else set()
+        self.refresh()
+
+    def clear(self) -> None:
+        self.selected = None
+        self.set_rows(None, [])
+
+    def selected_row(self) -> int | None:
+        return self.selected
+
+    def show_row(self, row: int) -> bool:
+        """Select a record and scroll it into the middle of the view."""
+        pos = self._position_of(row)
+        if pos is None:
+            return False
+        self.selected = row
+        self.selection = {row}
+        self._anchor = pos
+        self.top = max(0, pos - self._visible_count() // 2)
+        self.refresh()
+        self.event_generate("<<RecordSelect>>")
+        return True
+
+    def selected_rows(self) -> list[int]:
+        """Selected record indices, in display order."""
+        if not self.selection:
+            return []
+        if np is not None and isinstance(self.rows, np.ndarray):
+            return self.rows[np.isin(self.rows, list(self.selection))].tolist()
+        return [i for i in self.rows if i in self.selection]
+
+    def sort_by(self, key: str) -> None:
+        descending = self._sort is not None and self._sort == (key, False)
+        self._sort = (key, descending)
+        for k, text, _, _ in self.COLUMNS:
+            arrow = (" \u25bc" if descending else " \u25b2") if k == key else ""
+            self.tree.heading(k, text=text + arrow)
+        if self.table is not None:
+            self.rows = self._sorted(self.rows)
+            self.top = 0
+            self.refresh()
+
+    def _sorted(self, rows):
+        key, descending = self._sort
+        column = self.SORT_COLUMNS[key]
+        table = self.table
+        if column is None:
+            # Names are Python strings either way; sort them in C
+            out = sorted(rows, key=table.names.__getitem__, reverse=descending)
+            return np.asarray(out, dtype=np.intp) if np is not None else out
+        if np is not None:
+            rows = np.asarray(rows, dtype=np.intp)
+            order = np.argsort(table.columns[column][rows], kind="stable")
+            return rows[order[::-1]] if descending else rows[order]
+        return sorted(rows, key=table.columns[column].__getitem__, reverse=descending)
+
+    # --- view ---
+
+    def _visible_count(self) -> int:
+        height = self.tree.winfo_height()
+        row_height = 0
+        header = 0
+        if self._items:
+            bbox = self.tree.bbox(self._items[0])
+            if bbox:
+                header, row_height = bbox[1], bbox[3]
+        if not row_height:
+            row_height = int(ttk.Style(self).lookup("Treeview", "rowheight") or 20)
+            header = row_height + 4
+        return max(1, (height - header) // row_height)
+
+    def refresh(self) -> None:
+        """Re-fill the on-screen rows from the row array."""
+        n = len(self.rows)
+        count = min(self._visible_count(), n)
+        self.top = max(0, min(self.top, n - count))
+        window = self.rows[self.top:self.top + count]
+
+        while len(self._items) < len(window):
+            self._items.append(self.tree.insert("", "end"))
+        if len(self._items) > len(window):
+            self.tree.delete(*self._items[len(window):])
+            del self._items[len(window):]
+
+        if len(window):
+            table = self.table
+            ids = table.column_values("id", window)
+            types = table.column_values("type", window)
+            sizes = table.column_values("data_size", window)
+            mtimes = table.column_values("modified_time", window)
+            for iid, i, rid, rtype, size, mtime in zip(self._items, window, ids, types, sizes, mtimes):
+                i = int(i)
+                self.tree.item(
+                    iid,
+                    values=(
+                        f"0x{rid:08X}",
+                        f"0x{rtype:08X}",
+                        size,
+                        _format_unix_like_time(mtime),
+                        table.names[i] or "",
+                    ),
+                    tags=("selected",) if i in self.selection else (),
+                )
+
+        if n:
+            self.scroll.set(self.top / n, (self.top + count) / n)
+        else:
+            self.scroll.set(0.0, 1.0)
+
+    def scroll_rows(self, delta: int) -> str:
+        self.top += delta
+        self.refresh()
+        return "break"
+
+    def _on_scrollbar(self, *args) -> None:
+        n = len(self.rows)
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * n)
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= self._visible_count()
+            self.top += step
+        self.refresh()
+
+    # --- selection ---
+
+    def _position_of(self, row: int) -> int | None:
+        if np is not None and isinstance(self.rows, np.ndarray):
+            hits = np.flatnonzero(self.rows == row)
+            return int(hits[0]) if len(hits) else None
+        try:
+            return self.rows.index(row)
+        except ValueError:
+            return None
+
+    def _on_click(self, event, mode: str):
+        if self.tree.identify_region(event.x, event.y) not in ("cell", "tree"):
+            return None  # let headings and separators do their job
+        self.tree.focus_set()
+        iid = self.tree.identify_row(event.y)
+        if iid in self._items:
+            pos = self.top + self._items.index(iid)
+            row = int(self.rows[pos])
+            if mode == "toggle":
+                self.selection ^= {row}
+                self._anchor = pos
+            elif mode == "extend":
+                lo, hi = sorted((self._anchor, pos))
+                span = self.rows[lo:hi + 1]
+                self.selection = set(span.tolist() if hasattr(span, "tolist") else span)
+            else:
+                self.selection = {row}
+                self._anchor = pos
+            self.selected = row
+            self.refresh()
+            self.event_generate("<<RecordSelect>>")
+        return "break"
+
+    def _on_key(self, step) -> str:
+        n = len(self.rows)
+        if not n:
+            return "break"
+        page = self._visible_count()
+        pos = self._position_of(self.selected) if self.selected is not None else None
+        if pos is None:
+            pos = self.top - (1 if step in (1, "page") else 0)
+        if step == "home":
+            pos = 0
+        elif step == "end":
+            pos = n - 1
+        elif step == "page":
+            pos += page
+        elif step == "-page":
+            pos -= page
+        else:
+            pos += step
+        pos = max(0, min(pos, n - 1))
+        self.selected = int(self.rows[pos])
+        self.selection = {self.selected}
+        self._anchor = pos
+        # Keep the selection on screen
+        if pos < self.top:
+            self.top = pos
+        elif pos >= self.top + page:
+            self.top = pos - page + 1
+        self.refresh()
+        self.event_generate("<<RecordSelect>>")
+        return "break"
 
 
 class WadBrowserApp(tk.Tk):
@@ -148,8 +1446,10 @@ class WadBrowserApp(tk.Tk):
         self.geometry("1200x750")
 
         self.wad_files: list[WadFile] = []
+        self._load_gen = 0
         self.current_wad: WadFile | None = None
-        self.filtered_records: list[WadRecord] = []
+        self.filtered_rows: range | list[int] = []
+        self._filter_job: str | None = None
 
         self._build_ui()
 
@@ -169,7 +1469,7 @@ class WadBrowserApp(tk.Tk):
         self.var_filter = tk.StringVar()
         ent = ttk.Entry(top, textvariable=self.var_filter, width=60)
         ent.pack(side=tk.LEFT, fill=tk.X, expand=True)
-        ent.bind("<KeyRelease>", lambda e: self.apply_filter())
+        ent.bind("<KeyRelease>", lambda e: self._schedule_filter())
 
         btn_clear = ttk.Button(top, text="Clear", command=self._clear_filter)
         btn_clear.pack(side=tk.LEFT, padx=(6, 0))
@@ -177,6 +1477,12 @@ class WadBrowserApp(tk.Tk):
         btn_extract = ttk.Button(top, text="Extract Selected (Raw)...", command=self.extract_selected)
         btn_extract.pack(side=tk.LEFT, padx=(12, 0))
 
+        btn_extract_all = ttk.Button(top, text="Extract All Matching...", command=self.extract_matching)
+        btn_extract_all.pack(side=tk.LEFT, padx=(6, 0))
+
+        btn_dups = ttk.Button(top, text="Find Duplicates...", command=self.find_duplicates)
+        btn_dups.pack(side=tk.LEFT, padx=(6, 0))
+
         # Main split
         paned = ttk.Panedwindow(self, orient=tk.HORIZONTAL)
         paned.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=8, pady=6)
@@ -210,33 +1516,46 @@ class WadBrowserApp(tk.Tk):
 
         ttk.Label(right, text="Records").grid(row=0, column=0, sticky="w")
 
-        cols = ("id", "type", "size", "mtime", "name")
-        self.tree_rec = ttk.Treeview(right, columns=cols, show="headings")
-        self.tree_rec.heading("id", text="ID")
-        self.tree_rec.heading("type", text="Type")
-        self.tree_rec.heading("size", text="Size")
-        self.tree_rec.heading("mtime", text="ModifiedTime")
-        self.tree_rec.heading("name", text="Name")
-
-        self.tree_rec.column("id", width=120, anchor="e")
-        self.tree_rec.column("type", width=120, anchor="e")
-        self.tree_rec.column("size", width=120, anchor="e")
-        self.tree_rec.column("mtime", width=220, anchor="w")
-        self.tree_rec.column("name", width=420, anchor="w")
-
-        self.tree_rec.grid(row=1, column=0, sticky="nsew")
-
-        yscroll_rec = ttk.Scrollbar(right, orient=tk.VERTICAL, command=self.tree_rec.yview)
-        self.tree_rec.configure(yscrollcommand=yscroll_rec.set)
-        yscroll_rec.grid(row=1, column=1, sticky="ns")
-
-        self.tree_rec.bind("<Double-1>", lambda e: self._double_click_record())
+        self.grid_rec = VirtualRecordGrid(right)
+        self.grid_rec.grid(row=1, column=0, sticky="nsew")
+        self.grid_rec.tree.bind("<Double-1>", lambda e: self._double_click_record())
+        self.grid_rec.bind("<<RecordSelect>>", lambda e: self._request_preview())
+
+        # Far right: preview of the focused record
+        preview = ttk.Frame(paned)
+        preview.grid_rowconfigure(3, weight=1)
+        preview.grid_columnconfigure(0, weight=1)
+        paned.add(preview, weight=1)
+
+        ttk.Label(preview, text="Preview").grid(row=0, column=0, sticky="w")
+        self.var_preview = tk.StringVar()
+        ttk.Label(preview, textvariable=self.var_preview, wraplength=300).grid(row=1, column=0, sticky="w")
+        self.lbl_preview = ttk.Label(preview, anchor="center")
+        self.lbl_preview.grid(row=2, column=0, sticky="ew")
+        self.txt_preview = tk.Text(preview, width=40, wrap="none", font="TkFixedFont", state="disabled")
+        self.txt_preview.grid(row=3, column=0, sticky="nsew")
 
         # Status bar
         self.var_status = tk.StringVar(value="Ready.")
         status = ttk.Label(self, textvariable=self.var_status, relief=tk.SUNKEN, anchor="w")
         status.pack(side=tk.BOTTOM, fill=tk.X)
 
+        # Progress of a background job (extraction, duplicate scan)
+        self.frm_job = ttk.Frame(self)
+        self.var_job = tk.StringVar()
+        self.pb_job = ttk.Progressbar(self.frm_job, mode="determinate")
+        self.pb_job.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Label(self.frm_job, textvariable=self.var_job, width=56).pack(side=tk.LEFT, padx=(6, 0))
+        ttk.Button(self.frm_job, text="Cancel", command=self._cancel_job).pack(side=tk.LEFT, padx=(6, 0))
+        self._status_label = status
+        self._job: ExtractJob | DuplicateScan | None = None
+
+        self._preview_cache = PreviewCache()
+        self._preview_loader = PreviewLoader(
+            lambda wf, row, p: self.after(0, lambda: self._preview_ready(wf, row, p))
+        )
+        self._preview_photo = None  # keeps the shown image alive
+
     def _set_status(self, s: str):
         self.var_status.set(s)
         self.update_idletasks()
@@ -273,41 +1592,112 @@ class WadBrowserApp(tk.Tk):
                 messagebox.showinfo("WAD Browser", "No .wad files found in that folder.")
                 self._set_status("No .wad files found.")
                 return
-            self._load_wad_paths(wad_paths)
+            self._load_wad_paths(wad_paths, folder)
         except Exception as ex:
             messagebox.showerror("Error", f"Failed to load WADs:\n{ex}")
             self._set_status("Load failed.")
 
-    def _load_wad_paths(self, wad_paths: list[str]):
+    def _load_wad_paths(self, wad_paths: list[str], folder: str | None = None):
+        gen = self._load_gen
+        n = len(wad_paths)
+
+        def post(fn):
+            # Drop results of a load that has since been replaced
+            self.after(0, lambda: fn() if gen == self._load_gen else None)
+
         def worker():
+            caches: dict[str, WadIndexCache] = {}
+            failed: list[tuple[str, Exception]] = []
+            done = 0
+
+            def loaded(wf: WadFile, cached: bool):
+                nonlocal done
+                done += 1
+                note = " (cached)" if cached else ""
+                status = f"Loaded {done}/{n}: {os.path.basename(wf.path)}{note}"
+                post(lambda: self._add_loaded_wad(wf, status))
+
             try:
-                wad_files: list[WadFile] = []
-                for i, p in enumerate(wad_paths, 1):
+                pending: list[tuple[WadFile, WadIndexCache]] = []
+                for p in wad_paths:
+                    d = os.path.dirname(os.path.abspath(p))
+                    if d not in caches:
+                        caches[d] = WadIndexCache(d)
                     wf = WadFile(p)
-                    wf.load_index()
-                    wad_files.append(wf)
-                    self.after(0, lambda i=i, n=len(wad_paths), p=p: self._set_status(f"Loaded {i}/{n}: {os.path.basename(p)}"))
-
-                self.after(0, lambda: self._apply_loaded_wads(wad_files))
+                    if caches[d].load(wf):
+                        loaded(wf, True)
+                    else:
+                        pending.append((wf, caches[d]))
+
+                workers = min(len(pending), os.cpu_count() or 1)
+                if workers == 1:
+                    # A pool of one only adds start-up and copying costs
+                    for wf, cache in pending:
+                        if gen != self._load_gen:
+                            return
+                        try:
+                            wf.load_index()
+                            wf.resolve_names()
+                        except Exception as ex:
+                            failed.append((wf.path, ex))
+                            continue
+                        cache.store(wf)
+                        loaded(wf, False)
+                elif pending:
+                    ctx = multiprocessing.get_context("spawn")
+                    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                        futures = {pool.submit(parse_wad_packed, wf.path): (wf, cache) for wf, cache in pending}
+                        for fut in as_completed(futures):
+                            if gen != self._load_gen:
+                                pool.shutdown(cancel_futures=True)
+                                return
+                            wf, cache = futures[fut]
+                            try:
+                                wf.records = unpack_table(wf.path, *fut.result())
+                            except Exception as ex:
+                                failed.append((wf.path, ex))
+                                continue
+                            cache.store(wf)
+                            loaded(wf, False)
+
+                folder_cache = caches.get(os.path.abspath(folder)) if folder else None
+                if folder_cache is not None:
+                    folder_cache.forget_missing(wad_paths)
+                post(lambda: self._finish_loading(failed))
             except Exception as ex:
                 self.after(0, lambda: messagebox.showerror("Error", f"Failed to load WADs:\n{ex}"))
                 self.after(0, lambda: self._set_status("Load failed."))
+            finally:
+                for cache in caches.values():
+                    cache.close()
 
         threading.Thread(target=worker, daemon=True).start()
 
-    def _apply_loaded_wads(self, wad_files: list[WadFile]):
-        self.wad_files = wad_files
-        for wf in wad_files:
-            self.tree_wads.insert("", "end", values=(wf.path, len(wf.records)))
-        self._set_status(f"Loaded {len(wad_files)} WAD file(s). Select one to browse records.")
+    def _add_loaded_wad(self, wf: WadFile, status: str):
+        # Archives arrive in completion order; keep the list sorted by path
+        idx = bisect([w.path for w in self.wad_files], wf.path)
+        self.wad_files.insert(idx, wf)
+        self.tree_wads.insert("", idx, values=(wf.path, len(wf.records)))
+        self._set_status(status)
+
+    def _finish_loading(self, failed: list[tuple[str, Exception]]):
+        if failed:
+            details = "\n".join(f"{os.path.basename(p)}: {ex}" for p, ex in failed)
+            messagebox.showerror("Error", f"Failed to load {len(failed)} WAD file(s):\n{details}")
+        self._set_status(f"Loaded {len(self.wad_files)} WAD file(s). Select one to browse records.")
 
     def _clear_all(self):
+        self._load_gen += 1
+        for wf in self.wad_files:
+            wf.close()
+        # the same paths may be loaded again after the files changed
+        self._preview_cache.clear()
+        self._show_preview(None)
         self.wad_files = []
         self.current_wad = None
-        self.filtered_records = []
-        for t in (self.tree_wads, self.tree_rec):
-            for item in t.get_children():
-                t.delete(item)
+        self.filtered_rows = []
+        self.tree_wads.delete(*self.tree_wads.get_children())
+        self.grid_rec.clear()
 
     def on_select_wad(self, _evt=None):
         sel = self.tree_wads.selection()
@@ -316,7 +1706,11 @@ class WadBrowserApp(tk.Tk):
         idx = self.tree_wads.index(sel[0])
         if idx < 0 or idx >= len(self.wad_files):
             return
+        if self.wad_files[idx] is self.current_wad:
+            return
         self.current_wad = self.wad_files[idx]
+        # Row numbers mean other records in another archive
+        self.grid_rec.clear()
         self.apply_filter()
 
     def _parse_filter(self, s: str):
@@ -337,10 +1731,19 @@ class WadBrowserApp(tk.Tk):
                 terms.append(("name", part))
         return terms
 
+    def _schedule_filter(self, delay_ms: int = 150):
+        # Debounce typing: filter once the keys stop for a moment
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(delay_ms, self.apply_filter)
+
     def apply_filter(self):
-        self.tree_rec.delete(*self.tree_rec.get_children())
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+            self._filter_job = None
 
         if not self.current_wad:
+            self.grid_rec.clear()
             self._set_status("No WAD selected.")
             return
 
@@ -348,108 +1751,248 @@ class WadBrowserApp(tk.Tk):
         recs = self.current_wad.records
 
         if not terms:
-            self.filtered_records = recs
+            self.filtered_rows = range(len(recs))
         else:
-            out = []
-            for r in recs:
-                ok = True
-                for k, v in terms:
-                    if k == "id":
-                        target = int(v, 16) if v.lower().startswith("0x") else int(v, 10)
-                        if r.id != target:
-                            ok = False
-                            break
-                    elif k == "type":
-                        target = int(v, 16) if v.lower().startswith("0x") else int(v, 10)
-                        if r.type != target:
-                            ok = False
-                            break
-                    elif k == "name":
-                        # lazy load only if needed
-                        r.ensure_name_loaded()
-                        if v.lower() not in (r.name or "").lower():
-                            ok = False
-                            break
-                    else:
-                        # unknown key => treat as name token
-                        r.ensure_name_loaded()
-                        if v.lower() not in (r.name or "").lower():
-                            ok = False
-                            break
-                if ok:
-                    out.append(r)
-            self.filtered_records = out
-
-        # Populate list (don’t force-name-load unless already loaded by filter)
-        for r in self.filtered_records[:200000]:  # guard against insane UI spam
-            r.ensure_name_loaded()
-            name = r.name or ""
-            self.tree_rec.insert(
-                "", "end",
-                values=(
-                    f"0x{r.id:08X}",
-                    f"0x{r.type:08X}",
-                    r.data_size,
-                    _format_unix_like_time(int(r.modified_time)),
-                    name
-                )
-            )
+            self.filtered_rows = self.current_wad.search_index().search(terms)
+
+        self.grid_rec.set_rows(recs, self.filtered_rows)
+        if self.grid_rec.selected_row() is None:
+            self._show_preview(None)
 
         self._set_status(
-            f"WAD: {os.path.basename(self.current_wad.path)} | records: {len(self.current_wad.records)} | shown: {len(self.filtered_records)}"
+            f"WAD: {os.path.basename(self.current_wad.path)} | records: {len(self.current_wad.records)} | shown: {len(self.filtered_rows)}"
         )
 
-    def _get_selected_record(self) -> WadRecord | None:
-        if not self.current_wad:
-            return None
-        sel = self.tree_rec.selection()
-        if not sel:
-            return None
-        idx = self.tree_rec.index(sel[0])
-        if idx < 0 or idx >= len(self.filtered_records):
-            return None
-        return self.filtered_records[idx]
-
     def _double_click_record(self):
-        r = self._get_selected_record()
-        if not r:
+        row = self.grid_rec.selected_row()
+        if row is None or not self.current_wad:
             return
         # load name on demand and refresh that row
-        r.ensure_name_loaded()
-        item = self.tree_rec.selection()[0]
-        vals = list(self.tree_rec.item(item, "values"))
-        vals[4] = r.name or ""
-        self.tree_rec.item(item, values=vals)
+        self.current_wad.resolve_names([row])
+        self.grid_rec.refresh()
+
+    def _request_preview(self):
+        wf, row = self.current_wad, self.grid_rec.selected_row()
+        if wf is None or row is None:
+            self._show_preview(None)
+            return
+        preview = self._preview_cache.get((wf.path, row))
+        if preview is not None:
+            self._show_preview(preview)
+            return
+        self.var_preview.set("Loading preview...")
+        self._preview_loader.request(wf, row)
+
+    def _preview_ready(self, wf: WadFile, row: int, preview: Preview):
+        if not any(w is wf for w in self.wad_files):
+            return  # built from a file closed since it was requested
+        self._preview_cache.put((wf.path, row), preview)
+        if wf is self.current_wad and row == self.grid_rec.selected_row():
+            self._show_preview(preview)
+
+    def _show_preview(self, preview: Preview | None):
+        self._preview_photo = None
+        if preview is not None and preview.image is not None:
+            self._preview_photo = ImageTk.PhotoImage(preview.image)
+        elif preview is not None and preview.tk_data is not None:
+            try:
+                photo = tk.PhotoImage(data=preview.tk_data)
+                factor = -(-max(photo.width(), photo.height()) // THUMBNAIL_SIZE)
+                self._preview_photo = photo.subsample(factor) if factor > 1 else photo
+            except tk.TclError as ex:
+                preview = Preview(f"{preview.info} (cannot decode: {ex})")
+        self.lbl_preview.configure(image=self._preview_photo or "")
+        self.var_preview.set(preview.info if preview else "")
+
+        self.txt_preview.configure(state="normal")
+        self.txt_preview.delete("1.0", tk.END)
+        if preview is not None and preview.text:
+            self.txt_preview.insert("1.0", preview.text)
+        self.txt_preview.configure(state="disabled")
 
     def extract_selected(self):
-        r = self._get_selected_record()
-        if not r:
+        if not self.current_wad or not self.grid_rec.selected_rows():
             messagebox.showinfo("Extract", "Select a record first.")
             return
+        self._start_extract(self.grid_rec.selected_rows())
+
+    def extract_matching(self):
+        if not self.current_wad or not len(self.filtered_rows):
+            messagebox.showinfo("Extract", "No records match the filter.")
+            return
+        self._start_extract(self.grid_rec.rows)
+
+    def _job_running(self) -> bool:
+        if self._job is not None and not self._job.finished:
+            messagebox.showinfo("WAD Browser", "Another job is still running.")
+            return True
+        return False
+
+    def _start_extract(self, rows):
+        if self._job_running():
+            return
 
         out_dir = filedialog.askdirectory(title="Select output folder")
         if not out_dir:
             return
 
-        # Determine output filename
-        r.ensure_name_loaded()
-        base = r.name.strip() if r.name else f"id_{r.id:08X}"
-        # sanitize
-        base = "".join(c if c not in r'<>:"/\|?*' else "_" for c in base)
-        out_path = os.path.join(out_dir, f"{base}.bin")
+        wf = self.current_wad
+        recs = wf.records
+        wf.resolve_names(rows)
+        records = list(zip(
+            recs.column_values("id", rows),
+            recs.column_values("data_offset", rows),
+            recs.column_values("data_size", rows),
+            (recs.names[int(i)] for i in rows),
+        ))
+        self._start_job(ExtractJob(wf.path, out_dir, records), self._extract_finished)
+
+    def _extract_finished(self, job: ExtractJob):
+        if job.cancelled:
+            self._set_status(f"Extraction cancelled after {job.done_files}/{job.total_files} file(s).")
+        else:
+            self._set_status(f"Extracted {job.done_files} file(s) to {job.out_dir}")
+        if job.failed:
+            details = "\n".join(f"{os.path.basename(p)}: {ex}" for p, ex in job.failed[:20])
+            messagebox.showerror("Extract", f"Failed to extract {len(job.failed)} file(s):\n{details}")
+        elif job.total_files == 1 and not job.cancelled:
+            messagebox.showinfo("Extract", f"Done:\n{job.jobs[0][2]}")
+
+    def find_duplicates(self):
+        if not self.wad_files:
+            messagebox.showinfo("Duplicates", "Load some WAD files first.")
+            return
+        if self._job_running():
+            return
+        self._start_job(DuplicateScan(self.wad_files), self._duplicates_finished)
+
+    def _duplicates_finished(self, scan: DuplicateScan):
+        if scan.failed:
+            details = "\n".join(f"{os.path.basename(p)}: {ex}" for p, ex in scan.failed[:20])
+            messagebox.showerror("Duplicates", f"Hashing failed for {len(scan.failed)} batch(es):\n{details}")
+        if scan.cancelled:
+            self._set_status(f"Duplicate scan cancelled; {scan.done_files}/{scan.total_files} records hashed so far.")
+            return
+        self._set_status(f"Found {len(scan.groups)} group(s) of duplicate records.")
+        DuplicatesWindow(self, scan.groups)
+
+    def _start_job(self, job, on_finished):
+        self._job = job
+        self.pb_job.configure(maximum=max(job.total_bytes, 1), value=0)
+        self.frm_job.pack(side=tk.BOTTOM, fill=tk.X, padx=8, pady=(0, 4), after=self._status_label)
+        job.start()
+        self._poll_job(on_finished)
+
+    def _cancel_job(self):
+        if self._job is not None:
+            self._job.cancel()
+            self.var_job.set("Cancelling...")
+
+    def _poll_job(self, on_finished):
+        job = self._job
+        if job is None:
+            return
+        # a scan only learns its total once it has started
+        self.pb_job.configure(maximum=max(job.total_bytes, 1), value=job.done_bytes)
+        if not job.cancelled:
+            self.var_job.set(job.progress_text())
+        if not job.finished:
+            self.after(100, lambda: self._poll_job(on_finished))
+            return
+        self.frm_job.pack_forget()
+        on_finished(job)
 
-        try:
-            with open(r.wad_path, "rb") as f:
-                f.seek(r.data_offset, os.SEEK_SET)
-                blob = f.read(r.data_size)
+    def show_record(self, wf: WadFile, row: int):
+        """Bring up one record of a loaded archive in the main list."""
+        if wf not in self.wad_files:
+            return
+        idx = self.wad_files.index(wf)
+        if wf is not self.current_wad:
+            self.current_wad = wf
+            self.grid_rec.clear()
+        self.var_filter.set("")
+        self.apply_filter()
+        self.tree_wads.selection_set(self.tree_wads.get_children()[idx])
+        self.tree_wads.see(self.tree_wads.get_children()[idx])
+        self.grid_rec.show_row(row)
 
-            with open(out_path, "wb") as o:
-                o.write(blob)
 
-            self._set_status(f"Extracted: {out_path}")
-            messagebox.showinfo("Extract", f"Done:\n{out_path}")
-        except Exception as ex:
-            messagebox.showerror("Extract", f"Failed:\n{ex}")
+class DuplicatesWindow(tk.Toplevel):
+    """Groups of records with identical content, largest waste first.
+
+    Each group lists its copies when opened; double-click a copy to
+    show it in the main window.
+    """
+
+    MAX_GROUPS = 10000
+
+    def __init__(self, app: WadBrowserApp, groups: list[list[tuple[WadFile, int]]]):
+        super().__init__(app)
+        self.title("Duplicate records")
+        self.geometry("900x500")
+        self.app = app
+        self.groups = groups[:self.MAX_GROUPS]
+
+        wasted = sum(
+            int(g[0][0].records.columns["data_size"][g[0][1]]) * (len(g) - 1) for g in groups
+        )
+        shown = f" (largest {len(self.groups)} shown)" if len(groups) > len(self.groups) else ""
+        ttk.Label(
+            self, text=f"{len(groups)} group(s), {_format_bytes(wasted)} in extra copies{shown}"
+        ).pack(side=tk.TOP, anchor="w", padx=8, pady=6)
+
+        frame = ttk.Frame(self)
+        frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=8, pady=(0, 8))
+        frame.grid_rowconfigure(0, weight=1)
+        frame.grid_columnconfigure(0, weight=1)
+
+        self.tree = ttk.Treeview(frame, columns=("size", "id", "name"), show="tree headings")
+        self.tree.heading("#0", text="Archive")
+        self.tree.heading("size", text="Size")
+        self.tree.heading("id", text="ID")
+        self.tree.heading("name", text="Name")
+        self.tree.column("#0", width=260, anchor="w")
+        self.tree.column("size", width=100, anchor="e")
+        self.tree.column("id", width=100, anchor="e")
+        self.tree.column("name", width=400, anchor="w")
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        yscroll = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=yscroll.set)
+        yscroll.grid(row=0, column=1, sticky="ns")
+
+        # group item -> group index; copy item -> (WadFile, row)
+        self._group_items: dict[str, int] = {}
+        self._copies: dict[str, tuple[WadFile, int]] = {}
+        for gi, group in enumerate(self.groups):
+            wf, row = group[0]
+            item = self.tree.insert(
+                "", "end", text=f"{len(group)} copies",
+                values=(int(wf.records.columns["data_size"][row]), "", wf.records.names[row] or ""),
+            )
+            self.tree.insert(item, "end")  # placeholder so the group can open
+            self._group_items[item] = gi
+
+        self.tree.bind("<<TreeviewOpen>>", self._on_open)
+        self.tree.bind("<Double-1>", self._on_double_click)
+
+    def _on_open(self, _evt=None):
+        item = self.tree.focus()
+        gi = self._group_items.pop(item, None)
+        if gi is None:
+            return  # already filled
+        self.tree.delete(*self.tree.get_children(item))
+        for wf, row in self.groups[gi]:
+            c = wf.records.columns
+            child = self.tree.insert(
+                item, "end", text=os.path.basename(wf.path),
+                values=(int(c["data_size"][row]), f"0x{int(c['id'][row]):08X}", wf.records.names[row] or ""),
+            )
+            self._copies[child] = (wf, row)
+
+    def _on_double_click(self, _evt=None):
+        copy = self._copies.get(self.tree.focus())
+        if copy is not None:
+            self.app.show_record(*copy)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+import os
+import struct
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import PAKExplorer
+from PAKExplorer import (
+    ArchiveIndex, PAK_ENTRY_STRUCT, PAK_HEADER_STRUCT, RPF7_BLOCK, RPF7_DIRECTORY,
+    RPF7_HEADER_STRUCT, RPF7_MAGIC,
+)
+
+
+def make_pak(files: list[tuple[str, bytes]], bad: tuple[int, int] | None = None) -> bytes:
+    """A PAK holding files, plus an entry "bad" with (offset, size) if given."""
+    data = bytearray()
+    entries = []
+    pos = PAK_HEADER_STRUCT.size
+    for name, body in files:
+        entries.append((name.encode(), pos, len(body)))
+        data += body
+        pos += len(body)
+    if bad is not None:
+        entries.append((b"bad", *bad))
+    directory = b"".join(PAK_ENTRY_STRUCT.pack(*entry) for entry in entries)
+    header = PAK_HEADER_STRUCT.pack(b"PACK", pos, len(directory))
+    return header + bytes(data) + directory
+
+
+def make_rpf7(tree: dict) -> bytes:
+    """An unencrypted RPF7 of tree: {name: bytes or a sub-tree}."""
+    entries: list[list] = [None]  # entry 0 is the root directory
+    names = bytearray(b"\x00")   # the root's name is ""
+    blobs = []
+
+    def name_offset(name: str) -> int:
+        off = len(names)
+        names.extend(name.encode() + b"\x00")
+        return off
+
+    def add_directory(index: int, name_off: int, items: dict):
+        # a directory's children are consecutive entries
+        first = len(entries)
+        entries[index] = ("dir", name_off, first, len(items))
+        entries.extend([None] * len(items))
+        subdirs = []
+        for k, (name, value) in enumerate(items.items()):
+            if isinstance(value, dict):
+                subdirs.append((first + k, name_offset(name), value))
+            else:
+                blobs.append(value)
+                entries[first + k] = ("file", name_offset(name), len(blobs) - 1)
+        for sub in subdirs:
+            add_directory(*sub)
+
+    add_directory(0, 0, tree)
+    data_at = -(-(RPF7_HEADER_STRUCT.size + 16 * len(entries) + len(names)) // RPF7_BLOCK) * RPF7_BLOCK
+    table = bytearray()
+    data = bytearray()
+    for entry in entries:
+        if entry[0] == "dir":
+            _, name_off, first, n = entry
+            table += struct.pack("<4I", name_off, RPF7_DIRECTORY, first, n)
+        else:
+            _, name_off, blob = entry
+            body = blobs[blob]
+            block = (data_at + len(data)) // RPF7_BLOCK
+            bits = name_off | (len(body) << 16) | (block << 40)
+            table += struct.pack("<4I", bits & 0xFFFFFFFF, bits >> 32, len(body), 0)
+            data += body + bytes(-len(body) % RPF7_BLOCK)
+    head = RPF7_HEADER_STRUCT.pack(RPF7_MAGIC, len(entries), len(names), 0) + table + names
+    return head + bytes(data_at - len(head)) + data
+
+
+class ArchiveTestCase(unittest.TestCase):
+
+    def setUp(self):
+        tmpdir = TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.dir = tmpdir.name
+
+    def archive(self, content: bytes) -> ArchiveIndex:
+        path = os.path.join(self.dir, "test.pak")
+        with open(path, "wb") as f:
+            f.write(content)
+        return ArchiveIndex(path)
+
+
+class TestPAK(ArchiveTestCase):
+
+    files = [
+        ("sound/items/r_item1.wav", b"r1"),
+        ("maps/e1m1.bsp", b"e1m1"),
+        ("Progs\\Player.mdl", b"player"),
+        ("progs/armor.mdl", b"armor"),
+        ("sound/ambience/wind2.wav", b"wind"),
+        ("default.cfg", b"bind"),
+    ]
+
+    def check_archive(self, archive: ArchiveIndex):
+        self.assertEqual(archive.kind, "PAK")
+        self.assertEqual(archive.paths, sorted(archive.paths))
+        # the backslash is replaced before sorting
+        self.assertEqual(archive.paths, [
+            "Progs/Player.mdl", "default.cfg", "maps/e1m1.bsp", "progs/armor.mdl",
+            "sound/ambience/wind2.wav", "sound/items/r_item1.wav",
+        ])
+        for name, body in self.files:
+            i = archive.paths.index(name.replace("\\", "/"))
+            self.assertEqual(archive.read(i), body)
+
+    def test_read_entries(self):
+        self.check_archive(self.archive(make_pak(self.files)))
+
+    def test_read_entries_without_numpy(self):
+        with mock.patch.object(PAKExplorer, "np", None):
+            self.check_archive(self.archive(make_pak(self.files)))
+
+    def test_children(self):
+        archive = self.archive(make_pak(self.files))
+        top = [(name, is_dir) for name, is_dir, _, _ in archive.children("")]
+        # folder names are case-sensitive, as in the archive
+        self.assertEqual(top, [
+            ("Progs", True), ("default.cfg", False), ("maps", True),
+            ("progs", True), ("sound", True),
+        ])
+        sound = archive.children("sound/")
+        self.assertEqual([(n, d) for n, d, _, _ in sound], [("ambience", True), ("items", True)])
+        name, _, first, end = sound[1]
+        self.assertEqual(archive.paths[first:end], ["sound/items/r_item1.wav"])
+        self.assertEqual(archive.children("sound/items/"), [("r_item1.wav", False, first, first + 1)])
+        self.assertEqual(archive.children("missing/"), [])
+
+    def test_search(self):
+        archive = self.archive(make_pak(self.files))
+        hits = [archive.paths[i] for i in archive.search("PROGS/")]
+        self.assertEqual(hits, ["Progs/Player.mdl", "progs/armor.mdl"])
+        self.assertEqual([archive.paths[i] for i in archive.search(".wav", limit=1)],
+                         ["sound/ambience/wind2.wav"])
+        self.assertEqual(archive.search("nothing"), [])
+
+    def test_directory_outside_file(self):
+        content = bytearray(make_pak(self.files))
+        content[4:8] = struct.pack("<i", len(content))
+        with self.assertRaises(ValueError):
+            self.archive(bytes(content))
+
+    def test_negative_offset_and_size(self):
+        for bad in ((-12, 4), (12, -1), (2**31 - 1, 4)):
+            with self.subTest(bad=bad):
+                archive = self.archive(make_pak(self.files, bad=bad))
+                total, outside = archive.scan()
+                self.assertEqual(outside, 1)
+                self.assertEqual(total, sum(len(body) for _, body in self.files))
+                with self.assertRaises(ValueError):
+                    archive.read(archive.paths.index("bad"))
+
+
+class TestRPF7(ArchiveTestCase):
+
+    tree = {
+        "x64": {
+            "Data": {"b.meta": b"b" * 700, "A.meta": b"a"},
+            "audio": {"sfx": {"one.awc": b"one"}},
+        },
+        "common.rpf": b"nested",
+        "Readme.txt": b"hello",
+    }
+
+    def test_read_entries(self):
+        archive = self.archive(make_rpf7(self.tree))
+        self.assertEqual(archive.kind, "RPF7")
+        self.assertEqual(archive.paths, [
+            "Readme.txt", "common.rpf", "x64/Data/A.meta", "x64/Data/b.meta",
+            "x64/audio/sfx/one.awc",
+        ])
+        self.assertEqual(archive.read(archive.paths.index("x64/Data/b.meta")), b"b" * 700)
+        self.assertEqual(archive.read(archive.paths.index("x64/audio/sfx/one.awc")), b"one")
+        self.assertEqual(archive.scan(), (715, 0))
+
+    def test_children_and_search(self):
+        archive = self.archive(make_rpf7(self.tree))
+        self.assertEqual([(n, d) for n, d, _, _ in archive.children("x64/")],
+                         [("Data", True), ("audio", True)])
+        self.assertEqual([n for n, _, _, _ in archive.children("x64/Data/")], ["A.meta", "b.meta"])
+        self.assertEqual([archive.paths[i] for i in archive.search("META")],
+                         ["x64/Data/A.meta", "x64/Data/b.meta"])
+
+    def test_encrypted(self):
+        content = bytearray(make_rpf7(self.tree))
+        content[12:16] = struct.pack("<I", 0x0FFFFFF9)
+        with self.assertRaisesRegex(ValueError, "Encrypted"):
+            self.archive(bytes(content))
+
+    def test_directory_loop(self):
+        content = bytearray(make_rpf7({"a": {"b": b"b"}}))
+        # point the sub-directory "a" back at the root's entries
+        entry = RPF7_HEADER_STRUCT.size + 16
+        content[entry + 8:entry + 12] = struct.pack("<I", 1)
+        with self.assertRaisesRegex(ValueError, "loops"):
+            self.archive(bytes(content))
+
+
+if __name__ == "__main__":
+    unittest.main()
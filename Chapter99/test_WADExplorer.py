@@ -0,0 +1,491 @@
+import errno
+import os
+import struct
+import threading
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import WADExplorer
+from WADExplorer import (
+    DuplicateScan, ExtractJob, SearchIndex, WadFile, WadIndexCache, WADF_HEADER_STRUCT,
+    WADF_INDEX_HEADER_STRUCT, WADF_INDEX_RECORD_STRUCT, _copy_range,
+)
+
+
+def make_wad(records: list[tuple[int, int, str, bytes]], blocks: list[int] | None = None) -> bytes:
+    """A WAD of records (id, type, name, data), its index split into blocks.
+
+    blocks gives the record count of each index block (default: one).
+    With more than one, the last block is put at the end of the file, so
+    the header chain has both a contiguous and an explicit next offset.
+    """
+    blocks = blocks or [len(records)]
+    head, tail = (blocks, []) if len(blocks) == 1 else (blocks[:-1], blocks[-1:])
+    names = bytearray()
+    name_offsets = []
+    data = bytearray()
+    data_offsets = []
+    for _, _, name, body in records:
+        name_offsets.append(len(names))
+        names += name.encode() + b"\x00"
+        data_offsets.append(len(data))
+        data += body
+
+    names_at = WADF_HEADER_STRUCT.size + sum(
+        WADF_INDEX_HEADER_STRUCT.size + n * WADF_INDEX_RECORD_STRUCT.size for n in head)
+    data_at = names_at + len(names)
+    tail_at = data_at + len(data)
+
+    def index_block(first: int, n: int, next_at: int) -> bytes:
+        return WADF_INDEX_HEADER_STRUCT.pack(n, next_at, 0, 0) + b"".join(
+            WADF_INDEX_RECORD_STRUCT.pack(
+                rid, data_at + data_offsets[k], len(body), names_at + name_offsets[k], 1000 + k, rtype, 0)
+            for k, (rid, rtype, _, body) in enumerate(records[first:first + n], first)
+        )
+
+    magic = struct.unpack("<I", b"WADF")[0]
+    out = bytearray(WADF_HEADER_STRUCT.pack(magic, 0, len(records), 0, 0, 0, 0, 0))
+    first = 0
+    for k, n in enumerate(head):
+        out += index_block(first, n, tail_at if tail and k == len(head) - 1 else 0)
+        first += n
+    out += names + data
+    for n in tail:
+        out += index_block(first, n, 0)
+    return bytes(out)
+
+
+class WadTestCase(unittest.TestCase):
+
+    records = [
+        (0x10, 1, "textures/Wall.dds", b"DDS wall"),
+        (0x11, 1, "textures/floor.dds", b"DDS floor"),
+        (0x20, 2, "sounds/step.ogg", b"OggS step"),
+        (0x21, 2, "sounds/Step.ogg", b"OggS STEP"),
+        (0x30, 3, "", b"no name"),
+        (0x31, 3, "scripts/init.lua", b"DDS wall"),
+    ]
+
+    def setUp(self):
+        tmpdir = TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.dir = tmpdir.name
+
+    def write(self, content: bytes, name: str = "test.wad") -> str:
+        path = os.path.join(self.dir, name)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def wad(self, content: bytes | None = None, name: str = "test.wad") -> WadFile:
+        wf = WadFile(self.write(content if content is not None else make_wad(self.records), name))
+        self.addCleanup(wf.close)
+        wf.load_index()
+        return wf
+
+
+class TestParseIndex(WadTestCase):
+
+    def check_index(self, wf: WadFile):
+        table = wf.records
+        self.assertEqual(len(table), len(self.records))
+        self.assertEqual([r.id for r in table], [rid for rid, _, _, _ in self.records])
+        self.assertEqual([r.type for r in table], [rtype for _, rtype, _, _ in self.records])
+        self.assertEqual([r.data_size for r in table], [len(body) for _, _, _, body in self.records])
+        self.assertEqual([r.modified_time for r in table], list(range(1000, 1000 + len(self.records))))
+        # names are only read once asked for
+        self.assertIsNone(table[0].name)
+
+    def test_parse_index(self):
+        self.check_index(self.wad())
+
+    def test_parse_index_without_numpy(self):
+        with mock.patch.object(WADExplorer, "np", None):
+            wf = self.wad()
+            self.check_index(wf)
+            self.assertNotIn("numpy", type(wf.records.columns["id"]).__module__)
+
+    def test_index_blocks(self):
+        for blocks in ([2, 4], [1, 2, 3], [6, 0]):
+            with self.subTest(blocks=blocks):
+                self.check_index(self.wad(make_wad(self.records, blocks)))
+                with mock.patch.object(WADExplorer, "np", None):
+                    self.check_index(self.wad(make_wad(self.records, blocks)))
+
+    def test_empty_archive(self):
+        for numpy in (WADExplorer.np, None):
+            with self.subTest(numpy=numpy is not None), mock.patch.object(WADExplorer, "np", numpy):
+                wf = self.wad(make_wad([]))
+                self.assertEqual(len(wf.records), 0)
+                wf.resolve_names()
+                self.assertEqual(wf.search_index().search([("name", "x")]), [])
+
+    def test_bad_files(self):
+        content = make_wad(self.records)
+        with self.assertRaisesRegex(ValueError, "too small"):
+            self.wad(content[:8])
+        with self.assertRaisesRegex(ValueError, "Bad magic"):
+            self.wad(b"XXXX" + content[4:])
+        with self.assertRaisesRegex(ValueError, "EOF"):
+            self.wad(content[:WADF_HEADER_STRUCT.size + 40])
+
+        looped = bytearray(make_wad(self.records, [2, 4]))
+        # point the first block's next header back at itself
+        looped[WADF_HEADER_STRUCT.size + 4:WADF_HEADER_STRUCT.size + 8] = struct.pack(
+            "<I", WADF_HEADER_STRUCT.size)
+        with self.assertRaisesRegex(ValueError, "loops"):
+            self.wad(bytes(looped))
+
+
+class TestNames(WadTestCase):
+
+    def names(self, wf: WadFile) -> list[str]:
+        return [r.name for r in wf.records]
+
+    def test_resolve_names(self):
+        wf = self.wad()
+        rec = wf.records[1]
+        wf.resolve_names([1, 3])
+        self.assertEqual(rec.name, "textures/floor.dds")
+        self.assertEqual(wf.records.names[3], "sounds/Step.ogg")
+        self.assertIsNone(wf.records.names[0])
+        wf.resolve_names()
+        self.assertEqual(self.names(wf), [name for _, _, name, _ in self.records])
+
+    def test_resolve_names_without_numpy(self):
+        with mock.patch.object(WADExplorer, "np", None):
+            wf = self.wad()
+            wf.resolve_names()
+            self.assertEqual(self.names(wf), [name for _, _, name, _ in self.records])
+
+    def test_shared_and_inner_offsets(self):
+        content = bytearray(make_wad(self.records))
+        wf = self.wad(bytes(content))
+        offsets = wf.records.columns["name_offset"]
+        # record 3 shares record 2's name; record 5 points into the middle of record 0's
+        index = WADF_HEADER_STRUCT.size + WADF_INDEX_HEADER_STRUCT.size
+        for row, offset in ((3, int(offsets[2])), (5, int(offsets[0]) + len("textures/"))):
+            at = index + row * WADF_INDEX_RECORD_STRUCT.size + 12
+            content[at:at + 4] = struct.pack("<I", offset)
+        wf = self.wad(bytes(content))
+        wf.resolve_names()
+        names = self.names(wf)
+        self.assertEqual(names[3], "sounds/step.ogg")
+        self.assertEqual(names[5], "Wall.dds")
+
+    def test_read_names(self):
+        buf = b"one\x00two\x00" + b"x" * 300 + b"\x00caf\xc3\xa9"
+        names = WADExplorer._read_names(buf, [0, 2, 4, 8, 309])
+        self.assertEqual(names, {
+            0: "one", 2: "e", 4: "two",
+            8: "x" * WADExplorer.NAME_FIELD_SIZE,  # cut at 256 bytes, as wadlib.c does
+            309: "café",
+        })
+        self.assertEqual(WADExplorer._read_names(buf, []), {})
+
+    def test_distant_names(self):
+        gap = WADExplorer.NAME_RANGE_GAP + 1
+        buf = b"near\x00" + bytes(gap) + b"far\x00"
+        self.assertEqual(WADExplorer._read_names(buf, [0, gap + 5]), {0: "near", gap + 5: "far"})
+
+
+class TestReadData(WadTestCase):
+
+    def test_read_data(self):
+        wf = self.wad()
+        for row, (_, _, _, body) in enumerate(self.records):
+            self.assertEqual(wf.read_data(row), body)
+        self.assertEqual(wf.read_data(2, limit=4), b"OggS")
+        self.assertEqual(wf.read_data(2, limit=100), b"OggS step")
+
+    def test_closed(self):
+        wf = self.wad()
+        self.assertEqual(wf.read_data(0), b"DDS wall")
+        wf.close()
+        with self.assertRaisesRegex(ValueError, "closed"):
+            wf.read_data(0)
+        # closing before the first read also stops later reads
+        wf = self.wad()
+        wf.close()
+        with self.assertRaisesRegex(ValueError, "closed"):
+            wf.read_data(0)
+
+
+class TestIndexCache(WadTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = WadIndexCache(self.dir, os.path.join(self.dir, "cache"))
+        self.addCleanup(self.cache.close)
+
+    def fresh(self, path: str) -> WadFile:
+        wf = WadFile(path)
+        self.addCleanup(wf.close)
+        return wf
+
+    def test_round_trip(self):
+        path = self.write(make_wad(self.records))
+        wf = self.fresh(path)
+        self.assertFalse(wf.load(self.cache))
+
+        cached = self.fresh(path)
+        self.assertTrue(cached.load(self.cache))
+        self.assertEqual(cached.records.names, wf.records.names)
+        for name in WADExplorer.INDEX_COLUMNS:
+            self.assertEqual(list(cached.records.columns[name]), list(wf.records.columns[name]))
+        self.assertEqual(cached.read_data(1), b"DDS floor")
+
+    def test_round_trip_without_numpy(self):
+        path = self.write(make_wad(self.records))
+        with mock.patch.object(WADExplorer, "np", None):
+            self.assertFalse(self.fresh(path).load(self.cache))
+            cached = self.fresh(path)
+            self.assertTrue(cached.load(self.cache))
+        self.assertEqual([r.name for r in cached.records], [name for _, _, name, _ in self.records])
+
+    def test_changed_file(self):
+        path = self.write(make_wad(self.records))
+        wf = self.fresh(path)
+        wf.load(self.cache)
+        self.cache.store_hashes(wf, [0], [b"d" * 16])
+        self.assertEqual(self.cache.load_hashes(wf), {0: b"d" * 16})
+
+        records = self.records[:2] + [(0x40, 4, "new.txt", b"new")]
+        self.write(make_wad(records))
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        changed = self.fresh(path)
+        self.assertEqual(self.cache.load_hashes(changed), {})
+        self.assertFalse(changed.load(self.cache))
+        self.assertEqual([r.name for r in changed.records], ["textures/Wall.dds", "textures/floor.dds", "new.txt"])
+        self.assertTrue(self.fresh(path).load(self.cache))
+
+    def test_forget_missing(self):
+        keep = self.write(make_wad(self.records), "keep.wad")
+        gone = self.write(make_wad(self.records), "gone.wad")
+        for path in (keep, gone):
+            self.fresh(path).load(self.cache)
+        self.cache.forget_missing([keep])
+        self.assertTrue(self.fresh(keep).load(self.cache))
+        self.assertFalse(self.cache.load(self.fresh(gone)))
+
+    def test_unusable_cache_dir(self):
+        blocker = self.write(b"", "not-a-dir")
+        cache = WadIndexCache(self.dir, blocker)
+        self.assertIsNone(cache.db)
+        wf = self.fresh(self.write(make_wad(self.records)))
+        self.assertFalse(wf.load(cache))
+        self.assertEqual(len(wf.records), len(self.records))
+
+
+class TestSearchIndex(WadTestCase):
+
+    def search(self, terms) -> list[str]:
+        wf = self.wad()
+        return [wf.records.names[i] for i in wf.search_index().search(terms)]
+
+    def test_name(self):
+        self.assertEqual(self.search([("name", "STEP")]), ["sounds/step.ogg", "sounds/Step.ogg"])
+        self.assertEqual(self.search([("name", "textures"), ("name", "dds")]),
+                         ["textures/Wall.dds", "textures/floor.dds"])
+        self.assertEqual(self.search([("name", "missing")]), [])
+
+    def test_empty_name(self):
+        self.assertEqual(len(self.search([("name", "")])), len(self.records))
+        self.assertEqual(self.search([("name", ""), ("type", "2")]), ["sounds/step.ogg", "sounds/Step.ogg"])
+
+    def test_id_and_type(self):
+        self.assertEqual(self.search([("id", "0x11")]), ["textures/floor.dds"])
+        self.assertEqual(self.search([("id", "16")]), ["textures/Wall.dds"])
+        self.assertEqual(self.search([("type", "1"), ("name", "wall")]), ["textures/Wall.dds"])
+        self.assertEqual(self.search([("id", "0x")]), [])
+        self.assertEqual(self.search([("type", "9")]), [])
+
+    def test_narrowing(self):
+        wf = self.wad()
+        index = wf.search_index()
+        self.assertIs(wf.search_index(), index)
+        self.assertEqual(len(index.search([("name", "s")])), 5)
+        # a longer term re-checks the previous hits only
+        with mock.patch.object(index, "rows_with_name") as rows_with_name:
+            self.assertEqual(index.search([("name", "sounds/s")]), [2, 3])
+        rows_with_name.assert_not_called()
+        self.assertEqual(index.search([("name", "lua")]), [5])
+
+    def test_many_hits(self):
+        # past SCAN_FRACTION the name list is scanned instead of the haystack
+        wf = self.wad()
+        wf.resolve_names()
+        index = SearchIndex(wf.records)
+        self.assertEqual(index.rows_with_name("."), [0, 1, 2, 3, 5])
+        self.assertEqual(index.rows_with_name("ogg"), [2, 3])
+
+    def test_without_numpy(self):
+        with mock.patch.object(WADExplorer, "np", None):
+            self.assertEqual(self.search([("type", "2"), ("id", "0x21")]), ["sounds/Step.ogg"])
+
+
+class TestExtract(WadTestCase):
+
+    def extract(self, records, **kwargs) -> ExtractJob:
+        out_dir = os.path.join(self.dir, "out")
+        os.mkdir(out_dir)
+        wf = self.wad()
+        wf.resolve_names()
+        return ExtractJob(wf.path, out_dir, [
+            (r.id, r.data_offset, r.data_size, r.name) for r in (wf.records[i] for i in records)
+        ], **kwargs)
+
+    def test_extract(self):
+        job = self.extract(range(len(self.records)), workers=2)
+        names = [os.path.basename(path) for _, _, path in job.jobs]
+        # Step.ogg differs only in case from step.ogg: it gets the id added
+        self.assertEqual(names, [
+            "textures_Wall.dds.bin", "textures_floor.dds.bin", "sounds_step.ogg.bin",
+            "sounds_Step.ogg_00000021.bin", "id_00000030.bin", "scripts_init.lua.bin",
+        ])
+        job._run()
+        self.assertTrue(job.finished)
+        self.assertEqual(job.failed, [])
+        self.assertEqual(job.done_files, len(self.records))
+        self.assertEqual(job.done_bytes, job.total_bytes)
+        for (_, _, _, body), (_, _, path) in zip(self.records, job.jobs):
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), body)
+
+    def test_repeated_names(self):
+        job = ExtractJob("test.wad", self.dir, [(1, 0, 0, "a"), (2, 0, 0, "A"), (2, 0, 0, "a")])
+        self.assertEqual([os.path.basename(path) for _, _, path in job.jobs],
+                         ["a.bin", "A_00000002.bin", "a_00000002_2.bin"])
+
+    def test_cancel(self):
+        job = self.extract([0, 1])
+        job.cancel()
+        job._run()
+        self.assertTrue(job.finished)
+        self.assertEqual(job.done_files, 0)
+        self.assertEqual(os.listdir(os.path.join(self.dir, "out")), [])
+
+    def test_failure_removes_file(self):
+        job = self.extract([0])
+        with mock.patch.object(WADExplorer, "_copy_range", side_effect=OSError(errno.EIO, "I/O error")):
+            job._run()
+        self.assertEqual(len(job.failed), 1)
+        self.assertEqual(job.done_files, 0)
+        self.assertEqual(os.listdir(os.path.join(self.dir, "out")), [])
+
+
+class TestCopyRange(WadTestCase):
+
+    content = bytes(range(256)) * 64
+
+    def copy(self, offset: int, size: int, cancel=None, on_bytes=None) -> tuple[bool, bytes]:
+        src_path = self.write(self.content, "src")
+        dst_path = os.path.join(self.dir, "dst")
+        src = os.open(src_path, os.O_RDONLY)
+        dst = os.open(dst_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+        try:
+            done = _copy_range(src, dst, offset, size, cancel or threading.Event(), on_bytes or (lambda n: None))
+        finally:
+            os.close(src)
+            os.close(dst)
+        with open(dst_path, "rb") as f:
+            return done, f.read()
+
+    def test_copy(self):
+        counted = []
+        self.assertEqual(self.copy(100, 5000, on_bytes=counted.append), (True, self.content[100:5100]))
+        self.assertEqual(sum(counted), 5000)
+
+    def test_short_record(self):
+        # a record running past the end of the file stops there
+        self.assertEqual(self.copy(len(self.content) - 10, 100), (True, self.content[-10:]))
+
+    def test_fallbacks(self):
+        refuse = OSError(errno.EXDEV, "Invalid cross-device link")
+        with mock.patch.object(os, "copy_file_range", side_effect=refuse, create=True):
+            self.assertEqual(self.copy(7, 1000), (True, self.content[7:1007]))
+            with mock.patch.object(os, "sendfile", side_effect=refuse, create=True):
+                self.assertEqual(self.copy(7, 1000), (True, self.content[7:1007]))
+
+    def test_other_errors(self):
+        with mock.patch.object(os, "copy_file_range", side_effect=OSError(errno.EIO, "I/O error"), create=True):
+            with self.assertRaises(OSError):
+                self.copy(0, 10)
+
+    def test_cancel(self):
+        cancel = threading.Event()
+        with mock.patch.object(WADExplorer, "EXTRACT_CHUNK", 1000):
+            done, data = self.copy(0, 5000, cancel, lambda n: cancel.set())
+        self.assertFalse(done)
+        self.assertEqual(data, self.content[:1000])
+
+
+class TestDuplicateScan(WadTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # the scan keeps its hashes in the default cache folder
+        patcher = mock.patch.dict(os.environ, {"XDG_CACHE_HOME": os.path.join(self.dir, "cache")})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # hash in this process rather than on a spawned pool
+        patcher = mock.patch.object(os, "cpu_count", return_value=1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def scan(self, wad_files) -> DuplicateScan:
+        scan = DuplicateScan(wad_files)
+        scan._run()
+        self.assertTrue(scan.finished)
+        self.assertEqual(scan.failed, [])
+        return scan
+
+    def test_one_archive(self):
+        wf = self.wad()
+        scan = self.scan([wf])
+        self.assertEqual([[row for _, row in g] for g in scan.groups], [[0, 5]])
+        # only the records whose size is shared were hashed
+        self.assertEqual(scan.total_files, 5)
+        self.assertEqual(scan.done_files, 5)
+        self.assertEqual(scan.done_bytes, scan.total_bytes)
+
+    def test_across_archives(self):
+        first = self.wad(name="first.wad")
+        second = self.wad(make_wad(self.records[2:] + [(0x50, 5, "copy.dds", b"DDS wall")]), "second.wad")
+        scan = self.scan([first, second])
+        self.assertEqual(
+            [[(wf.path, row) for wf, row in g] for g in scan.groups],
+            [
+                # most wasted bytes first
+                [(first.path, 0), (first.path, 5), (second.path, 3), (second.path, 4)],
+                [(first.path, 2), (second.path, 0)],
+                [(first.path, 3), (second.path, 1)],
+                [(first.path, 4), (second.path, 2)],
+            ],
+        )
+
+    def test_hashes_are_kept(self):
+        wf = self.wad()
+        self.scan([wf])
+        with mock.patch.object(WADExplorer, "hash_record_ranges") as hash_record_ranges:
+            scan = self.scan([wf])
+        hash_record_ranges.assert_not_called()
+        self.assertEqual([[row for _, row in g] for g in scan.groups], [[0, 5]])
+
+    def test_without_numpy(self):
+        with mock.patch.object(WADExplorer, "np", None):
+            scan = self.scan([self.wad()])
+        self.assertEqual([[row for _, row in g] for g in scan.groups], [[0, 5]])
+
+    def test_cancel(self):
+        scan = DuplicateScan([self.wad()])
+        scan.cancel()
+        scan._run()
+        self.assertTrue(scan.finished)
+        self.assertEqual(scan.groups, [])
+
+
+if __name__ == "__main__":
+    unittest.main()